@@ -0,0 +1,202 @@
+"""Adaptive concurrency limiter with a token bucket for HTTP output sinks.
+
+The limiter bounds how many requests are in flight to an endpoint and
+tunes that bound from the responses it gets (AIMD): every successful
+response grows the limit by roughly one per window of requests, and a 429
+or 503 halves it. A ``Retry-After`` header pauses all new requests until
+the requested time, and an optional token bucket caps the request rate.
+The current limit and in-flight count are exported as metrics.
+"""
+
+import math
+import threading
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+
+from app import config_shared
+from app.utils.metrics import record_adaptive_limit, record_throttled
+from app.utils.setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+THROTTLE_STATUSES = frozenset({429, 503})
+
+
+def parse_retry_after(value: object, now: Callable[[], datetime] | None = None) -> float | None:
+    """Parse a ``Retry-After`` header into seconds.
+
+    Args:
+        value (object): Header value: delay seconds or an HTTP date.
+        now (Optional[Callable[[], datetime]]): Current UTC time for HTTP dates.
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the header is missing or invalid.
+
+    """
+    if not isinstance(value, str) or not value.strip():
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=UTC)
+    current = now() if now else datetime.now(UTC)
+    return max(0.0, (when - current).total_seconds())
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit, Retry-After cooldown and token bucket for one sink."""
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 10,
+        rate: float = 0.0,
+        burst: int = 10,
+        max_retry_after: float = 60.0,
+        decrease: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the limiter.
+
+        Args:
+            name (str): Sink name, used for logs and metrics.
+            initial (int): Starting concurrency limit.
+            min_limit (int): Lowest limit after back-off.
+            max_limit (int): Highest limit after growth.
+            rate (float): Token bucket rate in requests per second; 0 disables it.
+            burst (int): Token bucket capacity.
+            max_retry_after (float): Cap on honoured Retry-After pauses, in seconds.
+            decrease (float): Factor the limit is multiplied by on a throttling response.
+            clock (Callable[[], float]): Monotonic time source.
+
+        """
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_retry_after = max_retry_after
+        self.decrease = decrease
+        self._clock = clock
+        self._limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self._inflight = 0
+        self._cooldown_until = 0.0
+        self._tokens = float(self.burst)
+        self._last_refill = clock()
+        self._cond = threading.Condition()
+        record_adaptive_limit(name, self.limit, 0)
+
+    @classmethod
+    def from_config(cls, name: str = "rest") -> "AdaptiveLimiter":
+        """Build the REST output limiter from shared configuration.
+
+        Args:
+            name (str): Sink name.
+
+        Returns:
+            AdaptiveLimiter: Configured limiter.
+
+        """
+        return cls(
+            name,
+            initial=config_shared.get_rest_concurrency_initial(),
+            min_limit=config_shared.get_rest_concurrency_min(),
+            max_limit=config_shared.get_rest_concurrency_max(),
+            rate=config_shared.get_rest_rate_limit_per_second(),
+            burst=config_shared.get_rest_rate_limit_burst(),
+            max_retry_after=config_shared.get_rest_retry_after_max_seconds(),
+        )
+
+    @property
+    def limit(self) -> int:
+        """Return the current concurrency limit."""
+        return int(self._limit)
+
+    @property
+    def inflight(self) -> int:
+        """Return the number of requests in flight."""
+        return self._inflight
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        """Wait for a request slot.
+
+        Args:
+            timeout (Optional[float]): Maximum seconds to wait; None waits indefinitely.
+
+        Returns:
+            bool: True if a slot was acquired (pair with ``release``), False on timeout.
+
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        with self._cond:
+            while True:
+                now = self._clock()
+                delay = self._delay_locked(now)
+                if delay <= 0:
+                    self._inflight += 1
+                    if self.rate > 0:
+                        self._tokens -= 1
+                    record_adaptive_limit(self.name, self.limit, self._inflight)
+                    return True
+                if deadline is not None:
+                    if deadline <= now:
+                        record_throttled(self.name, "timeout")
+                        return False
+                    delay = min(delay, deadline - now)
+                self._cond.wait(None if math.isinf(delay) else delay)
+
+    def release(self, status: int | None, retry_after: float | None = None) -> None:
+        """Return a request slot and adapt the limit to the response.
+
+        Args:
+            status (Optional[int]): HTTP status, or None if the request raised.
+            retry_after (Optional[float]): Seconds requested by a Retry-After header.
+
+        """
+        with self._cond:
+            self._inflight = max(0, self._inflight - 1)
+            if status in THROTTLE_STATUSES:
+                previous = self.limit
+                self._limit = max(float(self.min_limit), self._limit * self.decrease)
+                pause = min(retry_after or 0.0, self.max_retry_after)
+                self._cooldown_until = max(self._cooldown_until, self._clock() + pause)
+                record_throttled(self.name, str(status))
+                logger.warning(
+                    "🐢 %s sink throttled (%s); concurrency %d -> %d, pausing %.1fs",
+                    self.name,
+                    status,
+                    previous,
+                    self.limit,
+                    pause,
+                )
+            elif status is not None and 200 <= status < 300 and self._limit < self.max_limit:
+                self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+            record_adaptive_limit(self.name, self.limit, self._inflight)
+            self._cond.notify_all()
+
+    def _delay_locked(self, now: float) -> float:
+        """Return how long a new request must wait; caller holds the condition."""
+        if now < self._cooldown_until:
+            return self._cooldown_until - now
+        if self._inflight >= self.limit:
+            return math.inf  # woken by release()
+        if self.rate > 0:
+            self._tokens = min(
+                float(self.burst), self._tokens + (now - self._last_refill) * self.rate
+            )
+            self._last_refill = now
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+        return 0.0
+
+
+__all__ = ["THROTTLE_STATUSES", "AdaptiveLimiter", "parse_retry_after"]
@@ -0,0 +1,338 @@
+"""Arrow IPC segment ring for co-located consumers (``arrow`` output mode).
+
+Results are appended to a columnar buffer and sealed into Arrow IPC files
+once it holds ARROW_IPC_MAX_ROWS rows or is ARROW_IPC_MAX_SECONDS old.
+Segments are written to ARROW_IPC_DIR, which defaults to a directory on
+``/dev/shm`` so the files live in shared memory. Local readers memory-map
+the files and get Arrow tables that reference the mapped pages directly,
+with no copying or JSON parsing.
+
+Layout::
+
+    {ARROW_IPC_DIR}/
+        0000000000000041.arrow      sealed segment (Arrow IPC file format)
+        0000000000000042.arrow      newest sealed segment
+        0000000000000043.arrow.tmp  segment being written; never read
+
+Each segment holds one or more record batches with the ``ColumnBuffer``
+schema: dictionary-encoded ``symbol``, ``pattern``, ``model`` and
+``model_version`` strings, a ``timestamp[ms, tz=UTC]`` candle time and
+float64 ``open``/``high``/``low``/``close``/``volume`` columns. Sequence
+numbers increase monotonically (also across restarts) and a segment is
+renamed into place only once it is complete, so readers never see partial
+files. Only the newest ARROW_IPC_MAX_SEGMENTS segments are kept; a reader
+that still maps a deleted segment keeps its pages until it unmaps them.
+
+Buffers that cannot be sealed are handed to an ``on_failure`` hook as
+encoded results, so the output handler can spool and replay them when
+SPOOL_ENABLED is set.
+
+``ArrowIpcReader`` follows the ring from another process. pyarrow is an
+optional dependency (``pip install stock-tech-candlestick[arrow]``); the
+writer checks for it on construction, so a missing install surfaces
+before any results are buffered.
+"""
+
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from datetime import UTC, datetime
+from typing import Any
+
+from app import config_shared
+from app.encoded_batch import EncodedBatch, encode_item
+from app.parquet_writer import ColumnBuffer, require_pyarrow
+from app.s3_writer import parse_timestamp
+from app.utils.metrics import record_output_metrics
+from app.utils.setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SEGMENT_SUFFIX = ".arrow"
+
+
+def _segment_name(sequence: int) -> str:
+    """Return the file name of a segment."""
+    return f"{sequence:016d}{SEGMENT_SUFFIX}"
+
+
+def list_segments(directory: str) -> list[tuple[int, str]]:
+    """List the sealed segments of a ring, oldest first.
+
+    Args:
+        directory (str): Ring directory.
+
+    Returns:
+        list[tuple[int, str]]: Sequence numbers and paths of sealed segments.
+
+    """
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    segments = []
+    for name in names:
+        stem = name[: -len(SEGMENT_SUFFIX)]
+        if name.endswith(SEGMENT_SUFFIX) and stem.isdigit():
+            segments.append((int(stem), os.path.join(directory, name)))
+    return sorted(segments)
+
+
+def read_segment(path: str) -> Any:
+    """Memory-map one segment and return its contents without copying.
+
+    Args:
+        path (str): Sealed segment file.
+
+    Returns:
+        pyarrow.Table: Table whose buffers reference the mapped file.
+
+    """
+    pa = require_pyarrow("arrow")
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+class ArrowIpcWriter:
+    """Buffers results and seals them into a ring of Arrow IPC segments."""
+
+    def __init__(
+        self,
+        directory: str,
+        max_rows: int = 10000,
+        max_age_seconds: float = 1.0,
+        max_segments: int = 64,
+        clock: Callable[[], float] = time.monotonic,
+        start_flusher: bool = True,
+        on_failure: Callable[[list[bytes]], None] | None = None,
+        on_outcome: Callable[[bool, float], None] | None = None,
+    ) -> None:
+        """Initialize the writer.
+
+        Args:
+            directory (str): Ring directory (e.g. under /dev/shm).
+            max_rows (int): Buffered rows that seal a segment.
+            max_age_seconds (float): Buffer age that seals a segment.
+            max_segments (int): Sealed segments kept; older ones are deleted.
+            clock (Callable[[], float]): Monotonic time source.
+            start_flusher (bool): Start the background age-based flusher.
+            on_failure (Optional[Callable[[list[bytes]], None]]): Receives the
+                encoded results of a buffer that could not be sealed.
+            on_outcome (Optional[Callable[[bool, float], None]]): Told whether
+                each seal succeeded and how long it took, in seconds.
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+
+        """
+        require_pyarrow("arrow")
+        self.directory = directory
+        self.max_rows = max_rows
+        self.max_age_seconds = max_age_seconds
+        self.max_segments = max(1, max_segments)
+        self._clock = clock
+        self._buffer: ColumnBuffer | None = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._start_flusher = start_flusher
+        self._flusher: threading.Thread | None = None
+        self._on_failure = on_failure
+        self._on_outcome = on_outcome
+
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith(f"{SEGMENT_SUFFIX}.tmp"):
+                os.remove(os.path.join(directory, name))
+        existing = list_segments(directory)
+        self._sequence = existing[-1][0] if existing else 0
+
+    @classmethod
+    def from_config(
+        cls,
+        on_failure: Callable[[list[bytes]], None] | None = None,
+        on_outcome: Callable[[bool, float], None] | None = None,
+    ) -> "ArrowIpcWriter":
+        """Build a writer from shared configuration.
+
+        Args:
+            on_failure (Optional[Callable[[list[bytes]], None]]): Failed seal handler.
+            on_outcome (Optional[Callable[[bool, float], None]]): Seal result handler.
+
+        Returns:
+            ArrowIpcWriter: Configured writer.
+
+        """
+        return cls(
+            directory=config_shared.get_arrow_ipc_dir(),
+            max_rows=config_shared.get_arrow_ipc_max_rows(),
+            max_age_seconds=config_shared.get_arrow_ipc_max_seconds(),
+            max_segments=config_shared.get_arrow_ipc_max_segments(),
+            on_failure=on_failure,
+            on_outcome=on_outcome,
+        )
+
+    def add(self, batch: EncodedBatch) -> None:
+        """Append a batch to the buffer and seal it once full.
+
+        Args:
+            batch (EncodedBatch): Results to buffer.
+
+        """
+        self._ensure_flusher()
+        ready: ColumnBuffer | None = None
+        with self._lock:
+            if self._buffer is None:
+                self._buffer = ColumnBuffer(self._clock())
+            for item in batch:
+                ts = parse_timestamp(item.get("timestamp")) or datetime.now(UTC)
+                self._buffer.append(item, ts)
+            if len(self._buffer) >= self.max_rows:
+                ready, self._buffer = self._buffer, None
+        if ready is not None:
+            self._seal(ready)
+
+    def flush(self, force: bool = True) -> None:
+        """Seal the buffered results into a segment.
+
+        Args:
+            force (bool): Seal regardless of age; otherwise only past max age.
+
+        """
+        with self._lock:
+            buffer = self._buffer
+            if buffer is None or not len(buffer):
+                return
+            if not force and self._clock() - buffer.created < self.max_age_seconds:
+                return
+            self._buffer = None
+        self._seal(buffer)
+
+    def close(self) -> None:
+        """Stop the background flusher and seal everything still buffered."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+        self.flush(force=True)
+
+    def _seal(self, buffer: ColumnBuffer) -> None:
+        """Write one buffer as the next segment and drop segments beyond the ring size."""
+        start = time.perf_counter()
+        with self._write_lock:
+            sequence = self._sequence + 1
+            path = os.path.join(self.directory, _segment_name(sequence))
+            tmp_path = f"{path}.tmp"
+            try:
+                pa = require_pyarrow("arrow")
+                table = buffer.to_table()
+                with (
+                    pa.OSFile(tmp_path, "wb") as sink,
+                    pa.ipc.new_file(sink, table.schema) as writer,
+                ):
+                    writer.write_table(table)
+                os.replace(tmp_path, path)
+                self._sequence = sequence
+            except Exception:
+                logger.exception("❌ Arrow IPC segment write failed for %s", path)
+                duration = time.perf_counter() - start
+                record_output_metrics("arrow", success=False, duration_sec=duration)
+                if self._on_outcome is not None:
+                    self._on_outcome(False, duration)
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                if self._on_failure is not None:
+                    self._on_failure([encode_item(item) for item in buffer.to_items()])
+                return
+            for _, stale in list_segments(self.directory)[: -self.max_segments]:
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+        duration = time.perf_counter() - start
+        record_output_metrics("arrow", success=True, duration_sec=duration)
+        if self._on_outcome is not None:
+            self._on_outcome(True, duration)
+        logger.debug("🏹 Sealed %d result(s) into Arrow segment %s", len(buffer), path)
+
+    def _ensure_flusher(self) -> None:
+        """Start the background age-based flusher on first use."""
+        if not self._start_flusher or self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run_flusher, name="arrow-ipc-flusher", daemon=True
+                )
+                self._flusher.start()
+
+    def _run_flusher(self) -> None:
+        """Periodically seal a buffer that has exceeded its max age."""
+        interval = max(0.05, self.max_age_seconds / 4)
+        while not self._stop.wait(interval):
+            self.flush(force=False)
+
+
+class ArrowIpcReader:
+    """Follows an Arrow IPC segment ring from a co-located process."""
+
+    def __init__(self, directory: str, start: str = "earliest") -> None:
+        """Initialize the reader.
+
+        Args:
+            directory (str): Ring directory written by ``ArrowIpcWriter``.
+            start (str): 'earliest' to read the retained segments first, or
+                'latest' to read only segments sealed from now on.
+
+        """
+        if start not in ("earliest", "latest"):
+            raise ValueError(f"Unsupported start position: {start}")
+        self.directory = directory
+        self.position = 0
+        if start == "latest":
+            segments = list_segments(directory)
+            self.position = segments[-1][0] if segments else 0
+
+    def read_new(self) -> Iterator[Any]:
+        """Yield the segments sealed since the previous call, oldest first.
+
+        Segments deleted by the writer before they could be mapped are
+        skipped; a gap in sequence numbers means the reader fell behind.
+
+        Yields:
+            pyarrow.Table: Zero-copy table of one segment.
+
+        """
+        for sequence, path in list_segments(self.directory):
+            if sequence <= self.position:
+                continue
+            try:
+                table = read_segment(path)
+            except FileNotFoundError:
+                logger.warning("⚠️ Arrow segment %s was pruned before it was read", path)
+                self.position = sequence
+                continue
+            self.position = sequence
+            yield table
+
+    def poll(self, interval: float = 0.1, stop: threading.Event | None = None) -> Iterator[Any]:
+        """Yield new segments as they are sealed until ``stop`` is set.
+
+        Args:
+            interval (float): Seconds between directory scans when idle.
+            stop (Optional[threading.Event]): Ends the iteration when set.
+
+        Yields:
+            pyarrow.Table: Zero-copy table of one segment.
+
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            found = False
+            for table in self.read_new():
+                found = True
+                yield table
+            if not found:
+                stop.wait(interval)
+
+
+__all__ = ["ArrowIpcReader", "ArrowIpcWriter", "list_segments", "read_segment"]
@@ -0,0 +1,169 @@
+"""Per-sink circuit breakers driven by error rate and latency.
+
+A breaker tracks the most recent deliveries to one sink. Once enough calls
+have been seen and either the failure rate or the slow-call rate crosses
+its threshold, the breaker opens and deliveries to that sink are
+short-circuited (spooled or dropped by the dispatcher) instead of paying
+timeouts and connection attempts. After CIRCUIT_BREAKER_OPEN_SECONDS the
+breaker goes half-open and lets a single probe through: success closes it,
+failure opens it again.
+"""
+
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+
+from app import config_shared
+from app.utils.metrics import record_circuit_rejected, record_circuit_state
+from app.utils.setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Error-rate and latency based circuit breaker for one sink."""
+
+    def __init__(
+        self,
+        name: str,
+        error_rate: float = 0.5,
+        slow_seconds: float = 5.0,
+        slow_rate: float = 0.8,
+        window: int = 20,
+        min_calls: int = 10,
+        open_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize a closed breaker.
+
+        Args:
+            name (str): Sink name, used for logs and metrics.
+            error_rate (float): Failure ratio over the window that opens the breaker.
+            slow_seconds (float): Calls at least this slow count as slow.
+            slow_rate (float): Slow-call ratio over the window that opens the breaker.
+            window (int): Number of recent calls considered.
+            min_calls (int): Calls required in the window before the breaker can open.
+            open_seconds (float): Time spent open before a half-open probe.
+            clock (Callable[[], float]): Monotonic time source.
+
+        """
+        self.name = name
+        self.error_rate = error_rate
+        self.slow_seconds = slow_seconds
+        self.slow_rate = slow_rate
+        self.min_calls = max(1, min_calls)
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._calls: deque[tuple[bool, bool]] = deque(maxlen=max(1, window))
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        record_circuit_state(name, CLOSED, transition=False)
+
+    @classmethod
+    def from_config(cls, sink: str) -> "CircuitBreaker":
+        """Build a breaker for a sink from shared configuration.
+
+        Args:
+            sink (str): Output mode name.
+
+        Returns:
+            CircuitBreaker: Configured breaker.
+
+        """
+        return cls(
+            name=sink,
+            error_rate=config_shared.get_circuit_breaker_error_rate(sink),
+            slow_seconds=config_shared.get_circuit_breaker_slow_seconds(sink),
+            slow_rate=config_shared.get_circuit_breaker_slow_rate(sink),
+            window=config_shared.get_circuit_breaker_window(sink),
+            min_calls=config_shared.get_circuit_breaker_min_calls(sink),
+            open_seconds=config_shared.get_circuit_breaker_open_seconds(sink),
+        )
+
+    @property
+    def state(self) -> str:
+        """Return the current state: 'closed', 'open' or 'half_open'."""
+        return self._state
+
+    def allow(self) -> bool:
+        """Check whether a delivery may be attempted.
+
+        An open breaker becomes half-open once its open period has elapsed and
+        admits one probe at a time.
+
+        Returns:
+            bool: True if the call should go through.
+
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+                self._transition(HALF_OPEN)
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+        record_circuit_rejected(self.name)
+        return False
+
+    def record(self, success: bool, duration: float) -> None:
+        """Record the result of a delivery.
+
+        Args:
+            success (bool): True if the sink accepted the batch.
+            duration (float): Call duration in seconds.
+
+        """
+        slow = duration >= self.slow_seconds
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probing = False
+                if success and not slow:
+                    self._calls.clear()
+                    self._transition(CLOSED)
+                else:
+                    self._open()
+                return
+            if self._state == OPEN:
+                return
+
+            self._calls.append((not success, slow))
+            if len(self._calls) < self.min_calls:
+                return
+            failures = sum(1 for failed, _ in self._calls if failed)
+            slow_calls = sum(1 for _, was_slow in self._calls if was_slow)
+            if (
+                failures / len(self._calls) >= self.error_rate
+                or slow_calls / len(self._calls) >= self.slow_rate
+            ):
+                logger.warning(
+                    "🔌 Opening circuit for %s sink: %d failed, %d slow of last %d call(s)",
+                    self.name,
+                    failures,
+                    slow_calls,
+                    len(self._calls),
+                )
+                self._open()
+
+    def _open(self) -> None:
+        """Open the breaker; caller holds ``_lock``."""
+        self._opened_at = self._clock()
+        self._calls.clear()
+        self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        """Move to a new state and export it; caller holds ``_lock``."""
+        if state != self._state:
+            logger.info("🔌 Circuit for %s sink: %s -> %s", self.name, self._state, state)
+        self._state = state
+        record_circuit_state(self.name, state)
+
+
+__all__ = ["CLOSED", "HALF_OPEN", "OPEN", "CircuitBreaker"]
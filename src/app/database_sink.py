@@ -0,0 +1,582 @@
+"""Database sink helpers for bulk-writing analysis results.
+
+Keeps one pooled SQLAlchemy engine per database URL for the life of the
+process and compiles the configured insert statement once. Rows are written
+with a single executemany per chunk inside one transaction per batch.
+
+When no custom DATABASE_INSERT_SQL is configured, results are mapped onto
+a fixed set of columns and loaded into DATABASE_OUTPUT_TABLE using the
+fastest mechanism for the database dialect:
+
+- PostgreSQL: ``COPY ... FROM STDIN`` fed from an in-memory CSV buffer.
+- SQLite and Oracle: executemany of a single-row INSERT.
+- Others: multi-row ``INSERT ... VALUES`` statements, with rows per
+  statement capped by the dialect's bind parameter limit.
+
+With DATABASE_UPSERT_ENABLED, rows are instead upserted on
+(symbol, timestamp, model_version) so redelivered candles update the
+existing row rather than duplicating it (see ``upsert_rows``).
+"""
+
+import io
+import json
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import Any
+
+import sqlalchemy
+from sqlalchemy.engine import Engine, make_url
+
+from app import config_shared
+from app.utils.setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+@lru_cache
+def get_engine(url: str) -> Engine:
+    """Return the process-wide pooled engine for a database URL.
+
+    Pool sizing comes from DATABASE_POOL_SIZE, DATABASE_MAX_OVERFLOW and
+    DATABASE_POOL_RECYCLE. SQLite uses SQLAlchemy's default pool for its
+    driver, since it does not support overflow settings.
+
+    Args:
+        url (str): SQLAlchemy database URL.
+
+    Returns:
+        Engine: Shared engine instance.
+
+    """
+    options: dict[str, Any] = {"pool_pre_ping": True}
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update(
+            pool_size=config_shared.get_database_pool_size(),
+            max_overflow=config_shared.get_database_max_overflow(),
+            pool_recycle=config_shared.get_database_pool_recycle(),
+        )
+    logger.info("🗄️ Creating pooled database engine (%s)", make_url(url).get_backend_name())
+    return sqlalchemy.create_engine(url, **options)
+
+
+@lru_cache
+def get_statement(sql: str) -> sqlalchemy.TextClause:
+    """Return a compiled, cached text statement for the given SQL.
+
+    Args:
+        sql (str): SQL with named bind parameters (e.g. ':symbol').
+
+    Returns:
+        TextClause: Reusable statement object.
+
+    """
+    return sqlalchemy.text(sql)
+
+
+def chunked(rows: list[dict[str, Any]], size: int) -> list[list[dict[str, Any]]]:
+    """Split rows into chunks of at most ``size`` rows.
+
+    Args:
+        rows (list[dict[str, Any]]): Rows to split.
+        size (int): Maximum rows per chunk.
+
+    Returns:
+        list[list[dict[str, Any]]]: Row chunks in order.
+
+    """
+    size = max(1, size)
+    return [rows[i : i + size] for i in range(0, len(rows), size)]
+
+
+def insert_rows(
+    rows: list[dict[str, Any]],
+    url: str | None = None,
+    sql: str | None = None,
+    chunk_size: int | None = None,
+) -> int:
+    """Insert rows in one transaction using an executemany per chunk.
+
+    Args:
+        rows (list[dict[str, Any]]): Bind parameter dictionaries, one per row.
+        url (Optional[str]): Database URL; defaults to DATABASE_OUTPUT_URL.
+        sql (Optional[str]): Insert statement; defaults to DATABASE_INSERT_SQL.
+        chunk_size (Optional[int]): Rows per executemany; defaults to
+            DATABASE_INSERT_CHUNK_SIZE.
+
+    Returns:
+        int: Number of rows written.
+
+    """
+    if not rows:
+        return 0
+    engine = get_engine(url or config_shared.get_database_output_url())
+    statement = get_statement(sql or config_shared.get_database_insert_sql())
+    size = chunk_size or config_shared.get_database_insert_chunk_size()
+
+    with engine.begin() as conn:
+        for chunk in chunked(rows, size):
+            conn.execute(statement, chunk)
+    return len(rows)
+
+
+# Columns produced by ``result_to_row`` and loaded by ``bulk_load``.
+RESULT_COLUMNS: tuple[str, ...] = (
+    "symbol",
+    "timestamp",
+    "pattern",
+    "model",
+    "model_version",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "raw_data",
+)
+
+BULK_METHODS = ("auto", "copy", "values", "executemany")
+
+# Maximum bind parameters in one statement; multi-row VALUES chunks stay below it.
+MAX_BIND_PARAMETERS: dict[str, int] = {
+    "mssql": 2100,
+    "mysql": 65535,
+    "mariadb": 65535,
+    "postgresql": 65535,
+    "sqlite": 999,
+}
+DEFAULT_MAX_BIND_PARAMETERS = 2100
+
+# Natural key of a stored result; requires a unique index on these columns.
+RESULT_KEY: tuple[str, ...] = ("symbol", "timestamp", "model_version")
+
+
+def _to_float(value: Any) -> float | None:
+    """Convert a price/volume value to float, or None if missing or invalid."""
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def result_to_row(result: dict[str, Any]) -> dict[str, Any]:
+    """Map an analysis result onto the database column layout.
+
+    OHLC values are taken from ``raw_data['data']`` and the original message
+    is stored as a compact JSON string.
+
+    Args:
+        result (dict[str, Any]): Analysis result as produced by ``analyze``.
+
+    Returns:
+        dict[str, Any]: Row keyed by ``RESULT_COLUMNS``.
+
+    """
+    raw = result.get("raw_data")
+    ohlc = raw.get("data") if isinstance(raw, dict) else None
+    ohlc = ohlc if isinstance(ohlc, dict) else {}
+    return {
+        "symbol": result.get("symbol"),
+        "timestamp": result.get("timestamp"),
+        "pattern": result.get("pattern"),
+        "model": result.get("model"),
+        "model_version": result.get("model_version"),
+        "open": _to_float(ohlc.get("open")),
+        "high": _to_float(ohlc.get("high")),
+        "low": _to_float(ohlc.get("low")),
+        "close": _to_float(ohlc.get("close")),
+        "volume": _to_float(ohlc.get("volume")),
+        "raw_data": (
+            json.dumps(raw, ensure_ascii=False, separators=(",", ":"), default=str)
+            if raw is not None
+            else None
+        ),
+    }
+
+
+@lru_cache
+def result_table(name: str) -> sqlalchemy.TableClause:
+    """Return a lightweight table construct for the result columns.
+
+    Args:
+        name (str): Table name, optionally schema-qualified ('schema.table').
+
+    Returns:
+        TableClause: Table with ``RESULT_COLUMNS``.
+
+    """
+    schema, _, table_name = name.rpartition(".")
+    return sqlalchemy.table(
+        table_name,
+        *[sqlalchemy.column(c) for c in RESULT_COLUMNS],
+        schema=schema or None,
+    )
+
+
+def resolve_bulk_method(dialect: str, configured: str = "auto") -> str:
+    """Pick the bulk load mechanism for a dialect.
+
+    Args:
+        dialect (str): SQLAlchemy dialect name (e.g. 'postgresql', 'sqlite').
+        configured (str): DATABASE_BULK_METHOD value; 'auto' selects by dialect.
+
+    Returns:
+        str: One of 'copy', 'values', or 'executemany'.
+
+    """
+    if configured in BULK_METHODS and configured != "auto":
+        if configured == "copy" and dialect != "postgresql":
+            logger.warning("⚠️ COPY is only supported on PostgreSQL; using multi-row VALUES")
+            return "values"
+        return configured
+    if dialect == "postgresql":
+        return "copy"
+    if dialect in ("sqlite", "oracle"):
+        return "executemany"
+    return "values"
+
+
+def values_chunk_size(dialect: str, columns: int, requested: int) -> int:
+    """Cap the rows per multi-row VALUES statement by the dialect's parameter limit.
+
+    Args:
+        dialect (str): SQLAlchemy dialect name.
+        columns (int): Bound columns per row.
+        requested (int): Configured rows per statement.
+
+    Returns:
+        int: Rows per statement that keep the bind parameters under the limit.
+
+    """
+    limit = MAX_BIND_PARAMETERS.get(dialect, DEFAULT_MAX_BIND_PARAMETERS)
+    return max(1, min(requested, (limit - 1) // max(1, columns)))
+
+
+def _csv_field(value: Any) -> str:
+    """Encode a value as a PostgreSQL CSV field.
+
+    None becomes an unquoted empty field (NULL); every other non-numeric
+    value is quoted so that empty strings stay distinct from NULL.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return repr(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_rows(
+    cursor: Any, table: str, rows: list[dict[str, Any]], columns: tuple[str, ...] = RESULT_COLUMNS
+) -> int:
+    """Load rows through PostgreSQL ``COPY FROM STDIN`` using a DBAPI cursor.
+
+    Rows are written to an in-memory CSV buffer. Supports psycopg 3
+    (``cursor.copy``) and psycopg2 (``cursor.copy_expert``) cursors. Table
+    and column names are quoted by the PostgreSQL identifier preparer.
+
+    Args:
+        cursor (Any): DBAPI cursor of a PostgreSQL driver connection.
+        table (str): Target table name, optionally schema-qualified ('schema.table').
+        rows (list[dict[str, Any]]): Rows keyed by ``columns``.
+        columns (tuple[str, ...]): Column order for the COPY.
+
+    Returns:
+        int: Number of rows copied.
+
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join(_csv_field(row.get(c)) for c in columns))
+        buffer.write("\n")
+    from sqlalchemy.dialects import postgresql
+
+    preparer = postgresql.dialect().identifier_preparer
+    quoted = ", ".join(preparer.quote(c) for c in columns)
+    sql = (
+        f"COPY {preparer.format_table(result_table(table))} ({quoted}) FROM STDIN WITH (FORMAT csv)"
+    )
+
+    if hasattr(cursor, "copy"):
+        with cursor.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+    else:
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+    return len(rows)
+
+
+def bulk_load(
+    rows: list[dict[str, Any]],
+    url: str | None = None,
+    table: str | None = None,
+    method: str | None = None,
+    chunk_size: int | None = None,
+) -> int:
+    """Load mapped result rows using the fastest mechanism for the dialect.
+
+    Args:
+        rows (list[dict[str, Any]]): Rows produced by ``result_to_row``.
+        url (Optional[str]): Database URL; defaults to DATABASE_OUTPUT_URL.
+        table (Optional[str]): Target table; defaults to DATABASE_OUTPUT_TABLE.
+        method (Optional[str]): Bulk method; defaults to DATABASE_BULK_METHOD.
+        chunk_size (Optional[int]): Rows per statement; defaults to
+            DATABASE_INSERT_CHUNK_SIZE.
+
+    Returns:
+        int: Number of rows written.
+
+    """
+    if not rows:
+        return 0
+    engine = get_engine(url or config_shared.get_database_output_url())
+    table_name = table or config_shared.get_database_output_table()
+    resolved = resolve_bulk_method(
+        engine.dialect.name, method or config_shared.get_database_bulk_method()
+    )
+    size = chunk_size or config_shared.get_database_insert_chunk_size()
+    target = result_table(table_name)
+
+    with engine.begin() as conn:
+        if resolved == "copy":
+            cursor = conn.connection.cursor()
+            try:
+                for chunk in chunked(rows, size):
+                    copy_rows(cursor, table_name, chunk)
+            finally:
+                cursor.close()
+        elif resolved == "values":
+            size = values_chunk_size(engine.dialect.name, len(RESULT_COLUMNS), size)
+            for chunk in chunked(rows, size):
+                conn.execute(sqlalchemy.insert(target).values(chunk))
+        else:
+            for chunk in chunked(rows, size):
+                conn.execute(sqlalchemy.insert(target), chunk)
+
+    logger.debug("🗄️ Bulk loaded %d row(s) into %s via %s", len(rows), table_name, resolved)
+    return len(rows)
+
+
+def dedupe_rows(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Keep the last row per ``RESULT_KEY`` and sort rows by key.
+
+    A missing model version is stored as an empty string, because unique
+    indexes treat NULLs as distinct and would let duplicates through.
+    Sorting makes concurrent writers lock rows in the same order, which
+    avoids deadlocks between overlapping batches.
+
+    Args:
+        rows (list[dict[str, Any]]): Rows produced by ``result_to_row``.
+
+    Returns:
+        list[dict[str, Any]]: Unique rows in key order.
+
+    """
+    unique: dict[tuple[str, ...], dict[str, Any]] = {}
+    for row in rows:
+        if row.get("model_version") is None:
+            row = {**row, "model_version": ""}
+        unique[tuple(str(row.get(c)) for c in RESULT_KEY)] = row
+    return [unique[key] for key in sorted(unique)]
+
+
+def merge_sql(table: str, dialect: str) -> str:
+    """Build a single-row ``MERGE`` statement for SQL Server or Oracle.
+
+    SQL Server gets ``WITH (HOLDLOCK)`` so that concurrent merges of the
+    same key serialize instead of racing to insert.
+
+    Args:
+        table (str): Target table name.
+        dialect (str): 'mssql' or 'oracle'.
+
+    Returns:
+        str: MERGE statement with named bind parameters.
+
+    """
+    source = ", ".join(f":{c} AS {c}" for c in RESULT_COLUMNS)
+    source = f"(SELECT {source} FROM dual)" if dialect == "oracle" else f"(SELECT {source})"
+    target = f"{table} WITH (HOLDLOCK)" if dialect == "mssql" else table
+    on = " AND ".join(f"t.{c} = s.{c}" for c in RESULT_KEY)
+    updates = ", ".join(f"t.{c} = s.{c}" for c in RESULT_COLUMNS if c not in RESULT_KEY)
+    columns = ", ".join(RESULT_COLUMNS)
+    values = ", ".join(f"s.{c}" for c in RESULT_COLUMNS)
+    sql = (
+        f"MERGE INTO {target} t USING {source} s ON ({on}) "
+        f"WHEN MATCHED THEN UPDATE SET {updates} "
+        f"WHEN NOT MATCHED THEN INSERT ({columns}) VALUES ({values})"
+    )
+    return f"{sql};" if dialect == "mssql" else sql
+
+
+def insert_or_update(
+    table: sqlalchemy.TableClause,
+    key: Sequence[str],
+    update_columns: Sequence[str],
+    dialect: str,
+) -> Any:
+    """Build an INSERT that updates ``update_columns`` when a row with ``key`` exists.
+
+    Uses ``ON CONFLICT (...) DO UPDATE`` on PostgreSQL and SQLite and
+    ``ON DUPLICATE KEY UPDATE`` on MySQL/MariaDB.
+
+    Args:
+        table (TableClause): Target table.
+        key (Sequence[str]): Columns of the table's unique key.
+        update_columns (Sequence[str]): Columns overwritten on a key conflict.
+        dialect (str): SQLAlchemy dialect name.
+
+    Returns:
+        Any: Insert statement with conflict handling, or None if the dialect
+        has no native insert-or-update syntax.
+
+    """
+    if dialect == "postgresql":
+        from sqlalchemy.dialects import postgresql
+
+        pg_insert = postgresql.insert(table)
+        return pg_insert.on_conflict_do_update(
+            index_elements=list(key), set_={c: pg_insert.excluded[c] for c in update_columns}
+        )
+    if dialect == "sqlite":
+        from sqlalchemy.dialects import sqlite
+
+        sqlite_insert = sqlite.insert(table)
+        return sqlite_insert.on_conflict_do_update(
+            index_elements=list(key), set_={c: sqlite_insert.excluded[c] for c in update_columns}
+        )
+    if dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects import mysql
+
+        mysql_insert = mysql.insert(table)
+        return mysql_insert.on_duplicate_key_update(
+            {c: mysql_insert.inserted[c] for c in update_columns}
+        )
+    return None
+
+
+def upsert_statement(table: str, dialect: str) -> Any:
+    """Build the bulk upsert statement for a dialect.
+
+    Args:
+        table (str): Target table name.
+        dialect (str): SQLAlchemy dialect name.
+
+    Returns:
+        Any: Insert statement with conflict handling, or a MERGE text clause.
+
+    Raises:
+        ValueError: If the dialect has no supported upsert syntax.
+
+    """
+    updated = [c for c in RESULT_COLUMNS if c not in RESULT_KEY]
+    statement = insert_or_update(result_table(table), RESULT_KEY, updated, dialect)
+    if statement is not None:
+        return statement
+    if dialect in ("mssql", "oracle"):
+        return get_statement(merge_sql(table, dialect))
+    raise ValueError(f"Upsert is not supported for the {dialect} dialect")
+
+
+def upsert_rows(
+    rows: list[dict[str, Any]],
+    url: str | None = None,
+    table: str | None = None,
+    chunk_size: int | None = None,
+) -> int:
+    """Upsert mapped result rows on ``RESULT_KEY`` in one transaction.
+
+    Uses ``INSERT ... ON CONFLICT DO UPDATE`` on PostgreSQL and SQLite,
+    ``INSERT ... ON DUPLICATE KEY UPDATE`` on MySQL/MariaDB and ``MERGE`` on
+    SQL Server and Oracle, executed with executemany per chunk. The target
+    table needs a unique index on (symbol, timestamp, model_version); the
+    database then resolves races between concurrent writers atomically.
+
+    Args:
+        rows (list[dict[str, Any]]): Rows produced by ``result_to_row``.
+        url (Optional[str]): Database URL; defaults to DATABASE_OUTPUT_URL.
+        table (Optional[str]): Target table; defaults to DATABASE_OUTPUT_TABLE.
+        chunk_size (Optional[int]): Rows per executemany; defaults to
+            DATABASE_INSERT_CHUNK_SIZE.
+
+    Returns:
+        int: Number of unique rows written.
+
+    """
+    rows = dedupe_rows(rows)
+    if not rows:
+        return 0
+    engine = get_engine(url or config_shared.get_database_output_url())
+    table_name = table or config_shared.get_database_output_table()
+    statement = upsert_statement(table_name, engine.dialect.name)
+    size = chunk_size or config_shared.get_database_insert_chunk_size()
+
+    with engine.begin() as conn:
+        for chunk in chunked(rows, size):
+            conn.execute(statement, chunk)
+
+    logger.debug("🗄️ Upserted %d row(s) into %s", len(rows), table_name)
+    return len(rows)
+
+
+def write_results(results: list[dict[str, Any]]) -> int:
+    """Write analysis results to the output database.
+
+    Uses DATABASE_INSERT_SQL with executemany when configured; otherwise maps
+    results onto ``RESULT_COLUMNS`` and bulk loads them, or upserts them when
+    DATABASE_UPSERT_ENABLED is set.
+
+    Args:
+        results (list[dict[str, Any]]): Analysis results.
+
+    Returns:
+        int: Number of rows written.
+
+    Raises:
+        ValueError: If both DATABASE_INSERT_SQL and DATABASE_UPSERT_ENABLED are set.
+
+    """
+    validate_write_config()
+    rows = [result_to_row(result) for result in results]
+    if config_shared.get_database_insert_sql():
+        return insert_rows(rows)
+    if config_shared.get_database_upsert_enabled():
+        return upsert_rows(rows)
+    return bulk_load(rows)
+
+
+def validate_write_config() -> None:
+    """Reject database output settings that contradict each other.
+
+    A custom DATABASE_INSERT_SQL is executed as-is, so it cannot honour
+    DATABASE_UPSERT_ENABLED; write the conflict handling into the SQL instead.
+
+    Raises:
+        ValueError: If both DATABASE_INSERT_SQL and DATABASE_UPSERT_ENABLED are set.
+
+    """
+    if config_shared.get_database_insert_sql() and config_shared.get_database_upsert_enabled():
+        raise ValueError(
+            "DATABASE_INSERT_SQL and DATABASE_UPSERT_ENABLED cannot be combined; "
+            "put the conflict handling in DATABASE_INSERT_SQL or unset it to use the upsert"
+        )
+
+
+__all__ = [
+    "RESULT_COLUMNS",
+    "RESULT_KEY",
+    "bulk_load",
+    "chunked",
+    "copy_rows",
+    "dedupe_rows",
+    "get_engine",
+    "get_statement",
+    "insert_or_update",
+    "insert_rows",
+    "merge_sql",
+    "resolve_bulk_method",
+    "result_to_row",
+    "upsert_rows",
+    "upsert_statement",
+    "validate_write_config",
+    "values_chunk_size",
+    "write_results",
+]
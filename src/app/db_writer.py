@@ -0,0 +1,208 @@
+"""Asynchronous write-behind writer for the database sink.
+
+Instead of one transaction per consumed message, the database sink hands
+rows to a bounded queue and gets a ``Future`` back. Writer threads pull
+from the queue and coalesce submissions into one transaction until
+DB_WRITE_BEHIND_MAX_ROWS rows are gathered or DB_WRITE_BEHIND_MAX_SECONDS
+have passed, then resolve every included future once the transaction has
+committed (or fail them all if it rolled back).
+
+The consumer uses those futures to acknowledge queue messages only after
+their rows are committed (see ``app.queue_handler``). A full queue blocks
+the submitter, which applies backpressure to the consumer.
+"""
+
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+from app import config_shared
+from app.utils.metrics import record_sink_metrics
+from app.utils.setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_STOP = object()
+
+
+class WriteBehindWriter:
+    """Coalesces database writes from many batches into large transactions."""
+
+    def __init__(
+        self,
+        write: Callable[[list[dict[str, Any]]], int],
+        max_rows: int = 5000,
+        max_seconds: float = 0.5,
+        queue_size: int = 100,
+        threads: int = 1,
+        sink: str = "db",
+    ) -> None:
+        """Start the writer threads.
+
+        Args:
+            write (Callable[[list[dict[str, Any]]], int]): Writes rows in one
+                transaction and returns the number written.
+            max_rows (int): Rows that trigger a commit.
+            max_seconds (float): Maximum time a submission waits for a commit.
+            queue_size (int): Maximum pending submissions before ``submit`` blocks.
+            threads (int): Number of writer threads (each with its own transaction).
+            sink (str): Sink name for thread names and sink metrics.
+
+        """
+        self._write = write
+        self.sink = sink
+        self.max_rows = max(1, max_rows)
+        self.max_seconds = max_seconds
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max(1, queue_size))
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f"{sink}-writer-{i}", daemon=True)
+            for i in range(max(1, threads))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @classmethod
+    def from_config(cls, write: Callable[[list[dict[str, Any]]], int]) -> "WriteBehindWriter":
+        """Build a writer from shared configuration.
+
+        Args:
+            write (Callable[[list[dict[str, Any]]], int]): Transactional row writer.
+
+        Returns:
+            WriteBehindWriter: Running writer.
+
+        """
+        return cls(
+            write,
+            max_rows=config_shared.get_db_write_behind_max_rows(),
+            max_seconds=config_shared.get_db_write_behind_max_seconds(),
+            queue_size=config_shared.get_db_write_behind_queue_size(),
+            threads=config_shared.get_db_write_behind_threads(),
+        )
+
+    def submit(self, rows: list[dict[str, Any]]) -> Future[int]:
+        """Queue rows for the next transaction.
+
+        Blocks while the queue is full.
+
+        Args:
+            rows (list[dict[str, Any]]): Results to write.
+
+        Returns:
+            Future[int]: Resolves to the number of rows written once committed.
+
+        Raises:
+            RuntimeError: If the writer has been closed.
+
+        """
+        if self._closed:
+            raise RuntimeError("Write-behind database writer is closed")
+        future: Future[int] = Future()
+        if not rows:
+            future.set_result(0)
+            return future
+        self._queue.put((rows, future))
+        return future
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Commit everything still queued and stop the writer threads.
+
+        Args:
+            timeout (float): Seconds to wait for each writer thread.
+
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        """Collect submissions into transactions until stopped."""
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            pending = [first]
+            nrows = len(first[0])
+            deadline = time.monotonic() + self.max_seconds
+            stop = False
+            while nrows < self.max_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                pending.append(item)
+                nrows += len(item[0])
+            self._commit(pending)
+            if stop:
+                return
+
+    def _commit(self, pending: list[tuple[list[dict[str, Any]], Future[int]]]) -> None:
+        """Write a group of submissions in one transaction and resolve their futures."""
+        rows = [row for submitted, _ in pending for row in submitted]
+        start = time.perf_counter()
+        try:
+            self._write(rows)
+        except Exception as e:
+            logger.exception("❌ Write-behind transaction of %d row(s) failed", len(rows))
+            record_sink_metrics(self.sink, "exception", time.perf_counter() - start, failed=True)
+            for _, future in pending:
+                future.set_exception(e)
+            return
+        duration = time.perf_counter() - start
+        record_sink_metrics(self.sink, "success", duration, failed=False)
+        logger.debug(
+            "📊 Committed %d row(s) from %d batch(es) in %.3fs", len(rows), len(pending), duration
+        )
+        for submitted, future in pending:
+            future.set_result(len(submitted))
+
+
+def combine_futures(futures: list[Future[Any]]) -> Future[None]:
+    """Return a future that completes when all ``futures`` complete.
+
+    The combined future fails with the first exception raised by any of them.
+
+    Args:
+        futures (list[Future[Any]]): Futures to wait for.
+
+    Returns:
+        Future[None]: Resolves to None once every future has succeeded.
+
+    """
+    combined: Future[None] = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def on_done(future: Future[Any]) -> None:
+        with lock:
+            remaining[0] -= 1
+            if combined.done():
+                return
+            error = future.exception()
+            if error is not None:
+                combined.set_exception(error)
+            elif remaining[0] == 0:
+                combined.set_result(None)
+
+    if not futures:
+        combined.set_result(None)
+    for future in futures:
+        future.add_done_callback(on_done)
+    return combined
+
+
+__all__ = ["WriteBehindWriter", "combine_futures"]
@@ -0,0 +1,327 @@
+"""Embedded SQLite store of recent detections for local queries.
+
+With the ``store`` output mode enabled, every batch is also written to a
+local SQLite database (one transaction per batch) so questions such as
+"which symbols printed a Hammer in the last hour" can be answered without
+a round trip to the remote database. Detections are indexed by
+(symbol, time) and (pattern, time), and rows older than
+DETECTION_STORE_RETENTION_SECONDS are pruned periodically.
+
+The query API (``query``, ``pattern_counts``) is used by local tooling and
+by the health server's ``/detections`` endpoint.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from functools import lru_cache
+from typing import Any
+from urllib.parse import parse_qs
+
+from app import config_shared
+from app.encoded_batch import EncodedBatch
+from app.s3_writer import parse_timestamp
+from app.utils.metrics import record_output_metrics
+from app.utils.setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS detections (
+        symbol TEXT NOT NULL,
+        ts INTEGER NOT NULL,
+        pattern TEXT,
+        model TEXT,
+        model_version TEXT,
+        payload TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_detections_symbol_ts ON detections (symbol, ts)",
+    "CREATE INDEX IF NOT EXISTS idx_detections_pattern_ts ON detections (pattern, ts)",
+    "CREATE INDEX IF NOT EXISTS idx_detections_ts ON detections (ts)",
+)
+
+_INSERT = (
+    "INSERT INTO detections (symbol, ts, pattern, model, model_version, payload) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+
+def _to_millis(value: Any) -> int | None:
+    """Convert a timestamp (ISO string, epoch or datetime) to epoch milliseconds."""
+    parsed: datetime | None
+    if isinstance(value, datetime):
+        parsed = value if value.tzinfo else value.replace(tzinfo=UTC)
+    else:
+        parsed = parse_timestamp(value)
+    return int(parsed.timestamp() * 1000) if parsed is not None else None
+
+
+class DetectionStore:
+    """Batched writer and query API over a local SQLite detection database."""
+
+    def __init__(
+        self,
+        path: str,
+        retention_seconds: float = 86400.0,
+        prune_interval: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Open (or create) the store.
+
+        Args:
+            path (str): SQLite database file (':memory:' for tests).
+            retention_seconds (float): Age after which detections are pruned.
+            prune_interval (float): Minimum seconds between automatic prunes.
+            clock (Callable[[], float]): Wall-clock time source in epoch seconds.
+
+        """
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self.prune_interval = prune_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+
+    @classmethod
+    def from_config(cls) -> "DetectionStore":
+        """Build a store from shared configuration.
+
+        Returns:
+            DetectionStore: Configured store.
+
+        """
+        return cls(
+            path=config_shared.get_detection_store_path(),
+            retention_seconds=config_shared.get_detection_store_retention_seconds(),
+            prune_interval=config_shared.get_detection_store_prune_interval_seconds(),
+        )
+
+    def write(self, batch: EncodedBatch) -> int:
+        """Insert a batch of detections in one transaction.
+
+        Results without a parseable timestamp are stored at the current time.
+
+        Args:
+            batch (EncodedBatch): Results and their encoded bytes.
+
+        Returns:
+            int: Number of rows written.
+
+        """
+        if not len(batch):
+            return 0
+        now_ms = int(self._clock() * 1000)
+        rows = [
+            (
+                str(item.get("symbol") or "unknown"),
+                _to_millis(item.get("timestamp")) or now_ms,
+                item.get("pattern"),
+                item.get("model"),
+                item.get("model_version"),
+                line.decode("utf-8"),
+            )
+            for item, line in zip(batch.items, batch.item_bytes)
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(_INSERT, rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if self._clock() - self._last_prune >= self.prune_interval:
+            self.prune()
+        return len(rows)
+
+    def prune(self) -> int:
+        """Delete detections older than the retention period.
+
+        Returns:
+            int: Number of rows deleted.
+
+        """
+        now = self._clock()
+        cutoff = int((now - self.retention_seconds) * 1000)
+        with self._lock:
+            self._last_prune = now
+            deleted = self._conn.execute("DELETE FROM detections WHERE ts < ?", (cutoff,)).rowcount
+        if deleted:
+            logger.info("🧹 Pruned %d detections older than %ss", deleted, self.retention_seconds)
+        return deleted
+
+    def query(
+        self,
+        symbol: str | None = None,
+        pattern: str | None = None,
+        since: Any = None,
+        until: Any = None,
+        limit: int = 100,
+    ) -> list[dict[str, Any]]:
+        """Return stored detections, newest first.
+
+        Args:
+            symbol (Optional[str]): Only this symbol.
+            pattern (Optional[str]): Only this pattern.
+            since (Any): Earliest candle time (ISO string, epoch or datetime), inclusive.
+            until (Any): Latest candle time, exclusive.
+            limit (int): Maximum rows returned.
+
+        Returns:
+            list[dict[str, Any]]: Stored results as originally dispatched.
+
+        """
+        where, params = self._filters(symbol, pattern, since, until)
+        sql = f"SELECT payload FROM detections{where} ORDER BY ts DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, max(0, limit))).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def pattern_counts(
+        self, since: Any = None, until: Any = None, symbol: str | None = None
+    ) -> dict[str, dict[str, int]]:
+        """Count detections per pattern and symbol.
+
+        Args:
+            since (Any): Earliest candle time, inclusive.
+            until (Any): Latest candle time, exclusive.
+            symbol (Optional[str]): Only this symbol.
+
+        Returns:
+            dict[str, dict[str, int]]: ``{pattern: {symbol: count}}``.
+
+        """
+        where, params = self._filters(symbol, None, since, until)
+        sql = (
+            f"SELECT pattern, symbol, COUNT(*) FROM detections{where} "
+            "GROUP BY pattern, symbol ORDER BY pattern, symbol"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        counts: dict[str, dict[str, int]] = {}
+        for pattern, sym, count in rows:
+            counts.setdefault(pattern or "none", {})[sym] = count
+        return counts
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _filters(
+        symbol: str | None, pattern: str | None, since: Any, until: Any
+    ) -> tuple[str, tuple[Any, ...]]:
+        """Build the WHERE clause shared by the query methods."""
+        clauses: list[str] = []
+        params: list[Any] = []
+        if symbol:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        if pattern:
+            clauses.append("pattern = ?")
+            params.append(pattern)
+        for op, value in ((">=", since), ("<", until)):
+            if value is None:
+                continue
+            millis = _to_millis(value)
+            if millis is None:
+                raise ValueError(f"Invalid time bound: {value!r}")
+            clauses.append(f"ts {op} ?")
+            params.append(millis)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), tuple(params)
+
+
+@lru_cache
+def get_store() -> DetectionStore:
+    """Return the process-wide detection store.
+
+    Returns:
+        DetectionStore: Shared store opened from configuration.
+
+    """
+    return DetectionStore.from_config()
+
+
+def write_batch(batch: EncodedBatch) -> bool:
+    """Write a batch to the shared store and record output metrics.
+
+    Args:
+        batch (EncodedBatch): Results to store.
+
+    Returns:
+        bool: True if the batch was stored.
+
+    """
+    start = time.perf_counter()
+    try:
+        written = get_store().write(batch)
+    except Exception:
+        logger.exception("❌ Detection store write failed")
+        record_output_metrics("store", success=False, duration_sec=time.perf_counter() - start)
+        return False
+    record_output_metrics("store", success=True, duration_sec=time.perf_counter() - start)
+    logger.debug("🗃️ Stored %d detection(s) locally", written)
+    return True
+
+
+def handle_query(query_string: str, store: DetectionStore | None = None) -> tuple[int, bytes]:
+    """Answer an HTTP query against the detection store.
+
+    Supported parameters: ``symbol``, ``pattern``, ``since``, ``until``
+    (ISO-8601 or epoch), ``minutes`` (look-back window, instead of
+    ``since``), ``limit`` and ``group=pattern`` for per-pattern counts.
+
+    Args:
+        query_string (str): Raw URL query string.
+        store (Optional[DetectionStore]): Store to query; defaults to the shared store.
+
+    Returns:
+        tuple[int, bytes]: HTTP status and JSON body.
+
+    """
+    params = {k: v[-1] for k, v in parse_qs(query_string).items()}
+    store = store or get_store()
+    try:
+        since: Any = params.get("since")
+        if "minutes" in params:
+            since = store._clock() - float(params["minutes"]) * 60
+        if isinstance(since, str) and since.isdigit():
+            since = int(since)
+        until: Any = params.get("until")
+        if isinstance(until, str) and until.isdigit():
+            until = int(until)
+        if params.get("group") == "pattern":
+            body: Any = store.pattern_counts(since=since, until=until, symbol=params.get("symbol"))
+        else:
+            limit = min(
+                int(params.get("limit", 100)), config_shared.get_detection_store_query_limit()
+            )
+            body = store.query(
+                symbol=params.get("symbol"),
+                pattern=params.get("pattern"),
+                since=since,
+                until=until,
+                limit=limit,
+            )
+    except ValueError as e:
+        return 400, json.dumps({"error": str(e)}).encode("utf-8")
+    return 200, json.dumps(body, separators=(",", ":"), default=str).encode("utf-8")
+
+
+__all__ = ["DetectionStore", "get_store", "handle_query", "write_batch"]
@@ -0,0 +1,130 @@
+"""Dispatch policy for results without a detected candlestick pattern.
+
+The vast majority of candles produce ``"No clear pattern"``. This module
+decides which of those results are forwarded to the output sinks:
+
+- ``pass``: forward everything (default, previous behavior).
+- ``drop``: never forward no-pattern results.
+- ``heartbeat``: forward at most one no-pattern result per symbol per interval.
+- ``sample``: forward a random fraction of no-pattern results.
+
+Results with a detected pattern are always forwarded.
+"""
+
+import random
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from app import config_shared
+from app.processor import NO_PATTERN
+from app.utils.metrics import record_no_pattern_metrics
+from app.utils.setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+POLICIES = ("pass", "drop", "heartbeat", "sample")
+
+
+class NoPatternPolicy:
+    """Filters no-pattern results from a batch according to a configured policy."""
+
+    def __init__(
+        self,
+        policy: str = "pass",
+        heartbeat_seconds: float = 300.0,
+        sample_rate: float = 0.01,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        """Initialize the policy.
+
+        Args:
+            policy (str): One of 'pass', 'drop', 'heartbeat', or 'sample'.
+            heartbeat_seconds (float): Minimum interval between heartbeats per symbol.
+            sample_rate (float): Fraction of no-pattern results forwarded in 'sample' mode.
+            clock (Callable[[], float]): Monotonic time source.
+            rng (Callable[[], float]): Random source returning values in [0, 1).
+
+        """
+        if policy not in POLICIES:
+            logger.warning("⚠️ Unknown NO_PATTERN_POLICY '%s', falling back to 'pass'", policy)
+            policy = "pass"
+        self.policy = policy
+        self.heartbeat_seconds = heartbeat_seconds
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self._clock = clock
+        self._rng = rng
+        self._last_heartbeat: dict[Any, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "NoPatternPolicy":
+        """Build a policy from shared configuration.
+
+        Returns:
+            NoPatternPolicy: Configured policy instance.
+
+        """
+        return cls(
+            policy=config_shared.get_no_pattern_policy(),
+            heartbeat_seconds=config_shared.get_no_pattern_heartbeat_seconds(),
+            sample_rate=config_shared.get_no_pattern_sample_rate(),
+        )
+
+    def filter(self, data: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Return the subset of a batch that should be dispatched.
+
+        Args:
+            data (list[dict[str, Any]]): Batch of analysis results.
+
+        Returns:
+            list[dict[str, Any]]: Results to forward, in their original order.
+
+        """
+        if self.policy == "pass":
+            return data
+
+        kept: list[dict[str, Any]] = []
+        forwarded = suppressed = 0
+        for item in data:
+            if not isinstance(item, dict) or item.get("pattern") != NO_PATTERN:
+                kept.append(item)
+            elif self._should_forward(item):
+                kept.append(item)
+                forwarded += 1
+            else:
+                suppressed += 1
+
+        record_no_pattern_metrics(self.policy, forwarded=forwarded, suppressed=suppressed)
+        if suppressed:
+            logger.debug("🔇 Suppressed %d no-pattern result(s) (%s)", suppressed, self.policy)
+        return kept
+
+    def _should_forward(self, item: dict[str, Any]) -> bool:
+        """Decide whether a single no-pattern result is forwarded.
+
+        Args:
+            item (dict[str, Any]): No-pattern analysis result.
+
+        Returns:
+            bool: True if the result should reach the sinks.
+
+        """
+        if self.policy == "drop":
+            return False
+        if self.policy == "sample":
+            return self._rng() < self.sample_rate
+
+        symbol = item.get("symbol")
+        now = self._clock()
+        with self._lock:
+            last = self._last_heartbeat.get(symbol)
+            if last is not None and now - last < self.heartbeat_seconds:
+                return False
+            self._last_heartbeat[symbol] = now
+            return True
+
+
+__all__ = ["POLICIES", "NoPatternPolicy"]
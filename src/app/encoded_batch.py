@@ -0,0 +1,79 @@
+"""Encode-once container for a batch of analysis results.
+
+Every output sink needs the same results in a serialized form. ``EncodedBatch``
+produces each encoding lazily, at most once per batch, and hands the cached
+bytes to every sink that asks for them.
+"""
+
+import json
+from collections.abc import Iterator
+from functools import cached_property
+from typing import Any
+
+
+def encode_item(item: Any) -> bytes:
+    """Serialize a single result as compact UTF-8 JSON.
+
+    Args:
+        item (Any): JSON-serializable value; unknown types are stringified.
+
+    Returns:
+        bytes: Compact JSON encoding.
+
+    """
+    return json.dumps(item, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class EncodedBatch:
+    """A batch of results with lazily cached JSON encodings.
+
+    Attributes:
+        items (list[dict[str, Any]]): The original result dictionaries.
+
+    """
+
+    def __init__(self, items: list[dict[str, Any]], item_bytes: list[bytes] | None = None) -> None:
+        """Wrap a batch of results.
+
+        Args:
+            items (list[dict[str, Any]]): Results to encode on demand.
+            item_bytes (Optional[list[bytes]]): Already-encoded items aligned with
+                ``items``, reused instead of encoding again.
+
+        """
+        self.items = items
+        if item_bytes is not None:
+            self.__dict__["item_bytes"] = item_bytes
+
+    def __len__(self) -> int:
+        """Return the number of results in the batch."""
+        return len(self.items)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        """Iterate over the original result dictionaries."""
+        return iter(self.items)
+
+    @cached_property
+    def item_bytes(self) -> list[bytes]:
+        """Compact JSON bytes for each result, in batch order."""
+        return [encode_item(item) for item in self.items]
+
+    @cached_property
+    def json_bytes(self) -> bytes:
+        """Compact JSON array of the whole batch, built from ``item_bytes``."""
+        return b"[" + b",".join(self.item_bytes) + b"]"
+
+    @cached_property
+    def ndjson(self) -> bytes:
+        """Newline-delimited JSON of the whole batch, built from ``item_bytes``."""
+        if not self.items:
+            return b""
+        return b"\n".join(self.item_bytes) + b"\n"
+
+    @cached_property
+    def nbytes(self) -> int:
+        """Total encoded size of the batch in bytes (excluding separators)."""
+        return sum(len(b) for b in self.item_bytes)
+
+
+__all__ = ["EncodedBatch", "encode_item"]
@@ -0,0 +1,294 @@
+"""Local NDJSON file sink with rotation, compression and a sidecar index.
+
+Batches are appended as compact NDJSON through a large buffered writer.
+The active file is rotated once it reaches FILE_OUTPUT_MAX_BYTES or
+FILE_OUTPUT_MAX_SECONDS (checked on each write, by a background timer so an
+idle sink still rotates, and on shutdown). Rotated files are gzip-compressed
+in the background and get a sidecar ``.index.json`` describing the symbols
+and candle time range they contain, so replay tools can pick files without
+opening them.
+
+Active files left behind by a crash are finalized when the next sink starts,
+so FILE_OUTPUT_DIR must not be shared by sinks running at the same time.
+"""
+
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+from typing import IO, Any
+
+from app import config_shared
+from app.encoded_batch import EncodedBatch
+from app.s3_writer import parse_timestamp
+from app.utils.metrics import record_output_metrics
+from app.utils.setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class _FileIndex:
+    """Symbol and candle time ranges for the records in one output file."""
+
+    def __init__(self, opened: datetime) -> None:
+        self.opened = opened
+        self.records = 0
+        self.symbols: dict[str, dict[str, Any]] = {}
+
+    def add(self, item: dict[str, Any]) -> None:
+        """Account for one written record."""
+        self.records += 1
+        symbol = str(item.get("symbol") or "unknown")
+        ts = parse_timestamp(item.get("timestamp"))
+        entry = self.symbols.get(symbol)
+        if entry is None:
+            entry = self.symbols[symbol] = {"count": 0, "first": None, "last": None}
+        entry["count"] += 1
+        if ts is not None:
+            if entry["first"] is None or ts < entry["first"]:
+                entry["first"] = ts
+            if entry["last"] is None or ts > entry["last"]:
+                entry["last"] = ts
+
+    def to_dict(self, file_name: str, nbytes: int) -> dict[str, Any]:
+        """Return the JSON-serializable sidecar document."""
+        firsts = [e["first"] for e in self.symbols.values() if e["first"] is not None]
+        lasts = [e["last"] for e in self.symbols.values() if e["last"] is not None]
+        return {
+            "file": file_name,
+            "records": self.records,
+            "bytes": nbytes,
+            "opened": self.opened.isoformat(),
+            "closed": datetime.now(UTC).isoformat(),
+            "first": min(firsts).isoformat() if firsts else None,
+            "last": max(lasts).isoformat() if lasts else None,
+            "symbols": {
+                symbol: {
+                    "count": e["count"],
+                    "first": e["first"].isoformat() if e["first"] else None,
+                    "last": e["last"].isoformat() if e["last"] else None,
+                }
+                for symbol, e in sorted(self.symbols.items())
+            },
+        }
+
+
+class RotatingFileSink:
+    """Appends batches to rotating NDJSON files in a local directory."""
+
+    def __init__(
+        self,
+        directory: str,
+        prefix: str = "candlestick",
+        max_bytes: int = 64 * 1024 * 1024,
+        max_age_seconds: float = 3600.0,
+        buffer_bytes: int = 1024 * 1024,
+        compress: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+        start_flusher: bool = True,
+    ) -> None:
+        """Initialize the sink.
+
+        Args:
+            directory (str): Output directory (created if missing).
+            prefix (str): File name prefix.
+            max_bytes (int): Size at which the active file is rotated.
+            max_age_seconds (float): Age at which the active file is rotated.
+            buffer_bytes (int): Write buffer size of the active file.
+            compress (bool): Gzip files on rotation.
+            clock (Callable[[], float]): Monotonic time source.
+            start_flusher (bool): Start the background age-based rotation timer.
+
+        """
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.buffer_bytes = buffer_bytes
+        self.compress = compress
+        self.writer_id = uuid.uuid4().hex[:8]
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._file: IO[bytes] | None = None
+        self._path: str | None = None
+        self._size = 0
+        self._opened = 0.0
+        self._index: _FileIndex | None = None
+        self._sequence = 0
+        self._compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="file-sink")
+        self._stop = threading.Event()
+        self._start_flusher = start_flusher
+        self._flusher: threading.Thread | None = None
+        self._recover_leftovers()
+
+    @classmethod
+    def from_config(cls) -> "RotatingFileSink":
+        """Build a file sink from shared configuration.
+
+        Returns:
+            RotatingFileSink: Configured sink.
+
+        """
+        return cls(
+            directory=config_shared.get_file_output_dir(),
+            prefix=config_shared.get_file_output_prefix(),
+            max_bytes=config_shared.get_file_output_max_bytes(),
+            max_age_seconds=config_shared.get_file_output_max_seconds(),
+            buffer_bytes=config_shared.get_file_output_buffer_bytes(),
+            compress=config_shared.get_file_output_compress(),
+        )
+
+    def write(self, batch: EncodedBatch) -> None:
+        """Append a batch as NDJSON, rotating the file first if it is due.
+
+        Args:
+            batch (EncodedBatch): Results and their encoded bytes.
+
+        """
+        if not len(batch):
+            return
+        self._ensure_flusher()
+        with self._lock:
+            if self._file is not None and self._rotation_due():
+                self._rotate_locked()
+            if self._file is None:
+                self._open_locked()
+            assert self._file is not None and self._index is not None
+            data = batch.ndjson
+            self._file.write(data)
+            self._size += len(data)
+            for item in batch:
+                self._index.add(item)
+
+    def rotate(self) -> None:
+        """Close the active file (if any) so that it is compressed and indexed."""
+        with self._lock:
+            if self._file is not None:
+                self._rotate_locked()
+
+    def flush(self) -> None:
+        """Rotate the active file if it has reached its size or age limit."""
+        with self._lock:
+            if self._file is not None and self._rotation_due():
+                self._rotate_locked()
+
+    def close(self) -> None:
+        """Stop the rotation timer, rotate the active file and wait for compression."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+        self.rotate()
+        self._compressor.shutdown(wait=True)
+
+    def _ensure_flusher(self) -> None:
+        """Start the background age-based rotation timer on first use."""
+        if not self._start_flusher or self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run_flusher, name="file-sink-flusher", daemon=True
+                )
+                self._flusher.start()
+
+    def _run_flusher(self) -> None:
+        """Periodically rotate the active file once it exceeds its max age."""
+        interval = max(0.5, self.max_age_seconds / 4)
+        while not self._stop.wait(interval):
+            self.flush()
+
+    def _recover_leftovers(self) -> None:
+        """Finalize active files that a previous process never rotated."""
+        if not os.path.isdir(self.directory):
+            return
+        for name in sorted(os.listdir(self.directory)):
+            if not name.startswith(f"{self.prefix}-"):
+                continue
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp"):
+                os.remove(path)
+            elif name.endswith(".ndjson") and not os.path.exists(f"{path}.index.json"):
+                logger.warning("⚠️ Finalizing %s left behind by a previous run", name)
+                self._compressor.submit(self._finish, path, self._rebuild_index(path))
+
+    def _rebuild_index(self, path: str) -> _FileIndex:
+        """Rebuild the index of a leftover file, dropping a torn trailing line."""
+        with open(path, "rb+") as f:
+            data = f.read()
+            complete = data.rfind(b"\n") + 1
+            if complete < len(data):
+                f.truncate(complete)
+        try:
+            stamp = os.path.basename(path)[len(self.prefix) + 1 :][:15]
+            opened = datetime.strptime(stamp, "%Y%m%dT%H%M%S").replace(tzinfo=UTC)
+        except ValueError:
+            opened = datetime.fromtimestamp(os.path.getmtime(path), UTC)
+        index = _FileIndex(opened)
+        for line in data[:complete].splitlines():
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(item, dict):
+                index.add(item)
+        return index
+
+    def _rotation_due(self) -> bool:
+        """Return True when the active file has reached its size or age limit."""
+        return self._size >= self.max_bytes or self._clock() - self._opened >= self.max_age_seconds
+
+    def _open_locked(self) -> None:
+        """Open a new active file; caller holds ``_lock``."""
+        os.makedirs(self.directory, exist_ok=True)
+        now = datetime.now(UTC)
+        self._sequence += 1
+        name = f"{self.prefix}-{now:%Y%m%dT%H%M%S}-{self.writer_id}-{self._sequence:05d}.ndjson"
+        self._path = os.path.join(self.directory, name)
+        self._file = open(  # noqa: SIM115 - closed on rotation
+            self._path, "ab", buffering=self.buffer_bytes
+        )
+        self._size = 0
+        self._opened = self._clock()
+        self._index = _FileIndex(now)
+
+    def _rotate_locked(self) -> None:
+        """Close the active file and hand it off for compression and indexing."""
+        assert self._file is not None and self._path is not None and self._index is not None
+        self._file.close()
+        path, index = self._path, self._index
+        self._file, self._path, self._index = None, None, None
+        self._compressor.submit(self._finish, path, index)
+
+    def _finish(self, path: str, index: _FileIndex) -> None:
+        """Compress a rotated file and write its sidecar index."""
+        start = time.perf_counter()
+        try:
+            final_path = path
+            if self.compress:
+                final_path = f"{path}.gz"
+                with open(path, "rb") as src, gzip.open(f"{final_path}.tmp", "wb") as dst:
+                    shutil.copyfileobj(src, dst, self.buffer_bytes)
+                os.replace(f"{final_path}.tmp", final_path)
+                os.remove(path)
+
+            index_path = f"{final_path}.index.json"
+            document = index.to_dict(os.path.basename(final_path), os.path.getsize(final_path))
+            with open(f"{index_path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(document, f, separators=(",", ":"))
+            os.replace(f"{index_path}.tmp", index_path)
+
+        except OSError as e:
+            logger.error("❌ Failed to finalize rotated file %s: %s", path, e)
+            record_output_metrics("file", success=False, duration_sec=time.perf_counter() - start)
+            return
+        record_output_metrics("file", success=True, duration_sec=time.perf_counter() - start)
+        logger.info("🗂️ Rotated %s (%d records)", os.path.basename(final_path), index.records)
+
+
+__all__ = ["RotatingFileSink"]
@@ -0,0 +1,167 @@
+"""In-memory index of the latest results per symbol.
+
+With LATEST_INDEX_ENABLED, every dispatched batch also updates an index of
+the newest LATEST_INDEX_DEPTH results per symbol (ordered by candle time;
+results without a parseable timestamp are ordered by arrival time).
+The health server serves it at ``/latest`` so UI and strategy services can
+read each symbol's current candlestick state without polling a database.
+
+Results are kept as the compact JSON bytes already produced for the sinks,
+so a lookup only joins bytes under a lock. Every symbol carries a version
+that changes on update; responses get an ETag derived from the versions of
+the requested symbols and a random per-index nonce, so ETags issued before
+a restart never match. ``If-None-Match`` requests are answered with 304
+when nothing has changed.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import threading
+import time
+from collections.abc import Callable
+from functools import lru_cache
+from urllib.parse import parse_qs
+
+from app import config_shared
+from app.encoded_batch import EncodedBatch
+from app.s3_writer import parse_timestamp
+
+
+class _SymbolState:
+    """Newest results of one symbol, sorted by candle time (oldest first)."""
+
+    __slots__ = ("keys", "lines", "version")
+
+    def __init__(self) -> None:
+        self.keys: list[float] = []
+        self.lines: list[bytes] = []
+        self.version = 0
+
+
+class LatestIndex:
+    """Thread-safe latest-N-per-symbol index of encoded results."""
+
+    def __init__(self, depth: int = 5, clock: Callable[[], float] = time.time) -> None:
+        """Initialize an empty index.
+
+        Args:
+            depth (int): Results kept per symbol.
+            clock (Callable[[], float]): Epoch-seconds time source used to order
+                results without a timestamp by arrival.
+
+        """
+        self.depth = max(1, depth)
+        self._clock = clock
+        self._nonce = os.urandom(8).hex()
+        self._symbols: dict[str, _SymbolState] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def update(self, batch: EncodedBatch) -> None:
+        """Add a batch of results to the index.
+
+        Results older than everything kept for a full symbol are ignored.
+
+        Args:
+            batch (EncodedBatch): Results and their encoded bytes.
+
+        """
+        with self._lock:
+            self._generation += 1
+            for item, line in zip(batch.items, batch.item_bytes):
+                symbol = item.get("symbol")
+                if not symbol:
+                    continue
+                ts = parse_timestamp(item.get("timestamp"))
+                key = ts.timestamp() if ts is not None else self._clock()
+                state = self._symbols.get(symbol)
+                if state is None:
+                    state = self._symbols[symbol] = _SymbolState()
+                position = bisect.bisect_right(state.keys, key)
+                if position == 0 and len(state.keys) >= self.depth:
+                    continue
+                state.keys.insert(position, key)
+                state.lines.insert(position, line)
+                if len(state.keys) > self.depth:
+                    del state.keys[0], state.lines[0]
+                state.version = self._generation
+
+    def symbols(self) -> list[str]:
+        """Return the indexed symbols."""
+        with self._lock:
+            return sorted(self._symbols)
+
+    def lookup(
+        self, symbols: list[str] | None = None, limit: int | None = None
+    ) -> tuple[bytes, str]:
+        """Render the newest results for some or all symbols.
+
+        Args:
+            symbols (Optional[list[str]]): Symbols to return; all symbols if None.
+                Unknown symbols map to an empty list.
+            limit (Optional[int]): Results per symbol (newest first); defaults to the depth.
+
+        Returns:
+            tuple[bytes, str]: JSON object ``{symbol: [result, ...]}`` and its ETag.
+
+        """
+        count = self.depth if limit is None else max(0, min(limit, self.depth))
+        parts: list[bytes] = []
+        versions: list[str] = []
+        with self._lock:
+            names = sorted(self._symbols) if symbols is None else symbols
+            for symbol in names:
+                state = self._symbols.get(symbol)
+                lines = state.lines[len(state.lines) - count :][::-1] if state and count else []
+                versions.append(f"{symbol}:{state.version if state else 0}")
+                parts.append(json.dumps(symbol).encode("utf-8") + b":[" + b",".join(lines) + b"]")
+        digest = hashlib.blake2b(
+            f"{self._nonce}|{count}|{'|'.join(versions)}".encode(), digest_size=8
+        ).hexdigest()
+        return b"{" + b",".join(parts) + b"}", f'"{digest}"'
+
+
+@lru_cache
+def get_latest_index() -> LatestIndex:
+    """Return the process-wide latest results index.
+
+    Returns:
+        LatestIndex: Shared index sized by LATEST_INDEX_DEPTH.
+
+    """
+    return LatestIndex(depth=config_shared.get_latest_index_depth())
+
+
+def handle_lookup(
+    query_string: str, if_none_match: str | None = None, index: LatestIndex | None = None
+) -> tuple[int, bytes, str]:
+    """Answer an HTTP lookup against the latest results index.
+
+    Supported parameters: ``symbols`` (comma-separated, repeatable; all
+    symbols if omitted) and ``n`` (results per symbol).
+
+    Args:
+        query_string (str): Raw URL query string.
+        if_none_match (Optional[str]): ``If-None-Match`` request header.
+        index (Optional[LatestIndex]): Index to read; defaults to the shared index.
+
+    Returns:
+        tuple[int, bytes, str]: HTTP status (200, 304 or 400), body and ETag.
+
+    """
+    params = parse_qs(query_string)
+    symbols = [s.strip() for value in params.get("symbols", []) for s in value.split(",")]
+    symbols = [s for s in symbols if s]
+    try:
+        limit = int(params["n"][-1]) if "n" in params else None
+    except ValueError:
+        return 400, b'{"error":"n must be an integer"}', ""
+    body, etag = (index or get_latest_index()).lookup(symbols or None, limit)
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return 304, b"", etag
+    return 200, body, etag
+
+
+__all__ = ["LatestIndex", "get_latest_index", "handle_lookup"]
@@ -9,7 +9,10 @@ import sys
 import traceback
 
 from app import config_shared
+from app.database_sink import validate_write_config
+from app.output_aggregator import OutputAggregator
 from app.output_handler import output_handler
+from app.parquet_writer import require_pyarrow
 from app.queue_handler import consume_messages
 from app.utils.metrics_server import start_metrics_server
 from app.utils.setup_logger import setup_logger
@@ -61,6 +64,13 @@ def validate_output_config() -> None:
         insert_sql = config_shared.get_database_insert_sql()
         logger.info("🗄️ DB URL: %s", redact(db_url))
         logger.debug("📝 Insert SQL: %s", redact(insert_sql))
+        validate_write_config()
+
+    if "parquet" in output_modes:
+        require_pyarrow()
+
+    if "arrow" in output_modes:
+        require_pyarrow("arrow")
 
 
 def main() -> None:
@@ -77,7 +87,18 @@ def main() -> None:
     logger.info(
         "✅ Ready. Listening for messages on queue type: %s", config_shared.get_queue_type()
     )
-    consume_messages(output_handler.send)
+    try:
+        if config_shared.get_output_batching_enabled():
+            aggregator = OutputAggregator(output_handler)
+            logger.info("📦 Output micro-batching enabled")
+            try:
+                consume_messages(aggregator.add)
+            finally:
+                aggregator.close()
+        else:
+            consume_messages(output_handler.send_for_ack)
+    finally:
+        output_handler.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,187 @@
+"""Micro-batching aggregator in front of the output dispatcher.
+
+Consumers hand the dispatcher one message at a time, which turns into one
+S3 object, one REST call and one database transaction per candle. The
+aggregator buffers results per sink and flushes each buffer when it reaches
+a maximum count, a maximum encoded size, or a maximum linger time.
+
+Each result is encoded once on arrival; every sink buffer shares the same
+encoded bytes, so flushing builds an ``EncodedBatch`` without re-encoding.
+
+Note that results are acknowledged to the queue once buffered, so a crash
+loses whatever is still buffered. Keep linger times short for sinks that
+must not lose data.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from app import config_shared
+from app.encoded_batch import EncodedBatch, encode_item
+from app.utils.setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class SinkBuffer:
+    """Accumulates results for a single sink until a flush threshold is reached."""
+
+    def __init__(self, max_count: int, max_bytes: int, linger_seconds: float) -> None:
+        """Initialize an empty buffer.
+
+        Args:
+            max_count (int): Flush once this many results are buffered.
+            max_bytes (int): Flush once the encoded size reaches this many bytes.
+            linger_seconds (float): Flush once the oldest result is this old.
+
+        """
+        self.max_count = max(1, max_count)
+        self.max_bytes = max_bytes
+        self.linger_seconds = linger_seconds
+        self.items: list[dict[str, Any]] = []
+        self.item_bytes: list[bytes] = []
+        self.nbytes = 0
+        self.first_added: float | None = None
+
+    def add(self, item: dict[str, Any], encoded: bytes, now: float) -> None:
+        """Append a result and its encoding to the buffer."""
+        if self.first_added is None:
+            self.first_added = now
+        self.items.append(item)
+        self.item_bytes.append(encoded)
+        self.nbytes += len(encoded)
+
+    def is_full(self) -> bool:
+        """Return True when the count or size threshold has been reached."""
+        return len(self.items) >= self.max_count or (
+            self.max_bytes > 0 and self.nbytes >= self.max_bytes
+        )
+
+    def is_expired(self, now: float) -> bool:
+        """Return True when the oldest buffered result has lingered too long."""
+        return self.first_added is not None and now - self.first_added >= self.linger_seconds
+
+    def drain(self) -> EncodedBatch:
+        """Remove and return the buffered results as an encoded batch."""
+        batch = EncodedBatch(self.items, item_bytes=self.item_bytes)
+        self.items, self.item_bytes, self.nbytes, self.first_added = [], [], 0, None
+        return batch
+
+
+class OutputAggregator:
+    """Buffers results per sink and flushes them to an ``OutputDispatcher``."""
+
+    def __init__(
+        self,
+        dispatcher: Any,
+        buffer_factory: Callable[[str], SinkBuffer] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        start_flusher: bool = True,
+    ) -> None:
+        """Initialize the aggregator.
+
+        Args:
+            dispatcher (OutputDispatcher): Dispatcher providing ``prepare``,
+                ``active_modes`` and ``fan_out``.
+            buffer_factory (Optional[Callable[[str], SinkBuffer]]): Builds the buffer
+                for a sink; defaults to the configured per-sink thresholds.
+            clock (Callable[[], float]): Monotonic time source.
+            start_flusher (bool): Start the background linger flusher thread.
+
+        """
+        self.dispatcher = dispatcher
+        self._buffer_factory = buffer_factory or _configured_buffer
+        self._clock = clock
+        self._buffers: dict[str, SinkBuffer] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher: threading.Thread | None = None
+        if start_flusher:
+            self._flusher = threading.Thread(
+                target=self._run_flusher, name="output-aggregator", daemon=True
+            )
+            self._flusher.start()
+
+    def add(self, data: list[dict[str, Any]]) -> None:
+        """Buffer a batch of results and flush any sink whose thresholds are reached.
+
+        Args:
+            data (list[dict[str, Any]]): Results handed over by the consumer.
+
+        """
+        try:
+            data = self.dispatcher.prepare(data)
+            if not data:
+                return
+            encoded = [encode_item(item) for item in data]
+            now = self._clock()
+            ready: list[tuple[str, EncodedBatch]] = []
+            with self._lock:
+                for mode in self.dispatcher.active_modes():
+                    buffer = self._buffers.get(mode)
+                    if buffer is None:
+                        buffer = self._buffers[mode] = self._buffer_factory(mode)
+                    for item, item_bytes in zip(data, encoded):
+                        buffer.add(item, item_bytes, now)
+                        if buffer.is_full():
+                            ready.append((mode, buffer.drain()))
+            self._dispatch(ready)
+        except Exception:
+            logger.exception("❌ Failed to buffer output")
+
+    def flush(self, force: bool = True) -> None:
+        """Flush buffered results.
+
+        Args:
+            force (bool): Flush every non-empty buffer; otherwise only expired ones.
+
+        """
+        now = self._clock()
+        with self._lock:
+            ready = [
+                (mode, buffer.drain())
+                for mode, buffer in self._buffers.items()
+                if buffer.items and (force or buffer.is_expired(now))
+            ]
+        self._dispatch(ready)
+
+    def close(self) -> None:
+        """Stop the background flusher and flush everything still buffered."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+        self.flush(force=True)
+
+    def _dispatch(self, ready: list[tuple[str, EncodedBatch]]) -> None:
+        """Deliver drained batches concurrently, outside the buffer lock."""
+        if not ready:
+            return
+        try:
+            self.dispatcher.fan_out(ready)
+        except Exception:
+            logger.exception("❌ Failed to flush %d batch(es)", len(ready))
+
+    def _run_flusher(self) -> None:
+        """Periodically flush buffers whose linger time has elapsed."""
+        while not self._stop.wait(self._tick_interval()):
+            self.flush(force=False)
+
+    def _tick_interval(self) -> float:
+        """Return how often the flusher checks for expired buffers."""
+        with self._lock:
+            lingers = [b.linger_seconds for b in self._buffers.values()]
+        return max(0.05, min(lingers, default=1.0) / 2)
+
+
+def _configured_buffer(mode: str) -> SinkBuffer:
+    """Build a sink buffer from the configured per-sink thresholds."""
+    return SinkBuffer(
+        max_count=config_shared.get_output_batch_max_count(mode),
+        max_bytes=config_shared.get_output_batch_max_bytes(mode),
+        linger_seconds=config_shared.get_output_batch_linger_seconds(mode),
+    )
+
+
+__all__ = ["OutputAggregator", "SinkBuffer"]
@@ -1,99 +1,551 @@
 """Module to handle output of analysis results to the configured target.
 
-Supports logging, stdout, queue publishing, REST, S3, and database sinks.
+Supports logging, stdout, queue publishing, REST, S3, Parquet, file,
+database, local detection store, Arrow IPC and time-series database sinks.
 Includes retry logic, validation, and optional metrics integration.
 """
 
+import functools
 import json
+import sys
+import threading
 import time
-import uuid
 from collections.abc import Callable
+from concurrent.futures import Future
+from enum import Enum
 from typing import Any
 
-from tenacity import retry, stop_after_attempt, wait_exponential
-
 from app import config_shared
+from app.circuit_breaker import CircuitBreaker
+from app.db_writer import WriteBehindWriter, combine_futures
+from app.dispatch_policy import NoPatternPolicy
+from app.encoded_batch import EncodedBatch, encode_item
 from app.queue_sender import publish_to_queue
+from app.sink_fanout import SinkFanout, SinkOutcome, SinkPolicy
+from app.spool import SinkSpool, SpoolReplayer
 from app.utils.metrics import (
     record_output_metrics,
     record_paper_trade_metrics,
     record_sink_metrics,
 )
-from app.utils.redactor import redact_dict
+from app.utils.redactor import has_sensitive_keys, redact_dict
 from app.utils.setup_logger import setup_logger
 from app.utils.types import OutputMode, validate_list_of_dicts
 
 logger = setup_logger(__name__)
 
 
+class LocalOutputMode(str, Enum):
+    """Output destinations specific to this service.
+
+    ``OutputMode`` is synchronized from the shared utils repository, so modes
+    that only this service implements are declared here instead.
+    """
+
+    PARQUET = "parquet"
+    FILE = "file"
+    STORE = "store"
+    ARROW = "arrow"
+    TSDB = "tsdb"
+
+
+# Sinks whose dispatch only buffers the batch; their writers report the
+# actual upload/write outcomes to the circuit breaker instead.
+_BUFFERED_MODES = frozenset(
+    {OutputMode.S3.value, LocalOutputMode.PARQUET.value, LocalOutputMode.ARROW.value}
+)
+
+
 class OutputDispatcher:
-    """Handles routing analysis output to different destinations (e.g., queue, REST, S3, DB)."""
+    """Handles routing analysis output to different destinations (e.g., queue, REST, S3, DB).
+
+    Each batch is wrapped in an ``EncodedBatch`` so that every sink shares the
+    same serialized bytes instead of re-encoding the results. Sinks run
+    concurrently, each with its own deadline and retry budget. When
+    SPOOL_ENABLED is set, batches a sink fails to deliver are spooled to
+    local disk and replayed in the background (see ``app.spool``).
+
+    With DB_WRITE_BEHIND_ENABLED, the database sink queues rows for a
+    background writer and ``send_for_ack`` returns a future that completes
+    once they are committed (see ``app.db_writer``).
+    """
 
     def __init__(self) -> None:
         """Initialize dispatcher with configured output modes."""
-        self.output_modes = config_shared.get_output_modes()
-
-    def send(self, data: list[dict[str, Any]]) -> None:
+        self.output_modes: list[str] = config_shared.get_output_modes()
+        self.no_pattern_policy = NoPatternPolicy.from_config()
+        self._s3_writer: Any = None
+        self._parquet_writer: Any = None
+        self._arrow_writer: Any = None
+        self._file_sink: Any = None
+        self._db_writer: WriteBehindWriter | None = None
+        self._paper_trade_writer: WriteBehindWriter | None = None
+        self.fanout = SinkFanout(max_workers=config_shared.get_output_fanout_workers())
+        self._spools: dict[str, SinkSpool] = {}
+        self._replayers: list[SpoolReplayer] = []
+        self._sink_state_lock = threading.Lock()
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def send(self, data: list[dict[str, Any]]) -> list[SinkOutcome]:
         """Dispatch processed analysis output to one or more configured destinations.
 
         Args:
             data (list[dict[str, Any]]): List of data payloads to send.
 
+        Returns:
+            list[SinkOutcome]: Delivery outcome per sink (empty if nothing was sent).
+
         """
         try:
-            validate_list_of_dicts(data, required_keys=["text"])
-
-            if config_shared.get_paper_trading_enabled():
-                paper_mode = config_shared.get_paper_trade_mode()
-                logger.debug("📄 Paper trading enabled — dispatching to %s mode", paper_mode)
-                try:
-                    dispatch_method = self._get_dispatch_method(OutputMode[paper_mode])
-                except KeyError:
-                    logger.warning("⚠️ Invalid paper trading output mode: %s", paper_mode)
-                    return
-                if dispatch_method:
-                    dispatch_method(data)
-                else:
-                    logger.warning("⚠️ Invalid paper trading output mode: %s", paper_mode)
-                return
-
-            for mode in self.output_modes:
-                try:
-                    dispatch_method = self._get_dispatch_method(OutputMode[mode])
-                except KeyError:
-                    logger.warning("⚠️ Invalid output mode: %s", mode)
-                    continue
-                if dispatch_method:
-                    dispatch_method(data)
-                else:
-                    logger.warning("⚠️ Unhandled output mode: %s", mode)
+            data = self.prepare(data)
+            if not data:
+                return []
+            batch = EncodedBatch(data)
+            return self.fan_out([(mode, batch) for mode in self.active_modes()])
 
         except Exception as e:
             logger.error("❌ Failed to send output: %s", e)
+            return []
 
-    def send_trade_simulation(self, data: dict[str, Any]) -> None:
-        """Send simulated trade data to the appropriate paper trade destination.
+    def send_for_ack(self, data: list[dict[str, Any]]) -> Future[None] | None:
+        """Dispatch a consumed batch and report when it may be acknowledged.
+
+        Args:
+            data (list[dict[str, Any]]): List of data payloads to send.
+
+        Returns:
+            Optional[Future[None]]: Completes once every queued write has been
+            committed (or spooled after a failed commit), or None if the batch
+            can be acknowledged right away.
+
+        """
+        pending = [o.pending for o in self.send(data) if o.pending is not None]
+        return combine_futures(pending) if pending else None
+
+    def prepare(self, data: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Validate a batch and apply the no-pattern dispatch policy.
 
         Args:
-            data (dict[str, Any]): Simulated trade payload.
+            data (list[dict[str, Any]]): Raw batch handed to the dispatcher.
+
+        Returns:
+            list[dict[str, Any]]: Results that should reach the sinks.
+
+        """
+        validate_list_of_dicts(data, required_keys=["text"])
+        filtered: list[dict[str, Any]] = self.no_pattern_policy.filter(data)
+        return filtered
+
+    def active_modes(self) -> list[str]:
+        """Return the output modes that batches are currently routed to.
+
+        Returns:
+            list[str]: The paper trading mode when paper trading is enabled,
+            otherwise the configured output modes.
+
+        """
+        if config_shared.get_paper_trading_enabled():
+            paper_mode = config_shared.get_paper_trade_mode()
+            logger.debug("📄 Paper trading enabled — dispatching to %s mode", paper_mode)
+            return [paper_mode]
+        return self.output_modes
+
+    def fan_out(self, deliveries: list[tuple[str, EncodedBatch]]) -> list[SinkOutcome]:
+        """Deliver batches to their sinks concurrently.
+
+        Each sink gets the deadline and attempt budget configured by
+        OUTPUT_SINK_TIMEOUT_SECONDS and OUTPUT_SINK_MAX_ATTEMPTS (with optional
+        per-sink overrides such as OUTPUT_SINK_TIMEOUT_SECONDS_DATABASE).
+        Sinks whose circuit breaker is open are skipped; their batches are
+        spooled when spooling is enabled and dropped otherwise. A batch queued
+        for a write-behind writer is recorded with the breaker, and spooled if
+        its commit fails, once the commit result is known. For buffered sinks
+        (S3, Parquet, Arrow) the breaker records the writer's uploads rather
+        than the buffering. With
+        LATEST_INDEX_ENABLED, each batch also updates the in-memory latest
+        results index first, and with PUSH_ENABLED it is pushed to stream
+        subscribers.
+
+        Args:
+            deliveries (list[tuple[str, EncodedBatch]]): (mode, batch) pairs.
+
+        Returns:
+            list[SinkOutcome]: One outcome per delivery.
+
+        """
+        batches = {id(batch): batch for _, batch in deliveries}.values()
+        if config_shared.get_latest_index_enabled():
+            from app.latest_index import get_latest_index
+
+            index = get_latest_index()
+            for batch in batches:
+                index.update(batch)
+        if config_shared.get_push_enabled():
+            from app.push_hub import get_hub
+
+            hub = get_hub()
+            for batch in batches:
+                hub.publish(batch)
+
+        for mode, _ in deliveries:
+            self._spool_for(mode)  # opens the spool and starts replaying leftovers
+
+        outcomes: list[SinkOutcome | None] = [None] * len(deliveries)
+        admitted: list[int] = []
+        for i, (mode, _) in enumerate(deliveries):
+            breaker = self._breaker_for(mode)
+            if breaker is None or breaker.allow():
+                admitted.append(i)
+            else:
+                outcomes[i] = SinkOutcome(
+                    mode,
+                    ok=False,
+                    attempts=0,
+                    duration=0.0,
+                    error="circuit open",
+                    short_circuited=True,
+                )
+
+        sink_calls = {i: self._sink_call(*deliveries[i]) for i in admitted}
+        calls = [(deliveries[i][0], sink_calls[i][0]) for i in admitted]
+        policies = {
+            mode: SinkPolicy(
+                timeout=config_shared.get_output_sink_timeout_seconds(mode),
+                max_attempts=config_shared.get_output_sink_max_attempts(mode),
+            )
+            for mode, _ in deliveries
+        }
+        for i, outcome in zip(admitted, self.fanout.run(calls, policies) if calls else []):
+            outcomes[i] = outcome
+            breaker = self._breaker_for(outcome.mode)
+            buffered = outcome.ok and outcome.mode in _BUFFERED_MODES
+            if breaker is not None and outcome.pending is None and not buffered:
+                breaker.record(outcome.ok, outcome.duration)
+
+        results = [o for o in outcomes if o is not None]
+        for i, ((mode, batch), outcome) in enumerate(zip(deliveries, results)):
+            undelivered = sink_calls[i][1] if i in sink_calls else _whole_batch(batch)
+            if outcome.pending is not None:
+                outcome.pending = self._track_pending(mode, batch, outcome.pending)
+            elif outcome.straggler is not None:
+                self._spool_if_failed(mode, outcome.straggler, undelivered)
+            elif not outcome.ok:
+                outcome.spooled = self._spool(mode, undelivered().item_bytes)
+        failed = [o for o in results if not o.ok]
+        if failed:
+            logger.warning(
+                "⚠️ Output incomplete: %s",
+                ", ".join(f"{o.mode}={_failure_label(o)}" for o in failed),
+            )
+        return results
+
+    def _sink_call(
+        self, mode: str, batch: EncodedBatch
+    ) -> tuple[Callable[[], bool | Future[Any]], Callable[[], EncodedBatch]]:
+        """Build the fan-out call for one delivery.
+
+        A REST batch split into several bodies can fail part-way, so each
+        attempt only re-sends the results the sink has not accepted yet, and
+        only those are spooled if the sink finally fails.
+
+        Args:
+            mode (str): Output mode name.
+            batch (EncodedBatch): Batch to deliver.
+
+        Returns:
+            tuple: The sink call, and a function returning the part of the
+            batch that has not been delivered.
+
+        """
+        remaining = [batch]
+
+        def narrow(undelivered: EncodedBatch) -> None:
+            remaining[0] = undelivered
+
+        def call() -> bool | Future[Any]:
+            return self.dispatch(mode, remaining[0], on_undelivered=narrow)
+
+        return call, lambda: remaining[0]
+
+    def dispatch(
+        self,
+        mode: str,
+        batch: EncodedBatch,
+        on_undelivered: Callable[[EncodedBatch], None] | None = None,
+    ) -> bool | Future[Any]:
+        """Send an encoded batch to a single output mode.
+
+        Args:
+            mode (str): Output mode name (e.g., 'queue', 's3').
+            batch (EncodedBatch): Batch to deliver.
+            on_undelivered (Optional[Callable[[EncodedBatch], None]]): Receives
+                the results still undelivered when a sink that sends a batch in
+                several requests (REST) fails part-way.
+
+        Returns:
+            bool | Future: True if the sink accepted the batch, or a future
+            for a write-behind database write.
+
+        """
+        output_mode = _resolve_mode(mode)
+        if output_mode is OutputMode.REST:
+            return self._output_to_rest(batch, on_undelivered)
+        dispatch_method = self._get_dispatch_method(output_mode) if output_mode else None
+        if dispatch_method:
+            return dispatch_method(batch)
+        logger.warning("⚠️ Invalid output mode: %s", mode)
+        return False
+
+    def close(self) -> None:
+        """Flush and release buffered sink writers (e.g. pending S3 rollups)."""
+        if self._s3_writer is not None:
+            self._s3_writer.close()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        if self._arrow_writer is not None:
+            self._arrow_writer.close()
+        if self._file_sink is not None:
+            self._file_sink.close()
+        self.fanout.shutdown()
+        if self._db_writer is not None:
+            self._db_writer.close()
+        if self._paper_trade_writer is not None:
+            self._paper_trade_writer.close()
+        for replayer in self._replayers:
+            replayer.stop()
+        for spool in self._spools.values():
+            spool.close()
+
+    def _breaker_for(self, mode: str) -> CircuitBreaker | None:
+        """Return the circuit breaker guarding a sink, creating it on first use.
+
+        Args:
+            mode (str): Output mode name.
+
+        Returns:
+            Optional[CircuitBreaker]: The breaker, or None if breakers are disabled.
+
+        """
+        if not config_shared.get_circuit_breaker_enabled():
+            return None
+        with self._sink_state_lock:
+            breaker = self._breakers.get(mode)
+            if breaker is None:
+                breaker = self._breakers[mode] = CircuitBreaker.from_config(mode)
+            return breaker
+
+    def _spool_for(self, mode: str) -> SinkSpool | None:
+        """Return the spool for a sink, opening it and its replayer on first use.
+
+        Args:
+            mode (str): Output mode name.
+
+        Returns:
+            Optional[SinkSpool]: The spool, or None if the sink is not spooled.
+
+        """
+        if not config_shared.get_spool_enabled() or mode not in config_shared.get_spool_sinks():
+            return None
+        with self._sink_state_lock:
+            spool = self._spools.get(mode)
+            if spool is None:
+                spool = self._spools[mode] = SinkSpool.from_config(mode)
+                replayer = SpoolReplayer(
+                    spool,
+                    functools.partial(self._replay, mode),
+                    rate=config_shared.get_spool_replay_rate(),
+                    interval=config_shared.get_spool_replay_interval_seconds(),
+                )
+                replayer.start()
+                self._replayers.append(replayer)
+            return spool
+
+    def _replay(self, mode: str, batch: EncodedBatch) -> bool:
+        """Deliver a spooled batch, respecting the sink's circuit breaker.
+
+        Replays are recorded by the breaker like live deliveries, so an open
+        circuit also pauses the replay.
+
+        Args:
+            mode (str): Output mode name.
+            batch (EncodedBatch): Spooled batch.
+
+        Returns:
+            bool: True if the sink accepted the batch.
+
+        """
+        breaker = self._breaker_for(mode)
+        if breaker is not None and not breaker.allow():
+            return False
+        start = time.monotonic()
+        delivered = False
+        try:
+            delivered = _delivered(self.dispatch(mode, batch))
+        finally:
+            if breaker is not None and not (delivered and mode in _BUFFERED_MODES):
+                breaker.record(delivered, time.monotonic() - start)
+        return delivered
+
+    def _spool(self, mode: str, item_bytes: list[bytes]) -> bool:
+        """Append a failed delivery to the sink's spool.
+
+        Args:
+            mode (str): Output mode name.
+            item_bytes (list[bytes]): Encoded results that were not delivered.
+
+        Returns:
+            bool: True if the results were spooled.
 
         """
         try:
-            if config_shared.get_paper_trading_database_enabled():
-                self._output_paper_trade_to_database(data)
+            spool = self._spool_for(mode)
+            if spool is None:
+                return False
+            spool.append(item_bytes)
+            return True
+        except Exception:
+            logger.exception("❌ Failed to spool %d result(s) for %s", len(item_bytes), mode)
+            return False
+
+    def _track_pending(self, mode: str, batch: EncodedBatch, pending: Future[Any]) -> Future[Any]:
+        """Follow a queued write-behind write until it commits or fails.
+
+        The sink outcome is reported as accepted when the batch is queued, so
+        the commit result is recorded with the sink's circuit breaker here, and
+        a batch whose commit fails is spooled.
+
+        Args:
+            mode (str): Output mode name.
+            batch (EncodedBatch): Batch that was queued.
+            pending (Future[Any]): Completes once the batch has been written.
+
+        Returns:
+            Future[Any]: Resolves with the write's result once the batch is
+            committed, or with None once a failed batch has been spooled; fails
+            if the write failed and the batch could not be spooled.
+
+        """
+        breaker = self._breaker_for(mode)
+        start = time.monotonic()
+        settled: Future[Any] = Future()
+
+        def on_done(future: Future[Any]) -> None:
+            error = future.exception()
+            if breaker is not None:
+                breaker.record(error is None, time.monotonic() - start)
+            if error is None:
+                settled.set_result(future.result())
+            elif self._spool(mode, batch.item_bytes):
+                logger.warning("💾 Spooled %d result(s) of a failed %s write", len(batch), mode)
+                settled.set_result(None)
             else:
-                self._output_paper_trade_to_queue(data)
+                settled.set_exception(error)
+
+        pending.add_done_callback(on_done)
+        return settled
+
+    def _spool_if_failed(
+        self,
+        mode: str,
+        straggler: Future[SinkOutcome],
+        undelivered: Callable[[], EncodedBatch],
+    ) -> None:
+        """Spool a timed-out delivery once its worker has finished, unless it succeeded late.
+
+        The worker of a sink that missed its deadline keeps running, so
+        spooling the batch straight away could deliver it twice.
+
+        Args:
+            mode (str): Output mode name.
+            straggler (Future[SinkOutcome]): Worker still delivering the batch.
+            undelivered (Callable[[], EncodedBatch]): Returns what the worker has
+                not delivered.
+
+        """
+
+        def on_done(future: Future[SinkOutcome]) -> None:
+            if future.result().ok:
+                logger.info("🐢 Output sink %s delivered its batch after the deadline", mode)
+                return
+            self._spool(mode, undelivered().item_bytes)
+
+        straggler.add_done_callback(on_done)
+
+    def _spool_hook(self, mode: str) -> Callable[[list[bytes]], None]:
+        """Return an ``on_failure`` hook that spools a buffered writer's failed results.
+
+        Results that cannot be spooled (SPOOL_ENABLED unset or the sink not in
+        SPOOL_SINKS) are dropped with an error log.
+
+        Args:
+            mode (str): Output mode name.
+
+        Returns:
+            Callable[[list[bytes]], None]: Hook for the writer.
+
+        """
+
+        def hook(item_bytes: list[bytes]) -> None:
+            if not self._spool(mode, item_bytes):
+                logger.error(
+                    "❌ Dropped %d result(s) of a failed %s write: spooling is off for this sink",
+                    len(item_bytes),
+                    mode,
+                )
+
+        return hook
+
+    def _breaker_hook(self, mode: str) -> Callable[[bool, float], None]:
+        """Return an ``on_outcome`` hook that records a buffered writer's writes.
+
+        Args:
+            mode (str): Output mode name.
+
+        Returns:
+            Callable[[bool, float], None]: Hook for the writer.
+
+        """
+
+        def hook(success: bool, duration: float) -> None:
+            breaker = self._breaker_for(mode)
+            if breaker is not None:
+                breaker.record(success, duration)
+
+        return hook
+
+    def send_trade_simulation(
+        self, data: dict[str, Any] | list[dict[str, Any]]
+    ) -> Future[int] | None:
+        """Send simulated trade data to the appropriate paper trade destination.
+
+        Args:
+            data (dict[str, Any] | list[dict[str, Any]]): One simulated trade or a batch.
+
+        Returns:
+            Optional[Future[int]]: For database output, completes once the trades are
+            committed; None otherwise.
+
+        """
+        trades = data if isinstance(data, list) else [data]
+        database = config_shared.get_paper_trading_database_enabled()
+        try:
+            if database:
+                return self._output_paper_trade_to_database(trades)
+            self._output_paper_trade_to_queue(trades)
         except Exception as e:
             logger.error("❌ Failed to send paper trade: %s", e)
-            record_paper_trade_metrics("queue", success=False, duration_sec=0)
+            record_paper_trade_metrics(
+                "database" if database else "queue", success=False, duration_sec=0
+            )
+        return None
 
     def _get_dispatch_method(
-        self, mode: OutputMode
-    ) -> Callable[[list[dict[str, Any]]], None] | None:
+        self, mode: OutputMode | LocalOutputMode
+    ) -> Callable[[EncodedBatch], bool | Future[Any]] | None:
         """Resolve the output dispatch method based on the mode.
 
         Args:
-            mode (OutputMode): Output mode enum value.
+            mode (OutputMode | LocalOutputMode): Output mode enum value.
 
         Returns:
             Callable or None: Method to handle the output.
@@ -106,137 +558,442 @@ class OutputDispatcher:
             OutputMode.REST: self._output_to_rest,
             OutputMode.S3: self._output_to_s3,
             OutputMode.DATABASE: self._output_to_database,
+            LocalOutputMode.PARQUET: self._output_to_parquet,
+            LocalOutputMode.FILE: self._output_to_file,
+            LocalOutputMode.STORE: self._output_to_store,
+            LocalOutputMode.ARROW: self._output_to_arrow,
+            LocalOutputMode.TSDB: self._output_to_tsdb,
         }.get(mode)
 
-    def _output_to_log(self, data: list[dict[str, Any]]) -> None:
-        """Log each item in the data list.
+    def _output_to_log(self, batch: EncodedBatch) -> bool:
+        """Log the batch as a single record with one compact JSON line per item.
 
         Args:
-            data (list[dict[str, Any]]): Data to log.
+            batch (EncodedBatch): Data to log.
+
+        Returns:
+            bool: True if the sink accepted the batch.
 
         """
-        for item in data:
-            logger.info("📝 Processed message:\n%s", json.dumps(redact_dict(item), indent=4))
+        logger.info(
+            "📝 Processed %d message(s):\n%s", len(batch), _render_batch(batch, redact=True)
+        )
+        return True
 
-    def _output_to_stdout(self, data: list[dict[str, Any]]) -> None:
-        """Print each item in the data list to standard output.
+    def _output_to_stdout(self, batch: EncodedBatch) -> bool:
+        """Write the batch to standard output as NDJSON with a single write.
 
         Args:
-            data (list[dict[str, Any]]): Data to print.
+            batch (EncodedBatch): Data to print.
+
+        Returns:
+            bool: True if the sink accepted the batch.
 
         """
-        for item in data:
-            print(json.dumps(item, indent=4))
+        sys.stdout.write(_render_batch(batch) + "\n")
+        return True
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
-    def _output_to_queue(self, data: list[dict[str, Any]]) -> None:
-        """Publish the data to the configured queue.
+    def _output_to_queue(self, batch: EncodedBatch) -> bool:
+        """Publish the batch to the configured queue.
 
-        Retries on failure using exponential backoff.
+        Retries are handled per message by ``publish_to_queue``, so messages that
+        were already published are never replayed.
 
         Args:
-            data (list[dict[str, Any]]): Data to publish.
+            batch (EncodedBatch): Data to publish.
 
-        """
-        publish_to_queue(data)
-        logger.info("✅ Output published to queue: %d message(s)", len(data))
-        record_output_metrics("queue", success=True, duration_sec=0)
+        Returns:
+            bool: True if the sink accepted the batch.
 
-    def _output_to_rest(self, data: list[dict[str, Any]]) -> None:
-        """Send the data to the configured REST endpoint.
+        """
+        start = time.perf_counter()
+        result = publish_to_queue(batch.items, bodies=batch.item_bytes)
+        duration = time.perf_counter() - start
+        if result.ok:
+            logger.info("✅ Output published to queue: %d message(s)", len(batch))
+        else:
+            logger.error(
+                "❌ Queue output incomplete: %d of %d message(s) failed",
+                len(result.failed),
+                result.total,
+            )
+        record_output_metrics("queue", success=result.ok, duration_sec=duration)
+        return bool(result.ok)
+
+    def _output_to_rest(
+        self,
+        batch: EncodedBatch,
+        on_undelivered: Callable[[EncodedBatch], None] | None = None,
+    ) -> bool:
+        """Send the batch to the configured REST endpoint.
+
+        Uses the shared keep-alive session, splitting large batches into
+        several posts (see ``app.rest_sink``).
 
         Args:
-            data (list[dict[str, Any]]): Data to post to REST API.
+            batch (EncodedBatch): Data to post to REST API.
+            on_undelivered (Optional[Callable[[EncodedBatch], None]]): Receives
+                the results of the posts that failed, so a retry does not send
+                the accepted ones again.
+
+        Returns:
+            bool: True if the sink accepted the batch.
 
         """
-        import requests
+        from app.rest_sink import post_batch
 
-        url = config_shared.get_rest_output_url()
-        headers = {"Content-Type": "application/json"}
-        start = time.perf_counter()
         try:
-            response = requests.post(url, json=data, headers=headers, timeout=10)
-            duration = time.perf_counter() - start
-            record_sink_metrics("rest", str(response.status_code), duration, failed=not response.ok)
-
-            if response.ok:
-                logger.info("🚀 Sent data to REST: HTTP %d", response.status_code)
+            result = post_batch(batch)
+            if result.ok:
+                logger.info(
+                    "🚀 Sent data to REST: %d request(s), HTTP %s",
+                    result.requests,
+                    ",".join(sorted(set(result.statuses))),
+                )
             else:
-                logger.error("❌ REST output failed: HTTP %d", response.status_code)
+                logger.error(
+                    "❌ REST output failed: %d of %d request(s) (%s)",
+                    result.failed,
+                    result.requests,
+                    ",".join(result.statuses),
+                )
+                if on_undelivered is not None:
+                    failed = result.failed_items
+                    on_undelivered(
+                        EncodedBatch(
+                            [batch.items[i] for i in failed], [batch.item_bytes[i] for i in failed]
+                        )
+                    )
+            return bool(result.ok)
         except Exception as e:
             logger.error("❌ REST output error: %s", e)
             record_sink_metrics("rest", "exception", 0, failed=True)
+            return False
+
+    def _output_to_tsdb(self, batch: EncodedBatch) -> bool:
+        """Write the batch to the time-series database as line protocol.
 
-    def _output_to_s3(self, data: list[dict[str, Any]]) -> None:
-        """Upload the data as a JSON file to an S3 bucket.
+        Uses a shared keep-alive session and posts gzip-compressed bodies,
+        retrying transient failures (see ``app.tsdb_sink``).
 
         Args:
-            data (list[dict[str, Any]]): Data to upload.
+            batch (EncodedBatch): Data to write.
+
+        Returns:
+            bool: True if every point was accepted.
 
         """
-        import boto3
+        from app.tsdb_sink import write_batch
 
-        s3 = boto3.client("s3")
-        bucket = config_shared.get_s3_output_bucket()
-        key = f"outputs/{uuid.uuid4()}.json"
-        start = time.perf_counter()
         try:
-            s3.put_object(Bucket=bucket, Key=key, Body=json.dumps(data).encode("utf-8"))
-            duration = time.perf_counter() - start
-            record_sink_metrics("s3", "200", duration, failed=False)
-            logger.info("🚚 Uploaded output to S3: %s/%s", bucket, key)
-        except Exception as e:
-            logger.error("❌ S3 upload failed: %s", e)
-            record_sink_metrics("s3", "exception", 0, failed=True)
+            result = write_batch(batch)
+            if result.ok:
+                logger.info(
+                    "📈 Wrote %d point(s) to TSDB: %d request(s)", len(batch), result.requests
+                )
+            else:
+                logger.error(
+                    "❌ TSDB output failed: %d write(s) rejected (%s)",
+                    result.failed,
+                    ",".join(result.statuses),
+                )
+            return bool(result.ok)
+        except Exception:
+            logger.exception("❌ TSDB output error")
+            record_output_metrics("tsdb", success=False, duration_sec=0)
+            return False
+
+    def _output_to_s3(self, batch: EncodedBatch) -> bool:
+        """Buffer the batch into partitioned gzip NDJSON rollups for S3.
+
+        Rollups are uploaded by size or age; see ``app.s3_writer``. Upload
+        results are recorded with the sink's circuit breaker.
+
+        Args:
+            batch (EncodedBatch): Data to upload.
+
+        Returns:
+            bool: True once the batch is buffered.
+
+        """
+        with self._sink_state_lock:
+            if self._s3_writer is None:
+                from app.s3_writer import S3RollupWriter
+
+                self._s3_writer = S3RollupWriter.from_config(
+                    on_failure=self._spool_hook(OutputMode.S3.value),
+                    on_outcome=self._breaker_hook(OutputMode.S3.value),
+                )
+        self._s3_writer.add(batch)
+        return True
+
+    def _output_to_parquet(self, batch: EncodedBatch) -> bool:
+        """Buffer the batch into columnar Parquet files on S3 or local disk.
+
+        Files are written by row count or age; see ``app.parquet_writer``.
+        Write results are recorded with the sink's circuit breaker.
+
+        Args:
+            batch (EncodedBatch): Data to write.
+
+        Returns:
+            bool: True once the batch is buffered.
+
+        """
+        with self._sink_state_lock:
+            if self._parquet_writer is None:
+                from app.parquet_writer import ParquetWriter
+
+                self._parquet_writer = ParquetWriter.from_config(
+                    on_failure=self._spool_hook(LocalOutputMode.PARQUET.value),
+                    on_outcome=self._breaker_hook(LocalOutputMode.PARQUET.value),
+                )
+        self._parquet_writer.add(batch)
+        return True
+
+    def _output_to_arrow(self, batch: EncodedBatch) -> bool:
+        """Buffer the batch into the shared-memory Arrow IPC segment ring.
+
+        Segments are sealed by row count or age; see ``app.arrow_ipc``. Seal
+        results are recorded with the sink's circuit breaker.
+
+        Args:
+            batch (EncodedBatch): Data to write.
+
+        Returns:
+            bool: True once the batch is buffered.
 
-    def _output_to_database(self, data: list[dict[str, Any]]) -> None:
-        """Write the data to the configured database using raw SQL inserts.
+        """
+        with self._sink_state_lock:
+            if self._arrow_writer is None:
+                from app.arrow_ipc import ArrowIpcWriter
+
+                self._arrow_writer = ArrowIpcWriter.from_config(
+                    on_failure=self._spool_hook(LocalOutputMode.ARROW.value),
+                    on_outcome=self._breaker_hook(LocalOutputMode.ARROW.value),
+                )
+        self._arrow_writer.add(batch)
+        return True
+
+    def _output_to_file(self, batch: EncodedBatch) -> bool:
+        """Append the batch to the rotating local NDJSON file sink.
+
+        See ``app.file_sink`` for rotation, compression and indexing.
+
+        Args:
+            batch (EncodedBatch): Data to write.
+
+        Returns:
+            bool: True if the sink accepted the batch.
+
+        """
+        with self._sink_state_lock:
+            if self._file_sink is None:
+                from app.file_sink import RotatingFileSink
+
+                self._file_sink = RotatingFileSink.from_config()
+        try:
+            self._file_sink.write(batch)
+            return True
+        except Exception:
+            logger.exception("❌ File output failed")
+            record_output_metrics("file", success=False, duration_sec=0)
+            return False
+
+    def _output_to_store(self, batch: EncodedBatch) -> bool:
+        """Write the batch to the embedded local detection store.
+
+        Args:
+            batch (EncodedBatch): Data records to store.
+
+        Returns:
+            bool: True if the sink accepted the batch.
+
+        """
+        from app.detection_store import write_batch
+
+        return bool(write_batch(batch))
+
+    def _output_to_database(self, batch: EncodedBatch) -> bool | Future[Any]:
+        """Write the batch to the configured database using bulk loads.
+
+        Uses the shared pooled engine and the fastest bulk mechanism for the
+        database dialect (see ``app.database_sink``). With write-behind
+        enabled, rows are queued for the background writer instead.
 
         Args:
-            data (list[dict[str, Any]]): Data records to insert.
+            batch (EncodedBatch): Data records to insert.
+
+        Returns:
+            bool | Future: True if the sink accepted the batch, or a future that
+            completes when the queued rows are committed.
 
         """
-        import sqlalchemy
+        from app.database_sink import write_results
 
-        engine = sqlalchemy.create_engine(config_shared.get_database_output_url())
         start = time.perf_counter()
         try:
-            with engine.begin() as conn:
-                for item in data:
-                    if not isinstance(item, dict):
-                        logger.warning("⚠️ Invalid item in database batch: %s", item)
-                        continue
-                    conn.execute(sqlalchemy.text(config_shared.get_database_insert_sql()), **item)
+            rows = [item for item in batch if isinstance(item, dict)]
+            if len(rows) != len(batch):
+                logger.warning(
+                    "⚠️ Skipped %d invalid item(s) in database batch", len(batch) - len(rows)
+                )
+            if config_shared.get_db_write_behind_enabled():
+                with self._sink_state_lock:
+                    if self._db_writer is None:
+                        self._db_writer = WriteBehindWriter.from_config(write_results)
+                pending: Future[int] = self._db_writer.submit(rows)
+                return pending
+            written = write_results(rows)
             duration = time.perf_counter() - start
             record_sink_metrics("db", "success", duration, failed=False)
-            logger.info("📊 Wrote %d records to database", len(data))
+            logger.info("📊 Wrote %d records to database", written)
+            return True
         except Exception as e:
             logger.error("❌ Database output failed: %s", e)
             record_sink_metrics("db", "exception", 0, failed=True)
+            return False
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
-    def _output_paper_trade_to_queue(self, data: dict[str, Any]) -> None:
+    def _output_paper_trade_to_queue(self, trades: list[dict[str, Any]]) -> None:
         """Send paper trade data to a paper trading queue.
 
         Args:
-            data (dict[str, Any]): Simulated trade to queue.
+            trades (list[dict[str, Any]]): Simulated trades to queue.
 
         """
         queue_name = config_shared.get_paper_trading_queue_name()
         exchange = config_shared.get_paper_trading_exchange()
-        publish_to_queue([data], queue=queue_name, exchange=exchange)
-        logger.info("🪙 Paper trade sent to queue:\n%s", json.dumps(redact_dict(data), indent=4))
-        record_paper_trade_metrics("queue", success=True, duration_sec=0)
-
-    def _output_paper_trade_to_database(self, data: dict[str, Any]) -> None:
-        """Placeholder for future paper trade DB integration.
+        start = time.perf_counter()
+        result = publish_to_queue(trades, queue=queue_name, exchange=exchange)
+        duration = time.perf_counter() - start
+        if not result.ok:
+            logger.error("❌ Paper trade publish failed: %s", next(iter(result.failed.values())))
+            record_paper_trade_metrics("queue", success=False, duration_sec=duration)
+            return
+        if len(trades) == 1:
+            logger.info(
+                "🪙 Paper trade sent to queue:\n%s", json.dumps(redact_dict(trades[0]), indent=4)
+            )
+        else:
+            logger.info("🪙 %d paper trades sent to queue", len(trades))
+        record_paper_trade_metrics("queue", success=True, duration_sec=duration)
+
+    def _output_paper_trade_to_database(self, trades: list[dict[str, Any]]) -> Future[int]:
+        """Queue paper trades for a batched upsert into the paper trade table.
+
+        Trades from many calls are coalesced into one transaction of up to
+        PAPER_TRADING_BATCH_MAX_ROWS rows (see ``app.paper_trade_store``).
 
         Args:
-            data (dict[str, Any]): Simulated trade record.
+            trades (list[dict[str, Any]]): Simulated trades.
+
+        Returns:
+            Future[int]: Completes with the number of trades written once committed.
 
         """
-        logger.warning("⚠️ Paper trading database integration not implemented.")
-        logger.info("📊 Skipped paper trade (DB output not implemented).")
+        with self._sink_state_lock:
+            if self._paper_trade_writer is None:
+                self._paper_trade_writer = WriteBehindWriter(
+                    _write_paper_trades,
+                    max_rows=config_shared.get_paper_trading_batch_max_rows(),
+                    max_seconds=config_shared.get_paper_trading_batch_max_seconds(),
+                    queue_size=config_shared.get_db_write_behind_queue_size(),
+                    sink="paper_trade",
+                )
+        pending: Future[int] = self._paper_trade_writer.submit(trades)
+        return pending
+
+
+def _write_paper_trades(trades: list[dict[str, Any]]) -> int:
+    """Upsert a transaction's worth of paper trades and record metrics."""
+    from app.paper_trade_store import upsert_trades
+
+    start = time.perf_counter()
+    try:
+        written: int = upsert_trades(trades)
+    except Exception:
+        record_paper_trade_metrics("database", success=False, duration_sec=0)
+        raise
+    record_paper_trade_metrics("database", success=True, duration_sec=time.perf_counter() - start)
+    logger.info("🪙 Stored %d paper trade(s) in database", written)
+    return written
+
+
+def _whole_batch(batch: EncodedBatch) -> Callable[[], EncodedBatch]:
+    """Return an undelivered-results getter for a delivery that was never split."""
+
+    def undelivered() -> EncodedBatch:
+        return batch
+
+    return undelivered
+
+
+def _delivered(result: bool | Future[Any]) -> bool:
+    """Wait for a queued write if needed and report whether it succeeded."""
+    if isinstance(result, Future):
+        return result.exception() is None
+    return bool(result)
+
+
+def _failure_label(outcome: SinkOutcome) -> str:
+    """Describe why a sink delivery failed, for log summaries."""
+    if outcome.short_circuited:
+        label = "circuit-open"
+    elif outcome.timed_out:
+        label = "timeout"
+    else:
+        label = "failed"
+    return f"{label} (spooled)" if outcome.spooled else label
+
+
+def _render_batch(batch: EncodedBatch, redact: bool = False) -> str:
+    """Render a batch as text, one item per line.
+
+    Compact lines reuse the batch's shared encoding; only items that actually
+    contain sensitive keys are re-encoded after redaction. With
+    OUTPUT_PRETTY_PRINT enabled, items are indented JSON instead.
+
+    Args:
+        batch (EncodedBatch): Batch to render.
+        redact (bool): Redact sensitive keys (see ``app.utils.redactor``).
+
+    Returns:
+        str: Rendered batch without a trailing newline.
+
+    """
+    if config_shared.get_output_pretty_print():
+        return "\n".join(
+            json.dumps(redact_dict(item) if redact else item, indent=4, default=str)
+            for item in batch
+        )
+    if not redact:
+        return b"\n".join(batch.item_bytes).decode("utf-8")
+    return b"\n".join(
+        encode_item(redact_dict(item)) if has_sensitive_keys(item) else encoded
+        for item, encoded in zip(batch.items, batch.item_bytes)
+    ).decode("utf-8")
+
+
+def _resolve_mode(mode: str) -> OutputMode | LocalOutputMode | None:
+    """Resolve an output mode by value ('s3') or enum name ('S3').
+
+    Shared modes are looked up first, then the modes local to this service.
+
+    Args:
+        mode (str): Configured mode string.
+
+    Returns:
+        Optional[OutputMode | LocalOutputMode]: Matching enum member, or None if unknown.
+
+    """
+    for enum in (OutputMode, LocalOutputMode):
+        try:
+            return enum(mode.lower())
+        except ValueError:
+            member = enum.__members__.get(mode.upper())
+            if member is not None:
+                return member
+    return None
 
 
 output_handler = OutputDispatcher()
@@ -0,0 +1,179 @@
+"""Database store for simulated (paper) trades.
+
+Trades are validated against ``TradeEvent``, mapped onto a fixed column
+layout and upserted in bulk on the shared pooled engine, keyed by
+(strategy_id, symbol, timestamp). Replaying the same trade therefore
+updates the stored row instead of duplicating it.
+
+The upsert uses the dialect's native syntax:
+
+- PostgreSQL and SQLite: ``INSERT ... ON CONFLICT (...) DO UPDATE``.
+- MySQL/MariaDB: ``INSERT ... ON DUPLICATE KEY UPDATE``.
+
+Other dialects fall back to a plain multi-row insert. The target table must
+have a unique constraint on the key columns.
+"""
+
+from functools import lru_cache
+from typing import Any, cast
+
+import sqlalchemy
+
+from app import config_shared
+from app.database_sink import chunked, get_engine, insert_or_update
+from app.utils.setup_logger import setup_logger
+from app.utils.types import TradeEvent, is_valid_trade_event
+
+logger = setup_logger(__name__)
+
+TRADE_KEY: tuple[str, ...] = ("strategy_id", "symbol", "timestamp")
+
+# Columns produced by ``trade_to_row`` and written by ``upsert_trades``.
+TRADE_COLUMNS: tuple[str, ...] = (
+    *TRADE_KEY,
+    "action",
+    "quantity",
+    "price",
+    "notes",
+    "account_id",
+)
+
+DEFAULT_STRATEGY_ID = "default"
+
+
+def trade_to_row(trade: TradeEvent) -> dict[str, Any]:
+    """Map a trade event onto the paper trade column layout.
+
+    Args:
+        trade (TradeEvent): Validated trade event.
+
+    Returns:
+        dict[str, Any]: Row keyed by ``TRADE_COLUMNS``.
+
+    """
+    return {
+        "strategy_id": trade.get("strategy_id") or DEFAULT_STRATEGY_ID,
+        "symbol": trade["symbol"],
+        "timestamp": trade["timestamp"],
+        "action": trade["action"],
+        "quantity": float(trade["quantity"]),
+        "price": float(trade["price"]),
+        "notes": trade.get("notes"),
+        "account_id": config_shared.get_paper_trading_account_id() or None,
+    }
+
+
+def prepare_trades(trades: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Validate trades and map them to rows, keeping the last trade per key.
+
+    Args:
+        trades (list[dict[str, Any]]): Raw trade payloads.
+
+    Returns:
+        list[dict[str, Any]]: Unique rows in first-seen key order.
+
+    """
+    rows: dict[tuple[Any, ...], dict[str, Any]] = {}
+    invalid = 0
+    for trade in trades:
+        if not is_valid_trade_event(trade):
+            invalid += 1
+            continue
+        row = trade_to_row(cast(TradeEvent, trade))
+        rows[tuple(row[c] for c in TRADE_KEY)] = row
+    if invalid:
+        logger.warning("⚠️ Skipped %d invalid paper trade(s)", invalid)
+    return list(rows.values())
+
+
+@lru_cache
+def trade_table(name: str) -> sqlalchemy.Table:
+    """Return a table definition for the paper trade columns.
+
+    Args:
+        name (str): Table name, optionally schema-qualified ('schema.table').
+
+    Returns:
+        Table: Table with ``TRADE_COLUMNS`` and a unique key on ``TRADE_KEY``.
+
+    """
+    schema, _, table_name = name.rpartition(".")
+    return sqlalchemy.Table(
+        table_name,
+        sqlalchemy.MetaData(),
+        sqlalchemy.Column("strategy_id", sqlalchemy.String(64), nullable=False),
+        sqlalchemy.Column("symbol", sqlalchemy.String(32), nullable=False),
+        sqlalchemy.Column("timestamp", sqlalchemy.String(40), nullable=False),
+        sqlalchemy.Column("action", sqlalchemy.String(4), nullable=False),
+        sqlalchemy.Column("quantity", sqlalchemy.Float, nullable=False),
+        sqlalchemy.Column("price", sqlalchemy.Float, nullable=False),
+        sqlalchemy.Column("notes", sqlalchemy.Text),
+        sqlalchemy.Column("account_id", sqlalchemy.String(64)),
+        sqlalchemy.UniqueConstraint(*TRADE_KEY, name=f"uq_{table_name}_trade"),
+        schema=schema or None,
+    )
+
+
+def upsert_statement(table: sqlalchemy.Table, dialect: str) -> Any:
+    """Build an idempotent insert for the dialect.
+
+    Args:
+        table (Table): Paper trade table.
+        dialect (str): SQLAlchemy dialect name.
+
+    Returns:
+        Any: Insert statement that updates rows whose key already exists.
+
+    """
+    updated = [c for c in TRADE_COLUMNS if c not in TRADE_KEY]
+    statement = insert_or_update(table, TRADE_KEY, updated, dialect)
+    if statement is None:
+        logger.warning("⚠️ No upsert support for %s; paper trades use plain inserts", dialect)
+        return sqlalchemy.insert(table)
+    return statement
+
+
+def upsert_trades(
+    trades: list[dict[str, Any]],
+    url: str | None = None,
+    table: str | None = None,
+    chunk_size: int | None = None,
+) -> int:
+    """Validate and upsert paper trades in one transaction.
+
+    Args:
+        trades (list[dict[str, Any]]): Raw trade payloads.
+        url (Optional[str]): Database URL; defaults to PAPER_TRADING_DATABASE_URL.
+        table (Optional[str]): Target table; defaults to PAPER_TRADING_TABLE.
+        chunk_size (Optional[int]): Rows per statement; defaults to
+            DATABASE_INSERT_CHUNK_SIZE.
+
+    Returns:
+        int: Number of rows written.
+
+    """
+    rows = prepare_trades(trades)
+    if not rows:
+        return 0
+    engine = get_engine(url or config_shared.get_paper_trading_database_url())
+    target = trade_table(table or config_shared.get_paper_trading_table())
+    statement = upsert_statement(target, engine.dialect.name)
+    size = chunk_size or config_shared.get_database_insert_chunk_size()
+
+    with engine.begin() as conn:
+        for chunk in chunked(rows, size):
+            conn.execute(statement, chunk)
+
+    logger.debug("🪙 Upserted %d paper trade(s) into %s", len(rows), target.fullname)
+    return len(rows)
+
+
+__all__ = [
+    "TRADE_COLUMNS",
+    "TRADE_KEY",
+    "prepare_trades",
+    "trade_table",
+    "trade_to_row",
+    "upsert_statement",
+    "upsert_trades",
+]
@@ -0,0 +1,390 @@
+"""Columnar Parquet writer for the ``parquet`` output mode.
+
+Results are appended straight into per-column arrays (one buffer per candle
+date) and written as Parquet files with typed columns once a buffer reaches
+PARQUET_MAX_ROWS or PARQUET_MAX_SECONDS. Files are written either to S3 or
+to a local directory, laid out for partition pruning::
+
+    {prefix}dt=YYYY-MM-DD/part-{N}-{writer}.parquet
+
+Buffers that cannot be written are handed to an ``on_failure`` hook as
+encoded results, so the output handler can spool and replay them when
+SPOOL_ENABLED is set.
+
+pyarrow is an optional dependency (``pip install stock-tech-candlestick[parquet]``);
+the writer checks for it on construction, so a missing install surfaces
+before any results are buffered.
+"""
+
+import io
+import math
+import os
+import threading
+import time
+import uuid
+from array import array
+from collections.abc import Callable
+from datetime import UTC, datetime
+from typing import Any
+
+from app import config_shared
+from app.encoded_batch import EncodedBatch, encode_item
+from app.s3_writer import get_s3_client, parse_timestamp
+from app.utils.metrics import record_output_metrics
+from app.utils.setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+PARQUET_TARGETS = ("s3", "local")
+
+_STRING_COLUMNS = ("symbol", "pattern", "model", "model_version")
+_PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def _to_float(value: Any) -> float:
+    """Convert a price/volume value to float, using NaN when missing or invalid."""
+    try:
+        return float(value) if value is not None else float("nan")
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+class ColumnBuffer:
+    """Column-oriented buffer of analysis results.
+
+    Strings are kept in per-column lists, timestamps as epoch milliseconds and
+    OHLCV values in ``array('d')`` buffers (NaN marks a missing value), so no
+    row dictionaries are retained between writes.
+    """
+
+    def __init__(self, created: float) -> None:
+        """Initialize an empty buffer.
+
+        Args:
+            created (float): Clock value when the buffer was opened.
+
+        """
+        self.created = created
+        self.strings: dict[str, list[str | None]] = {c: [] for c in _STRING_COLUMNS}
+        self.timestamps: array[int] = array("q")
+        self.prices: dict[str, array[float]] = {c: array("d") for c in _PRICE_COLUMNS}
+
+    def __len__(self) -> int:
+        """Return the number of buffered rows."""
+        return len(self.timestamps)
+
+    def append(self, item: dict[str, Any], ts: datetime) -> None:
+        """Append one result to the column buffers.
+
+        Args:
+            item (dict[str, Any]): Analysis result.
+            ts (datetime): Parsed UTC candle timestamp.
+
+        """
+        for column in _STRING_COLUMNS:
+            value = item.get(column)
+            self.strings[column].append(None if value is None else str(value))
+        self.timestamps.append(int(ts.timestamp() * 1000))
+
+        raw = item.get("raw_data")
+        ohlc = raw.get("data") if isinstance(raw, dict) else None
+        ohlc = ohlc if isinstance(ohlc, dict) else {}
+        for column in _PRICE_COLUMNS:
+            self.prices[column].append(_to_float(ohlc.get(column)))
+
+    def to_items(self) -> list[dict[str, Any]]:
+        """Rebuild results holding the buffered columns.
+
+        Only the columns kept by the buffer survive, which is everything a
+        columnar writer needs to write the rows again.
+
+        Returns:
+            list[dict[str, Any]]: One result per buffered row.
+
+        """
+        items = []
+        for row, millis in enumerate(self.timestamps):
+            item: dict[str, Any] = {c: self.strings[c][row] for c in _STRING_COLUMNS}
+            item["timestamp"] = datetime.fromtimestamp(millis / 1000, tz=UTC).isoformat()
+            prices = {c: self.prices[c][row] for c in _PRICE_COLUMNS}
+            item["raw_data"] = {"data": {c: v for c, v in prices.items() if not math.isnan(v)}}
+            items.append(item)
+        return items
+
+    def to_table(self) -> Any:
+        """Build a typed ``pyarrow.Table`` from the buffered columns.
+
+        Returns:
+            pyarrow.Table: Table with dictionary-encoded strings, UTC millisecond
+            timestamps and float64 OHLCV columns.
+
+        """
+        pa = require_pyarrow()
+        columns: dict[str, Any] = {
+            "symbol": pa.array(self.strings["symbol"], type=pa.string()).dictionary_encode(),
+            "timestamp": pa.array(self.timestamps, type=pa.timestamp("ms", tz="UTC")),
+            "pattern": pa.array(self.strings["pattern"], type=pa.string()).dictionary_encode(),
+            "model": pa.array(self.strings["model"], type=pa.string()).dictionary_encode(),
+            "model_version": pa.array(
+                self.strings["model_version"], type=pa.string()
+            ).dictionary_encode(),
+        }
+        for column in _PRICE_COLUMNS:
+            columns[column] = pa.array(self.prices[column], type=pa.float64(), from_pandas=True)
+        return pa.table(columns)
+
+
+class ParquetWriter:
+    """Buffers results per candle date and writes Parquet files to S3 or disk."""
+
+    def __init__(
+        self,
+        target: str = "s3",
+        bucket: str = "",
+        prefix: str = "",
+        directory: str = "",
+        row_group_size: int = 50000,
+        max_rows: int = 250000,
+        max_age_seconds: float = 300.0,
+        compression: str = "zstd",
+        client_factory: Callable[[], Any] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        start_flusher: bool = True,
+        on_failure: Callable[[list[bytes]], None] | None = None,
+        on_outcome: Callable[[bool, float], None] | None = None,
+    ) -> None:
+        """Initialize the writer.
+
+        Args:
+            target (str): 's3' or 'local'.
+            bucket (str): Target S3 bucket when writing to S3.
+            prefix (str): Key prefix (S3) or sub-directory (local).
+            directory (str): Base directory when writing locally.
+            row_group_size (int): Maximum rows per Parquet row group.
+            max_rows (int): Buffered rows per date that trigger a write.
+            max_age_seconds (float): Buffer age that triggers a write.
+            compression (str): Parquet compression codec.
+            client_factory (Optional[Callable[[], Any]]): Builds the S3 client;
+                defaults to a boto3 client for S3_OUTPUT_REGION.
+            clock (Callable[[], float]): Monotonic time source.
+            start_flusher (bool): Start the background age-based flusher.
+            on_failure (Optional[Callable[[list[bytes]], None]]): Receives the
+                encoded results of a buffer that could not be written.
+            on_outcome (Optional[Callable[[bool, float], None]]): Told whether
+                each file write succeeded and how long it took, in seconds.
+
+        Raises:
+            ValueError: If the target is not supported.
+            ImportError: If pyarrow is not installed.
+
+        """
+        if target not in PARQUET_TARGETS:
+            raise ValueError(f"Unsupported parquet target: {target}")
+        require_pyarrow()
+        self.target = target
+        self.bucket = bucket
+        self.prefix = prefix if not prefix or prefix.endswith("/") else f"{prefix}/"
+        self.directory = directory
+        self.row_group_size = row_group_size
+        self.max_rows = max_rows
+        self.max_age_seconds = max_age_seconds
+        self.compression = compression
+        self.writer_id = uuid.uuid4().hex[:8]
+        self._client_factory = client_factory or get_s3_client
+        self._client: Any = None
+        self._clock = clock
+        self._buffers: dict[str, ColumnBuffer] = {}
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._start_flusher = start_flusher
+        self._flusher: threading.Thread | None = None
+        self._on_failure = on_failure
+        self._on_outcome = on_outcome
+
+    @classmethod
+    def from_config(
+        cls,
+        on_failure: Callable[[list[bytes]], None] | None = None,
+        on_outcome: Callable[[bool, float], None] | None = None,
+    ) -> "ParquetWriter":
+        """Build a writer from shared configuration.
+
+        Args:
+            on_failure (Optional[Callable[[list[bytes]], None]]): Failed write handler.
+            on_outcome (Optional[Callable[[bool, float], None]]): Write result handler.
+
+        Returns:
+            ParquetWriter: Configured writer.
+
+        """
+        return cls(
+            target=config_shared.get_parquet_output_target(),
+            bucket=config_shared.get_s3_output_bucket(),
+            prefix=config_shared.get_parquet_output_prefix(),
+            directory=config_shared.get_parquet_output_dir(),
+            row_group_size=config_shared.get_parquet_row_group_size(),
+            max_rows=config_shared.get_parquet_max_rows(),
+            max_age_seconds=config_shared.get_parquet_max_seconds(),
+            compression=config_shared.get_parquet_compression(),
+            on_failure=on_failure,
+            on_outcome=on_outcome,
+        )
+
+    @property
+    def client(self) -> Any:
+        """Return the S3 client, creating it on first use."""
+        if self._client is None:
+            self._client = self._client_factory()
+        return self._client
+
+    def add(self, batch: EncodedBatch) -> None:
+        """Append a batch to the column buffers and write any full buffer.
+
+        Args:
+            batch (EncodedBatch): Results to buffer.
+
+        """
+        self._ensure_flusher()
+        now = self._clock()
+        ready: list[tuple[str, ColumnBuffer]] = []
+        with self._lock:
+            for item in batch:
+                ts = parse_timestamp(item.get("timestamp")) or datetime.now(UTC)
+                day = f"{ts:%Y-%m-%d}"
+                buffer = self._buffers.get(day)
+                if buffer is None:
+                    buffer = self._buffers[day] = ColumnBuffer(now)
+                buffer.append(item, ts)
+                if len(buffer) >= self.max_rows:
+                    ready.append((day, self._buffers.pop(day)))
+        self._write_all(ready)
+
+    def flush(self, force: bool = True) -> None:
+        """Write buffered results.
+
+        Args:
+            force (bool): Write every buffer; otherwise only those past max age.
+
+        """
+        now = self._clock()
+        with self._lock:
+            days = [
+                day
+                for day, buffer in self._buffers.items()
+                if force or now - buffer.created >= self.max_age_seconds
+            ]
+            ready = [(day, self._buffers.pop(day)) for day in days]
+        self._write_all(ready)
+
+    def close(self) -> None:
+        """Stop the background flusher and write everything still buffered."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+        self.flush(force=True)
+
+    def _next_name(self, day: str) -> str:
+        """Return a unique relative path for a Parquet file."""
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+        return f"{self.prefix}dt={day}/part-{sequence:05d}-{self.writer_id}.parquet"
+
+    def _write_all(self, ready: list[tuple[str, ColumnBuffer]]) -> None:
+        """Write drained buffers outside the buffer lock."""
+        for day, buffer in ready:
+            self._write(day, buffer)
+
+    def _write(self, day: str, buffer: ColumnBuffer) -> None:
+        """Encode one buffer as Parquet and store it on the configured target."""
+        name = self._next_name(day)
+        start = time.perf_counter()
+        try:
+            table = buffer.to_table()
+            import pyarrow.parquet as pq
+
+            sink = io.BytesIO()
+            pq.write_table(
+                table,
+                sink,
+                row_group_size=self.row_group_size,
+                compression=self.compression,
+            )
+            body = sink.getvalue()
+
+            if self.target == "s3":
+                self.client.put_object(
+                    Bucket=self.bucket,
+                    Key=name,
+                    Body=body,
+                    ContentType="application/vnd.apache.parquet",
+                )
+                location = f"s3://{self.bucket}/{name}"
+            else:
+                location = os.path.join(self.directory, name)
+                os.makedirs(os.path.dirname(location), exist_ok=True)
+                tmp_path = f"{location}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(body)
+                os.replace(tmp_path, location)
+
+        except Exception:
+            logger.exception("❌ Parquet write failed for %s", name)
+            duration = time.perf_counter() - start
+            record_output_metrics("parquet", success=False, duration_sec=duration)
+            if self._on_outcome is not None:
+                self._on_outcome(False, duration)
+            if self._on_failure is not None:
+                self._on_failure([encode_item(item) for item in buffer.to_items()])
+            return
+        duration = time.perf_counter() - start
+        record_output_metrics("parquet", success=True, duration_sec=duration)
+        if self._on_outcome is not None:
+            self._on_outcome(True, duration)
+        logger.info(
+            "📦 Wrote %d result(s) to Parquet: %s (%d bytes)", len(buffer), location, len(body)
+        )
+
+    def _ensure_flusher(self) -> None:
+        """Start the background age-based flusher on first use."""
+        if not self._start_flusher or self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run_flusher, name="parquet-flusher", daemon=True
+                )
+                self._flusher.start()
+
+    def _run_flusher(self) -> None:
+        """Periodically write buffers that have exceeded their max age."""
+        interval = max(0.5, self.max_age_seconds / 4)
+        while not self._stop.wait(interval):
+            self.flush(force=False)
+
+
+def require_pyarrow(mode: str = "parquet") -> Any:
+    """Import pyarrow, raising a descriptive error when it is not installed.
+
+    Args:
+        mode (str): Output mode that needs pyarrow; names the install extra.
+
+    Returns:
+        Any: The ``pyarrow`` module.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+
+    """
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            f"pyarrow is required for the {mode} output mode; "
+            f"install stock-tech-candlestick[{mode}]"
+        ) from e
+    return pyarrow
+
+
+__all__ = ["ColumnBuffer", "ParquetWriter", "require_pyarrow"]
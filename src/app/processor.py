@@ -4,7 +4,9 @@ from app.utils.setup_logger import setup_logger
 
 logger = setup_logger(__name__)
 
-__all__ = ["analyze"]
+__all__ = ["NO_PATTERN", "analyze"]
+
+NO_PATTERN = "No clear pattern"
 
 
 def analyze(
@@ -246,7 +248,7 @@ def detect_candlestick_pattern(
             logger.info("Pattern Matched: Three Black Crows")
             return "Three Black Crows"
 
-    return "No clear pattern"
+    return NO_PATTERN
 
 
 def detect_three_black_crows(
@@ -0,0 +1,285 @@
+"""Server-Sent Events push of detections to subscribed clients.
+
+With PUSH_ENABLED, every dispatched batch is also published to a hub of
+subscribers connected to the health server's ``/stream`` endpoint. Clients
+subscribe with optional ``symbols`` and ``patterns`` filters and receive
+batched ``detections`` events, each holding a JSON array of the results
+produced since their previous frame (up to PUSH_MAX_FRAME_ITEMS).
+
+Every subscriber has a bounded buffer (PUSH_CLIENT_BUFFER results). When a
+slow client falls behind, PUSH_DROP_POLICY decides what happens:
+'oldest' discards the oldest buffered results, 'newest' discards incoming
+ones, and 'disconnect' closes the stream so the client can reconnect and
+resynchronize (e.g. from ``/latest``). Publishing never blocks on clients.
+"""
+
+import threading
+from collections import deque
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any
+from urllib.parse import parse_qs
+
+from app import config_shared
+from app.encoded_batch import EncodedBatch
+from app.utils.metrics import record_push_dropped, record_push_subscribers
+from app.utils.setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DROP_POLICIES = ("oldest", "newest", "disconnect")
+
+
+class Subscriber:
+    """One connected client with its filters and bounded buffer."""
+
+    def __init__(
+        self,
+        symbols: set[str] | None = None,
+        patterns: set[str] | None = None,
+        max_buffer: int = 1000,
+        drop_policy: str = "oldest",
+    ) -> None:
+        """Initialize a subscriber.
+
+        Args:
+            symbols (Optional[set[str]]): Symbols to receive; all if None.
+            patterns (Optional[set[str]]): Patterns to receive; all if None.
+            max_buffer (int): Maximum buffered results.
+            drop_policy (str): 'oldest', 'newest' or 'disconnect' on overflow.
+
+        """
+        self.symbols = symbols
+        self.patterns = patterns
+        self.max_buffer = max(1, max_buffer)
+        self.drop_policy = drop_policy if drop_policy in DROP_POLICIES else "oldest"
+        self.dropped = 0
+        self.closed = False
+        self._buffer: deque[bytes] = deque()
+        self._cond = threading.Condition()
+
+    def matches(self, item: dict[str, Any]) -> bool:
+        """Check whether a result passes the subscriber's filters."""
+        if self.symbols is not None and item.get("symbol") not in self.symbols:
+            return False
+        return self.patterns is None or item.get("pattern") in self.patterns
+
+    def offer(self, lines: list[bytes]) -> int:
+        """Buffer results for the client without blocking.
+
+        Args:
+            lines (list[bytes]): Encoded results that matched the filters.
+
+        Returns:
+            int: Number of results dropped by the overflow policy.
+
+        """
+        with self._cond:
+            if self.closed:
+                return 0
+            overflow = len(self._buffer) + len(lines) - self.max_buffer
+            dropped = 0
+            if overflow > 0:
+                if self.drop_policy == "disconnect":
+                    dropped = len(self._buffer) + len(lines)
+                    self._buffer.clear()
+                    self.closed = True
+                    lines = []
+                elif self.drop_policy == "newest":
+                    dropped = min(overflow, len(lines))
+                    lines = lines[: len(lines) - dropped]
+                else:
+                    dropped = overflow
+                    if len(lines) >= self.max_buffer:
+                        self._buffer.clear()
+                        lines = lines[len(lines) - self.max_buffer :]
+                    else:
+                        for _ in range(overflow):
+                            self._buffer.popleft()
+            self._buffer.extend(lines)
+            self.dropped += dropped
+            self._cond.notify()
+        return dropped
+
+    def take(self, max_items: int, timeout: float) -> list[bytes]:
+        """Wait for buffered results and return up to ``max_items`` of them.
+
+        Args:
+            max_items (int): Maximum results in one frame.
+            timeout (float): Seconds to wait for the first result.
+
+        Returns:
+            list[bytes]: Buffered results, oldest first (empty on timeout or close).
+
+        """
+        with self._cond:
+            if not self._buffer and not self.closed:
+                self._cond.wait(timeout)
+            count = min(max_items, len(self._buffer))
+            return [self._buffer.popleft() for _ in range(count)]
+
+    def close(self) -> None:
+        """Mark the subscriber closed and wake its writer."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+
+class PushHub:
+    """Fans published batches out to subscribers."""
+
+    def __init__(
+        self, max_subscribers: int = 100, max_buffer: int = 1000, drop_policy: str = "oldest"
+    ) -> None:
+        """Initialize the hub.
+
+        Args:
+            max_subscribers (int): Maximum concurrent subscribers.
+            max_buffer (int): Per-subscriber buffer size in results.
+            drop_policy (str): Overflow policy for new subscribers.
+
+        """
+        self.max_subscribers = max_subscribers
+        self.max_buffer = max_buffer
+        self.drop_policy = drop_policy
+        self._subscribers: list[Subscriber] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "PushHub":
+        """Build a hub from shared configuration.
+
+        Returns:
+            PushHub: Configured hub.
+
+        """
+        return cls(
+            max_subscribers=config_shared.get_push_max_subscribers(),
+            max_buffer=config_shared.get_push_client_buffer(),
+            drop_policy=config_shared.get_push_drop_policy(),
+        )
+
+    @property
+    def subscriber_count(self) -> int:
+        """Return the number of connected subscribers."""
+        return len(self._subscribers)
+
+    def subscribe(
+        self, symbols: set[str] | None = None, patterns: set[str] | None = None
+    ) -> Subscriber | None:
+        """Register a subscriber.
+
+        Args:
+            symbols (Optional[set[str]]): Symbol filter.
+            patterns (Optional[set[str]]): Pattern filter.
+
+        Returns:
+            Optional[Subscriber]: The subscriber, or None if the hub is full.
+
+        """
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscriber = Subscriber(symbols, patterns, self.max_buffer, self.drop_policy)
+            self._subscribers.append(subscriber)
+            count = len(self._subscribers)
+        record_push_subscribers(count)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """Remove a subscriber.
+
+        Args:
+            subscriber (Subscriber): Subscriber to remove.
+
+        """
+        subscriber.close()
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+            count = len(self._subscribers)
+        record_push_subscribers(count)
+
+    def publish(self, batch: EncodedBatch) -> None:
+        """Deliver a batch to every subscriber whose filters match.
+
+        Args:
+            batch (EncodedBatch): Results and their encoded bytes.
+
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            lines = [
+                line
+                for item, line in zip(batch.items, batch.item_bytes)
+                if subscriber.matches(item)
+            ]
+            if not lines:
+                continue
+            dropped = subscriber.offer(lines)
+            if dropped:
+                record_push_dropped(subscriber.drop_policy, dropped)
+            if subscriber.closed:
+                logger.warning("📴 Disconnecting slow push subscriber (%d dropped)", dropped)
+                self.unsubscribe(subscriber)
+
+
+@lru_cache
+def get_hub() -> PushHub:
+    """Return the process-wide push hub.
+
+    Returns:
+        PushHub: Shared hub.
+
+    """
+    return PushHub.from_config()
+
+
+def _split(values: list[str]) -> set[str] | None:
+    """Parse repeatable, comma-separated filter values."""
+    parsed = {v.strip() for value in values for v in value.split(",") if v.strip()}
+    return parsed or None
+
+
+def serve_stream(
+    query_string: str,
+    send_headers: Callable[[int], None],
+    write: Callable[[bytes], None],
+    hub: PushHub | None = None,
+) -> None:
+    """Stream detections to one client as Server-Sent Events until it disconnects.
+
+    Args:
+        query_string (str): Raw URL query string with ``symbols``/``patterns`` filters.
+        send_headers (Callable[[int], None]): Sends the response status and SSE headers.
+        write (Callable[[bytes], None]): Writes and flushes bytes to the client.
+        hub (Optional[PushHub]): Hub to subscribe to; defaults to the shared hub.
+
+    """
+    params = parse_qs(query_string)
+    hub = hub or get_hub()
+    subscriber = hub.subscribe(
+        _split(params.get("symbols", [])), _split(params.get("patterns", []))
+    )
+    if subscriber is None:
+        send_headers(503)
+        return
+    max_items = config_shared.get_push_max_frame_items()
+    keepalive = config_shared.get_push_keepalive_seconds()
+    try:
+        send_headers(200)
+        write(b": connected\n\n")
+        while not subscriber.closed:
+            lines = subscriber.take(max_items, keepalive)
+            if lines:
+                write(b"event: detections\ndata: [" + b",".join(lines) + b"]\n\n")
+            else:
+                write(b": keepalive\n\n")
+    except (BrokenPipeError, ConnectionResetError, OSError):
+        logger.debug("📴 Push subscriber disconnected")
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+__all__ = ["DROP_POLICIES", "PushHub", "Subscriber", "get_hub", "serve_stream"]
@@ -3,6 +3,15 @@
 This module supports consuming messages from either RabbitMQ or Amazon SQS.
 It provides batching, retry logic, graceful shutdown handling, and clean logging
 with optional redaction of sensitive values.
+
+A callback may return a ``concurrent.futures.Future`` to defer acknowledgement:
+the messages are then acked (RabbitMQ) or deleted (SQS) only once the future
+succeeds, e.g. after a write-behind database commit. If it fails, a RabbitMQ
+message is requeued once and then rejected without requeueing (dead-lettered
+when the queue has a dead-letter exchange); SQS messages are left for
+redelivery. With write-behind enabled, the RabbitMQ prefetch window covers a
+full write-behind transaction so the broker never holds back rows the writer
+is waiting for.
 """
 
 import json
@@ -10,6 +19,9 @@ import signal
 import threading
 import time
 from collections.abc import Callable
+from concurrent.futures import Future
+from functools import partial
+from typing import Any
 
 import boto3
 import pika
@@ -23,6 +35,12 @@ from app.utils.setup_logger import setup_logger
 logger = setup_logger(__name__)
 shutdown_event = threading.Event()
 
+# AMQP encodes prefetch-count as an unsigned short.
+_MAX_PREFETCH = 65535
+
+# Processes a batch of messages; may return a future that gates acknowledgement.
+BatchCallback = Callable[[list[dict[str, Any]]], "Future[Any] | None"]
+
 REDACT_SENSITIVE_LOGS = (
     config.get_config_value_cached("REDACT_SENSITIVE_LOGS", "true").lower() == "true"
 )
@@ -41,14 +59,15 @@ def safe_log(msg: str) -> str:
     return f"{msg}: [REDACTED]" if REDACT_SENSITIVE_LOGS else msg
 
 
-def consume_messages(callback: Callable[[list[dict]], None]) -> None:
+def consume_messages(callback: BatchCallback) -> None:
     """Start the message consumer using the configured QUEUE_TYPE.
 
     This method determines whether to use RabbitMQ or SQS and invokes the
     appropriate listener. It also registers signal handlers for graceful shutdown.
 
     Args:
-        callback (Callable[[list[dict]], None]): Processing function for a batch of messages.
+        callback (Callable[[list[dict]], Optional[Future]]): Processing function for a
+            batch of messages; may return a future that gates acknowledgement.
 
     Raises:
         ValueError: If QUEUE_TYPE is not supported.
@@ -79,11 +98,12 @@ def _graceful_shutdown(signum, frame) -> None:
 
 
 @retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=2, max=10))
-def _start_rabbitmq_listener(callback: Callable[[list[dict]], None]) -> None:
+def _start_rabbitmq_listener(callback: BatchCallback) -> None:
     """Connect to RabbitMQ and start consuming messages from the configured queue.
 
     Args:
-        callback (Callable[[list[dict]], None]): Handler function for batches of messages.
+        callback (Callable[[list[dict]], Optional[Future]]): Handler function for batches
+            of messages.
 
     """
     connection = pika.BlockingConnection(
@@ -99,6 +119,14 @@ def _start_rabbitmq_listener(callback: Callable[[list[dict]], None]) -> None:
     channel = connection.channel()
     queue_name = config.get_rabbitmq_queue()
     channel.queue_declare(queue=queue_name, durable=True)
+    deferred: set[int] = set()
+
+    def settle(
+        ch: BlockingChannel, delivery_tag: int, redelivered: bool, future: Future[Any]
+    ) -> None:
+        """Settle a deferred message on the connection thread."""
+        deferred.discard(delivery_tag)
+        _settle_rabbitmq_message(ch, delivery_tag, redelivered, future)
 
     def on_message(ch: BlockingChannel, method, properties, body: bytes) -> None:
         """Callback invoked for each incoming RabbitMQ message.
@@ -116,7 +144,18 @@ def _start_rabbitmq_listener(callback: Callable[[list[dict]], None]) -> None:
 
         try:
             message = json.loads(body)
-            callback([message])
+            result = callback([message])
+            if isinstance(result, Future):
+                tag, redelivered = method.delivery_tag, bool(method.redelivered)
+                deferred.add(tag)
+
+                def on_done(future: Future[Any]) -> None:
+                    connection.add_callback_threadsafe(
+                        partial(settle, ch, tag, redelivered, future)
+                    )
+
+                result.add_done_callback(on_done)
+                return
             ch.basic_ack(delivery_tag=method.delivery_tag)
             logger.debug("✅ RabbitMQ message processed and acknowledged.")
         except Exception:
@@ -126,22 +165,74 @@ def _start_rabbitmq_listener(callback: Callable[[list[dict]], None]) -> None:
     logger.info(safe_log("🚀 Consuming RabbitMQ messages from queue"))
 
     try:
-        channel.basic_qos(prefetch_count=config.get_batch_size())
+        channel.basic_qos(prefetch_count=_prefetch_count())
         channel.basic_consume(queue=queue_name, on_message_callback=on_message, auto_ack=False)
 
         while not shutdown_event.is_set():
             connection.process_data_events(time_limit=1)
+
+        # Give deferred acks a chance to settle; anything left is redelivered.
+        deadline = time.monotonic() + 10
+        while deferred and time.monotonic() < deadline:
+            connection.process_data_events(time_limit=0.5)
     finally:
         connection.close()
         logger.info("🛑 RabbitMQ listener stopped.")
 
 
+def _prefetch_count() -> int:
+    """Return the number of unacknowledged RabbitMQ messages the broker may send.
+
+    Write-behind messages stay unacknowledged until their rows commit, so the
+    window must hold a full write-behind transaction per writer thread;
+    otherwise each commit waits out DB_WRITE_BEHIND_MAX_SECONDS for rows the
+    broker is holding back.
+
+    Returns:
+        int: Prefetch count for ``basic_qos``.
+
+    """
+    prefetch: int = config.get_batch_size()
+    if config.get_db_write_behind_enabled():
+        window = config.get_db_write_behind_max_rows() * config.get_db_write_behind_threads()
+        prefetch = max(prefetch, window)
+    return min(prefetch, _MAX_PREFETCH)
+
+
+def _settle_rabbitmq_message(
+    ch: BlockingChannel, delivery_tag: int, redelivered: bool, future: Future[Any]
+) -> None:
+    """Ack a deferred RabbitMQ message, or requeue it once if its write failed.
+
+    A message that fails again after redelivery is rejected without requeueing,
+    like a message that cannot be processed, so a permanently failing write
+    does not cycle through the queue forever.
+
+    Args:
+        ch (BlockingChannel): Channel the message was delivered on.
+        delivery_tag (int): Delivery tag of the message.
+        redelivered (bool): Whether the broker had delivered the message before.
+        future (Future[Any]): Deferred write result.
+
+    """
+    if future.exception() is None:
+        ch.basic_ack(delivery_tag=delivery_tag)
+        logger.debug("✅ RabbitMQ message committed and acknowledged.")
+    elif redelivered:
+        logger.error("❌ Deferred RabbitMQ write failed again; rejecting (details redacted)")
+        ch.basic_nack(delivery_tag=delivery_tag, requeue=False)
+    else:
+        logger.error("❌ Deferred RabbitMQ write failed; requeueing (details redacted)")
+        ch.basic_nack(delivery_tag=delivery_tag, requeue=True)
+
+
 @retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=2, max=10))
-def _start_sqs_listener(callback: Callable[[list[dict]], None]) -> None:
+def _start_sqs_listener(callback: BatchCallback) -> None:
     """Connect to AWS SQS and start polling messages.
 
     Args:
-        callback (Callable[[list[dict]], None]): Handler function for a batch of messages.
+        callback (Callable[[list[dict]], Optional[Future]]): Handler function for a batch
+            of messages.
 
     """
     sqs = boto3.client("sqs", region_name=config.get_sqs_region())
@@ -172,13 +263,54 @@ def _start_sqs_listener(callback: Callable[[list[dict]], None]) -> None:
                     logger.warning("⚠️ Failed to parse SQS message body (redacted)")
 
             if payloads:
-                callback(payloads)
-                for handle in receipt_handles:
-                    sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=handle)
-                logger.debug("✅ SQS: Processed and deleted %d message(s)", len(payloads))
+                result = callback(payloads)
+                if isinstance(result, Future):
+                    result.add_done_callback(
+                        partial(_settle_sqs_messages, sqs, queue_url, receipt_handles)
+                    )
+                else:
+                    _delete_sqs_messages(sqs, queue_url, receipt_handles)
 
         except (BotoCoreError, NoCredentialsError):
             logger.error("❌ SQS error encountered (details redacted)")
             time.sleep(5)
 
     logger.info("🛑 SQS polling stopped.")
+
+
+def _delete_sqs_messages(sqs: Any, queue_url: str, receipt_handles: list[str]) -> None:
+    """Delete processed SQS messages.
+
+    Args:
+        sqs: Boto3 SQS client.
+        queue_url (str): Queue URL.
+        receipt_handles (list[str]): Receipt handles of the processed messages.
+
+    """
+    for handle in receipt_handles:
+        sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=handle)
+    logger.debug("✅ SQS: Processed and deleted %d message(s)", len(receipt_handles))
+
+
+def _settle_sqs_messages(
+    sqs: Any, queue_url: str, receipt_handles: list[str], future: Future[Any]
+) -> None:
+    """Delete SQS messages once their deferred write has succeeded.
+
+    On failure the messages are left in the queue and become visible again
+    after the visibility timeout.
+
+    Args:
+        sqs: Boto3 SQS client.
+        queue_url (str): Queue URL.
+        receipt_handles (list[str]): Receipt handles of the messages.
+        future (Future[Any]): Deferred write result.
+
+    """
+    if future.exception() is not None:
+        logger.error("❌ Deferred SQS write failed; messages left for redelivery")
+        return
+    try:
+        _delete_sqs_messages(sqs, queue_url, receipt_handles)
+    except (BotoCoreError, NoCredentialsError):
+        logger.error("❌ SQS delete failed after deferred write (details redacted)")
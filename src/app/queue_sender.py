@@ -2,26 +2,42 @@
 
 Handles publishing of processed data to the appropriate messaging queue,
 with retry logic, structured logging, redaction, and Prometheus metrics.
+
+A batch is published in rounds: each round sends every still-pending
+message over a single connection, records a per-message outcome, and only
+the failed messages are retried in the next round. All rounds share one
+overall deadline so a struggling broker cannot stall the consumer.
 """
 
 import json
 import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Any
 
 import boto3
 import pika
-from botocore.exceptions import BotoCoreError, NoCredentialsError
-from pika.exceptions import AMQPConnectionError
-from tenacity import retry, stop_after_attempt, wait_exponential
+from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
+from pika.exceptions import AMQPConnectionError, AMQPError
 
 from app import config_shared
+from app.encoded_batch import encode_item
+from app.routing import resolve_routing_key
 from app.utils.metrics import queue_publish_counter, queue_publish_latency
-from app.utils.safe_logger import safe_error, safe_info
+from app.utils.safe_logger import safe_error, safe_info, safe_warning
 
 REDACT_SENSITIVE_LOGS: bool = (
     config_shared.get_config_value_cached("REDACT_SENSITIVE_LOGS", "true").lower() == "true"
 )
 
+# Exchanges declared by this process (see RABBITMQ_DECLARE_EXCHANGE)
+_declared_exchanges: set[str] = set()
+
+# SQS SendMessageBatch limits
+SQS_BATCH_MAX_ENTRIES = 10
+SQS_BATCH_MAX_BYTES = 256 * 1024
+
 
 class SQSMessageSendError(Exception):
     """Raised when SQS returns a non-200 HTTP status."""
@@ -29,6 +45,30 @@ class SQSMessageSendError(Exception):
     pass
 
 
+@dataclass
+class PublishResult:
+    """Per-message outcome of publishing a batch.
+
+    Attributes:
+        total (int): Number of messages in the batch.
+        succeeded (list[int]): Indexes of messages that were published.
+        failed (dict[int, str]): Indexes of messages that could not be published,
+            mapped to the last error seen for each.
+        attempts (int): Number of publish rounds performed.
+
+    """
+
+    total: int = 0
+    succeeded: list[int] = field(default_factory=list)
+    failed: dict[int, str] = field(default_factory=dict)
+    attempts: int = 0
+
+    @property
+    def ok(self) -> bool:
+        """Return True if every message in the batch was published."""
+        return not self.failed
+
+
 def safe_log_message(data: dict[str, Any]) -> str:
     """Return redacted or full version of a message for logging.
 
@@ -46,52 +86,133 @@ def publish_to_queue(
     payload: list[dict[str, Any]],
     queue: str | None = None,
     exchange: str | None = None,
-) -> None:
+    bodies: list[bytes] | None = None,
+) -> PublishResult:
     """Publish a batch of processed messages to the configured queue.
 
+    Failed messages are retried in rounds with exponential backoff until they
+    succeed, ``QUEUE_PUBLISH_MAX_ATTEMPTS`` is reached, or the batch deadline
+    ``QUEUE_PUBLISH_DEADLINE_SECONDS`` would be exceeded. Messages that were
+    already published are never sent again.
+
     Args:
         payload (list[dict[str, Any]]): List of messages to send.
         queue (Optional[str]): Optional override for queue name or routing key.
         exchange (Optional[str]): Optional override for RabbitMQ exchange.
+        bodies (Optional[list[bytes]]): Pre-encoded message bodies aligned with
+            ``payload``; when omitted each message is serialized here.
+
+    Returns:
+        PublishResult: Per-message outcome for the batch.
 
     """
     if not isinstance(payload, list):
         safe_error("Invalid payload type", {"expected": "list", "got": str(type(payload).__name__)})
-        return
+        return PublishResult()
+
+    result = PublishResult(total=len(payload))
+    if not payload:
+        return result
 
     queue_type: str = config_shared.get_queue_type().lower()
+    sender: Callable[..., dict[int, str]]
+    if queue_type == "rabbitmq":
+        sender = _send_batch_to_rabbitmq
+    elif queue_type == "sqs":
+        sender = _send_batch_to_sqs
+    else:
+        safe_error(
+            "Invalid QUEUE_TYPE",
+            {"queue_type": "[REDACTED]" if REDACT_SENSITIVE_LOGS else queue_type},
+        )
+        result.failed = {i: "invalid queue type" for i in range(len(payload))}
+        return result
 
-    for message in payload:
-        if queue_type == "rabbitmq":
-            _send_to_rabbitmq(message, queue, exchange)
-        elif queue_type == "sqs":
-            _send_to_sqs(message, queue)
-        else:
+    if bodies is None or len(bodies) != len(payload):
+        if bodies is not None:
             safe_error(
-                "Invalid QUEUE_TYPE",
-                {"queue_type": "[REDACTED]" if REDACT_SENSITIVE_LOGS else queue_type},
+                "Pre-encoded bodies do not match payload",
+                {"payload": len(payload), "bodies": len(bodies)},
             )
+        bodies = [encode_item(message) for message in payload]
+
+    max_attempts = config_shared.get_queue_publish_max_attempts()
+    backoff_min, backoff_max = config_shared.get_queue_publish_backoff_seconds()
+    deadline = time.monotonic() + config_shared.get_queue_publish_deadline_seconds()
+
+    pending = list(range(len(payload)))
+    errors: dict[int, str] = {}
+    while pending:
+        result.attempts += 1
+        errors = sender(payload, bodies, pending, queue, exchange, deadline=deadline)
+        result.succeeded.extend(i for i in pending if i not in errors)
+        pending = [i for i in pending if i in errors]
+        if not pending or result.attempts >= max_attempts:
+            break
+
+        delay = min(backoff_max, backoff_min * 2 ** (result.attempts - 1))
+        if time.monotonic() + delay >= deadline:
+            break
+        safe_warning(
+            "Retrying failed queue publishes",
+            {"pending": len(pending), "attempt": result.attempts, "delay": delay},
+        )
+        time.sleep(delay)
+
+    result.succeeded.sort()
+    result.failed = {i: errors[i] for i in pending}
+    if result.failed:
+        safe_error(
+            "Queue publish incomplete",
+            {"failed": len(result.failed), "total": result.total, "attempts": result.attempts},
+        )
+    return result
+
 
+def _record_publish(queue_type: str, status: str, duration: float, count: int = 1) -> None:
+    """Record publish counters and latency for ``count`` messages."""
+    queue_publish_counter.labels(queue_type=queue_type, status=status).inc(count)
+    queue_publish_latency.labels(queue_type=queue_type, status=status).observe(duration)
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(min=2, max=10))
-def _send_to_rabbitmq(
-    data: dict[str, Any],
+
+def _deadline_passed(deadline: float | None) -> bool:
+    """Return True once the monotonic ``deadline`` has been reached."""
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def _send_batch_to_rabbitmq(
+    payload: list[dict[str, Any]],
+    bodies: list[bytes],
+    indexes: list[int],
     routing_key: str | None = None,
     exchange: str | None = None,
-) -> None:
-    """Send a single message to RabbitMQ.
+    deadline: float | None = None,
+) -> dict[int, str]:
+    """Publish the selected messages to RabbitMQ over a single connection.
+
+    With publisher confirms enabled, a message only counts as published once
+    the broker has confirmed it. Messages not yet sent when the deadline
+    passes are reported as failed without being published.
 
     Args:
-        data (dict[str, Any]): The message payload.
-        routing_key (Optional[str]): Optional routing key override.
+        payload (list[dict[str, Any]]): Full batch of message payloads.
+        bodies (list[bytes]): Encoded bodies aligned with ``payload``.
+        indexes (list[int]): Indexes of the messages to publish in this round.
+        routing_key (Optional[str]): Optional routing key override. When omitted, the
+            key is derived from RABBITMQ_ROUTING_KEY_TEMPLATE if configured.
         exchange (Optional[str]): Optional exchange override.
+        deadline (Optional[float]): ``time.monotonic()`` value after which no
+            further message is published.
 
-    Raises:
-        AMQPConnectionError: On RabbitMQ connection failure.
-        Exception: On publish failure.
+    Returns:
+        dict[int, str]: Errors keyed by message index; empty if all succeeded.
 
     """
+    errors: dict[int, str] = {}
+    attempted: set[int] = set()
+    expired = False
     start: float = time.perf_counter()
+    resolved_exchange: str = exchange or config_shared.get_rabbitmq_exchange()
     try:
         credentials = pika.PlainCredentials(
             config_shared.get_rabbitmq_user(),
@@ -107,108 +228,185 @@ def _send_to_rabbitmq(
 
         with pika.BlockingConnection(parameters) as connection:
             channel = connection.channel()
-            resolved_exchange: str = exchange or config_shared.get_rabbitmq_exchange()
-            resolved_routing_key: str = routing_key or config_shared.get_rabbitmq_routing_key()
-            channel.basic_publish(
-                exchange=resolved_exchange,
-                routing_key=resolved_routing_key,
-                body=json.dumps(data, ensure_ascii=False),
-            )
-
-        duration: float = time.perf_counter() - start
-        queue_publish_counter.labels(queue_type="rabbitmq", status="success").inc()
-        queue_publish_latency.labels(queue_type="rabbitmq", status="success").observe(duration)
-        safe_info(
-            "Published message to RabbitMQ",
-            {
-                "exchange": resolved_exchange,
-                "routing_key": resolved_routing_key,
-                "duration": duration,
-                "message": data,
-            },
-        )
+            if config_shared.get_rabbitmq_publish_confirms():
+                channel.confirm_delivery()
+            if (
+                resolved_exchange
+                and resolved_exchange not in _declared_exchanges
+                and config_shared.get_rabbitmq_declare_exchange()
+            ):
+                channel.exchange_declare(
+                    exchange=resolved_exchange,
+                    exchange_type=config_shared.get_rabbitmq_exchange_type(),
+                    durable=True,
+                )
+                _declared_exchanges.add(resolved_exchange)
+
+            for index in indexes:
+                if _deadline_passed(deadline):
+                    expired = True
+                    break
+                attempted.add(index)
+                message_start = time.perf_counter()
+                try:
+                    channel.basic_publish(
+                        exchange=resolved_exchange,
+                        routing_key=resolve_routing_key(payload[index], routing_key),
+                        body=bodies[index],
+                    )
+                    _record_publish("rabbitmq", "success", time.perf_counter() - message_start)
+                except AMQPError as e:
+                    errors[index] = str(e) or type(e).__name__
+                    _record_publish("rabbitmq", "exception", time.perf_counter() - message_start)
+                    if not channel.is_open:
+                        break
+
+        for index in indexes:
+            if index not in attempted:
+                errors[index] = (
+                    "publish deadline exceeded" if expired else "channel closed before publish"
+                )
 
     except AMQPConnectionError as e:
         duration = time.perf_counter() - start
-        queue_publish_counter.labels(queue_type="rabbitmq", status="failure").inc()
-        queue_publish_latency.labels(queue_type="rabbitmq", status="failure").observe(duration)
+        published = attempted - errors.keys()
+        _record_publish("rabbitmq", "failure", duration, count=len(indexes) - len(published))
         safe_error("RabbitMQ publish connection error", {"error": str(e), "duration": duration})
-        raise
-    except Exception as e:
+        return {
+            index: errors.get(index, str(e) or "connection error")
+            for index in indexes
+            if index not in published
+        }
+    except AMQPError as e:
         duration = time.perf_counter() - start
-        queue_publish_counter.labels(queue_type="rabbitmq", status="exception").inc()
-        queue_publish_latency.labels(queue_type="rabbitmq", status="exception").observe(duration)
-        safe_error(
-            "Unhandled error during RabbitMQ publish", {"error": str(e), "duration": duration}
-        )
-        raise
-
-
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(min=2, max=10))
-def _send_to_sqs(
-    data: dict[str, Any],
+        published = attempted - errors.keys()
+        _record_publish("rabbitmq", "exception", duration, count=len(indexes) - len(published))
+        safe_error("RabbitMQ publish error", {"error": str(e), "duration": duration})
+        return {
+            index: errors.get(index, str(e) or type(e).__name__)
+            for index in indexes
+            if index not in published
+        }
+
+    safe_info(
+        "Published messages to RabbitMQ",
+        {
+            "exchange": resolved_exchange,
+            "published": len(indexes) - len(errors),
+            "failed": len(errors),
+            "duration": time.perf_counter() - start,
+        },
+    )
+    return errors
+
+
+@lru_cache
+def _get_sqs_client(region: str) -> Any:
+    """Return a cached SQS client for the given region."""
+    return boto3.client("sqs", region_name=region)
+
+
+def _send_batch_to_sqs(
+    payload: list[dict[str, Any]],
+    bodies: list[bytes],
+    indexes: list[int],
     queue_name: str | None = None,
-) -> None:
-    """Send a single message to AWS SQS.
+    exchange: str | None = None,
+    deadline: float | None = None,
+) -> dict[int, str]:
+    """Publish the selected messages to AWS SQS using SendMessageBatch.
+
+    Messages are grouped into requests of at most 10 entries and 256 KiB. SQS
+    reports success per entry, so only the failed entries are returned.
+    Requests not yet sent when the deadline passes are reported as failed.
 
     Args:
-        data (dict[str, Any]): The message payload.
+        payload (list[dict[str, Any]]): Full batch of message payloads.
+        bodies (list[bytes]): Encoded bodies aligned with ``payload``.
+        indexes (list[int]): Indexes of the messages to publish in this round.
         queue_name (Optional[str]): Optional override for SQS queue URL.
+        exchange (Optional[str]): Unused; accepted for a uniform sender signature.
+        deadline (Optional[float]): ``time.monotonic()`` value after which no
+            further request is sent.
 
-    Raises:
-        BotoCoreError: On SQS client error.
-        NoCredentialsError: If AWS credentials are not available.
-        SQSMessageSendError: If HTTP response code is not 200.
-        Exception: On publish failure.
+    Returns:
+        dict[int, str]: Errors keyed by message index; empty if all succeeded.
 
     """
     sqs_url: str = queue_name or config_shared.get_sqs_queue_url()
-    region: str = config_shared.get_sqs_region()
-
-    start: float = time.perf_counter()
-    try:
-        sqs_client = boto3.client("sqs", region_name=region)
-        response = sqs_client.send_message(
-            QueueUrl=sqs_url,
-            MessageBody=json.dumps(data, ensure_ascii=False),
-        )
+    errors: dict[int, str] = {}
+
+    for chunk in _chunk_sqs_entries(bodies, indexes):
+        if _deadline_passed(deadline):
+            errors.update({index: "publish deadline exceeded" for index in chunk})
+            continue
+        start: float = time.perf_counter()
+        try:
+            response = _get_sqs_client(config_shared.get_sqs_region()).send_message_batch(
+                QueueUrl=sqs_url,
+                Entries=[
+                    {"Id": str(index), "MessageBody": bodies[index].decode("utf-8")}
+                    for index in chunk
+                ],
+            )
+            duration: float = time.perf_counter() - start
+
+            status_code: int = response["ResponseMetadata"]["HTTPStatusCode"]
+            if status_code != 200:
+                raise SQSMessageSendError(f"SQS returned HTTP status {status_code}")
+
+            failed = response.get("Failed", [])
+            for entry in failed:
+                errors[int(entry["Id"])] = entry.get("Code", "failed")
+            if failed:
+                _record_publish("sqs", "failure", duration, count=len(failed))
+            if len(chunk) > len(failed):
+                _record_publish("sqs", "success", duration, count=len(chunk) - len(failed))
+
+        except (BotoCoreError, NoCredentialsError, SQSMessageSendError) as e:
+            duration = time.perf_counter() - start
+            _record_publish("sqs", "failure", duration, count=len(chunk))
+            safe_error("SQS client error", {"error": str(e), "duration": duration})
+            errors.update({index: str(e) or type(e).__name__ for index in chunk})
+        except ClientError as e:
+            duration = time.perf_counter() - start
+            _record_publish("sqs", "exception", duration, count=len(chunk))
+            safe_error("SQS request rejected", {"error": str(e), "duration": duration})
+            errors.update({index: str(e) or type(e).__name__ for index in chunk})
+
+    safe_info(
+        "Published messages to SQS",
+        {"queue_url": sqs_url, "published": len(indexes) - len(errors), "failed": len(errors)},
+    )
+    return errors
+
+
+def _chunk_sqs_entries(bodies: list[bytes], indexes: list[int]) -> list[list[int]]:
+    """Group message indexes into SendMessageBatch-sized chunks.
 
-        status_code: int = response["ResponseMetadata"]["HTTPStatusCode"]
-        duration: float = time.perf_counter() - start
+    Args:
+        bodies (list[bytes]): Encoded bodies aligned with the batch.
+        indexes (list[int]): Indexes to group.
 
-        if status_code != 200:
-            queue_publish_counter.labels(queue_type="sqs", status="failure").inc()
-            queue_publish_latency.labels(queue_type="sqs", status="failure").observe(duration)
-            safe_error(
-                "Failed to publish message to SQS",
-                {
-                    "http_status": status_code,
-                    "duration": duration,
-                    "queue_url": sqs_url,
-                },
-            )
-            raise SQSMessageSendError(f"SQS returned HTTP status {status_code}")
-
-        queue_publish_counter.labels(queue_type="sqs", status="success").inc()
-        queue_publish_latency.labels(queue_type="sqs", status="success").observe(duration)
-        safe_info(
-            "Published message to SQS",
-            {
-                "queue_url": sqs_url,
-                "duration": duration,
-                "message": data,
-            },
-        )
+    Returns:
+        list[list[int]]: Chunks of at most 10 entries and 256 KiB each.
 
-    except (BotoCoreError, NoCredentialsError) as e:
-        duration = time.perf_counter() - start
-        queue_publish_counter.labels(queue_type="sqs", status="failure").inc()
-        queue_publish_latency.labels(queue_type="sqs", status="failure").observe(duration)
-        safe_error("SQS client error", {"error": str(e), "duration": duration})
-        raise
-    except Exception as e:
-        duration = time.perf_counter() - start
-        queue_publish_counter.labels(queue_type="sqs", status="exception").inc()
-        queue_publish_latency.labels(queue_type="sqs", status="exception").observe(duration)
-        safe_error("Unhandled error during SQS publish", {"error": str(e), "duration": duration})
-        raise
+    """
+    chunks: list[list[int]] = []
+    current: list[int] = []
+    size = 0
+    for index in indexes:
+        body_size = len(bodies[index])
+        if current and (
+            len(current) >= SQS_BATCH_MAX_ENTRIES or size + body_size > SQS_BATCH_MAX_BYTES
+        ):
+            chunks.append(current)
+            current, size = [], 0
+        current.append(index)
+        size += body_size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+__all__ = ["PublishResult", "SQSMessageSendError", "publish_to_queue"]
@@ -0,0 +1,255 @@
+"""HTTP transport for the REST output sink.
+
+A single ``requests.Session`` with a sized keep-alive connection pool is
+shared by every REST post in the process, so batches reuse TCP and TLS
+connections instead of handshaking each time. Batches are split into JSON
+array bodies under REST_MAX_BODY_BYTES. With REST_GZIP_ENABLED, bodies that
+are large enough to benefit are gzip-compressed.
+
+Requests go through an ``AdaptiveLimiter`` (REST_ADAPTIVE_ENABLED) that
+grows concurrency while the endpoint keeps up and backs off on 429/503,
+honouring ``Retry-After``. Bodies of a split batch are posted in parallel
+up to that limit, and throttled bodies are retried REST_THROTTLE_MAX_RETRIES
+times. Without the limiter, retries wait for ``Retry-After`` or, when the
+endpoint sends none, back off exponentially from REST_RETRY_BACKOFF_SECONDS.
+"""
+
+import gzip
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app import config_shared
+from app.adaptive_limiter import THROTTLE_STATUSES, AdaptiveLimiter, parse_retry_after
+from app.encoded_batch import EncodedBatch
+from app.utils.metrics import record_sink_metrics
+from app.utils.setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_GZIP_LEVEL = 6
+
+
+@lru_cache
+def get_session() -> requests.Session:
+    """Return the process-wide HTTP session for REST output.
+
+    The connection pool is sized by REST_POOL_SIZE.
+
+    Returns:
+        requests.Session: Shared session.
+
+    """
+    pool_size = config_shared.get_rest_pool_size()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Content-Type": "application/json"})
+    return session
+
+
+@lru_cache
+def get_limiter() -> AdaptiveLimiter | None:
+    """Return the process-wide adaptive limiter for REST output.
+
+    Returns:
+        Optional[AdaptiveLimiter]: Shared limiter, or None if REST_ADAPTIVE_ENABLED is off.
+
+    """
+    if not config_shared.get_rest_adaptive_enabled():
+        return None
+    return AdaptiveLimiter.from_config("rest")
+
+
+@lru_cache
+def _post_pool() -> ThreadPoolExecutor:
+    """Return the thread pool that posts the bodies of a split batch in parallel."""
+    return ThreadPoolExecutor(
+        max_workers=max(1, config_shared.get_rest_concurrency_max()), thread_name_prefix="rest"
+    )
+
+
+def chunk_bodies(item_bytes: list[bytes], max_bytes: int) -> list[bytes]:
+    """Pack encoded items into JSON array bodies of at most ``max_bytes``.
+
+    An item that is larger than ``max_bytes`` on its own is sent alone.
+
+    Args:
+        item_bytes (list[bytes]): Compact JSON encoding of each item.
+        max_bytes (int): Target maximum body size.
+
+    Returns:
+        list[bytes]: JSON array bodies in item order.
+
+    """
+    return [
+        b"[" + b",".join(item_bytes[start:end]) + b"]"
+        for start, end in _chunk_ranges(item_bytes, max_bytes)
+    ]
+
+
+def _chunk_ranges(item_bytes: list[bytes], max_bytes: int) -> list[tuple[int, int]]:
+    """Return the ``[start, end)`` item ranges of the bodies built by ``chunk_bodies``."""
+    ranges: list[tuple[int, int]] = []
+    start = 0
+    size = 2  # the enclosing brackets
+    for i, item in enumerate(item_bytes):
+        added = len(item) + (1 if i > start else 0)
+        if i > start and size + added > max_bytes:
+            ranges.append((start, i))
+            start, size, added = i, 2, len(item)
+        size += added
+    if start < len(item_bytes):
+        ranges.append((start, len(item_bytes)))
+    return ranges
+
+
+def encode_body(body: bytes) -> tuple[bytes, dict[str, str]]:
+    """Gzip a request body when compression is enabled and worthwhile.
+
+    Args:
+        body (bytes): Uncompressed JSON body.
+
+    Returns:
+        tuple[bytes, dict[str, str]]: Body to send and any extra headers.
+
+    """
+    if (
+        config_shared.get_rest_gzip_enabled()
+        and len(body) >= config_shared.get_rest_gzip_min_bytes()
+    ):
+        return gzip.compress(body, compresslevel=_GZIP_LEVEL), {"Content-Encoding": "gzip"}
+    return body, {}
+
+
+@dataclass
+class PostResult:
+    """Outcome of posting a batch as one or more requests.
+
+    Attributes:
+        requests (int): Number of requests sent.
+        failed (int): Number of requests that failed.
+        statuses (list[str]): HTTP status (or 'exception') per request.
+        failed_items (list[int]): Indexes of the batch items whose request failed.
+
+    """
+
+    requests: int = 0
+    failed: int = 0
+    statuses: list[str] = field(default_factory=list)
+    failed_items: list[int] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """Return True when every request succeeded."""
+        return self.failed == 0
+
+
+def post_batch(batch: EncodedBatch, url: str | None = None) -> PostResult:
+    """Post a batch to the REST endpoint over the shared session.
+
+    Args:
+        batch (EncodedBatch): Results to send.
+        url (Optional[str]): Endpoint; defaults to REST_OUTPUT_URL.
+
+    Returns:
+        PostResult: Per-request outcome summary, including the items of the
+        bodies that were not accepted so only those are retried or spooled.
+
+    """
+    url = url or config_shared.get_rest_output_url()
+    max_bytes = config_shared.get_rest_max_body_bytes()
+
+    if len(batch.json_bytes) <= max_bytes:
+        ranges = [(0, len(batch))]
+        bodies = [batch.json_bytes]
+    else:
+        ranges = _chunk_ranges(batch.item_bytes, max_bytes)
+        bodies = [b"[" + b",".join(batch.item_bytes[a:b]) + b"]" for a, b in ranges]
+
+    if len(bodies) == 1 or get_limiter() is None:
+        outcomes = [_post_body(url, body) for body in bodies]
+    else:
+        outcomes = list(_post_pool().map(lambda body: _post_body(url, body), bodies))
+
+    result = PostResult()
+    for (start, end), (statuses, ok) in zip(ranges, outcomes):
+        result.requests += len(statuses)
+        result.statuses.extend(statuses)
+        if not ok:
+            result.failed += 1
+            result.failed_items.extend(range(start, end))
+    return result
+
+
+def _post_body(url: str, body: bytes) -> tuple[list[str], bool]:
+    """Post one body, retrying it while the endpoint throttles.
+
+    Args:
+        url (str): Endpoint.
+        body (bytes): Uncompressed JSON body.
+
+    Returns:
+        tuple[list[str], bool]: HTTP status (or 'exception' / 'throttled') of each
+        attempt, and whether the body was finally accepted.
+
+    """
+    session = get_session()
+    limiter = get_limiter()
+    timeout = config_shared.get_rest_timeout()
+    max_retries = config_shared.get_rest_throttle_max_retries()
+    payload, headers = encode_body(body)
+    statuses: list[str] = []
+    while True:
+        if limiter is not None and not limiter.acquire(
+            timeout=config_shared.get_output_sink_timeout_seconds("rest")
+        ):
+            logger.error("❌ REST output throttled; no request slot within the sink deadline")
+            statuses.append("throttled")
+            return statuses, False
+
+        start = time.perf_counter()
+        code: int | None = None
+        retry_after: float | None = None
+        try:
+            response = session.post(url, data=payload, headers=headers, timeout=timeout)
+            code = response.status_code
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            status = str(code)
+            failed = not response.ok
+        except requests.RequestException as e:
+            logger.error("❌ REST output error: %s", e)
+            status, failed = "exception", True
+        finally:
+            if limiter is not None:
+                limiter.release(code, retry_after)
+        record_sink_metrics("rest", status, time.perf_counter() - start, failed=failed)
+        statuses.append(status)
+
+        if code not in THROTTLE_STATUSES or len(statuses) > max_retries:
+            return statuses, not failed
+        logger.warning(
+            "🔁 REST output throttled (%s); retrying body (%d/%d)",
+            code,
+            len(statuses),
+            max_retries,
+        )
+        if limiter is None:
+            backoff = config_shared.get_rest_retry_backoff_seconds()
+            delay = retry_after if retry_after is not None else backoff * 2 ** (len(statuses) - 1)
+            time.sleep(min(delay, config_shared.get_rest_retry_after_max_seconds()))
+
+
+__all__ = [
+    "PostResult",
+    "chunk_bodies",
+    "encode_body",
+    "get_limiter",
+    "get_session",
+    "post_batch",
+]
@@ -0,0 +1,128 @@
+"""Routing key construction for pattern-aware queue publishing.
+
+Derives a per-message RabbitMQ routing key from the analysis result so that
+a topic exchange can deliver each detection only to the consumers bound to
+its pattern and/or symbol (e.g. ``candlestick.hammer.*``).
+"""
+
+import re
+from functools import lru_cache
+from typing import Any
+
+from app import config_shared
+from app.utils.setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_TOKEN_UNSAFE = re.compile(r"[^a-z0-9]+")
+
+
+def routing_token(value: Any, default: str = "unknown") -> str:
+    """Normalize a value into a single topic-exchange routing key word.
+
+    Topic routing keys are dot-separated words, so dots, spaces and other
+    punctuation are collapsed into underscores.
+
+    Args:
+        value (Any): Raw value (e.g. a pattern name or symbol).
+        default (str): Token used when the value is missing or empty.
+
+    Returns:
+        str: Lower-case token such as ``no_clear_pattern`` or ``brk_b``.
+
+    """
+    if value is None:
+        return default
+    token = _TOKEN_UNSAFE.sub("_", str(value).lower()).strip("_")
+    return token or default
+
+
+class _RoutingFields(dict[str, str]):
+    """Template namespace that renders unknown placeholders as ``unknown``."""
+
+    def __missing__(self, key: str) -> str:
+        return "unknown"
+
+
+def build_routing_key(message: dict[str, Any], template: str) -> str:
+    """Render a routing key template for a single message.
+
+    Supported placeholders are ``{pattern}``, ``{symbol}``, ``{model}``,
+    ``{model_version}`` and ``{poller}``. Unknown named placeholders render
+    as ``unknown``; malformed templates (e.g. positional ``{0}``) raise, see
+    ``template_is_valid``.
+
+    Args:
+        message (dict[str, Any]): Analysis result to route.
+        template (str): Template such as ``candlestick.{pattern}.{symbol}``.
+
+    Returns:
+        str: Rendered routing key.
+
+    Raises:
+        ValueError: If the template has unbalanced braces.
+        IndexError: If the template uses positional fields such as ``{0}``.
+        AttributeError: If a field looks up an attribute such as ``{symbol.x}``.
+        TypeError: If a field indexes a value with a non-integer key.
+
+    """
+    fields = _RoutingFields(
+        pattern=routing_token(message.get("pattern")),
+        symbol=routing_token(message.get("symbol")),
+        model=routing_token(message.get("model")),
+        model_version=routing_token(message.get("model_version")),
+        poller=routing_token(config_shared.get_poller_name()),
+    )
+    return str(template.format_map(fields))
+
+
+@lru_cache
+def template_is_valid(template: str) -> bool:
+    """Check once whether a routing key template can be rendered.
+
+    An invalid template is logged the first time it is checked.
+
+    Args:
+        template (str): Routing key template.
+
+    Returns:
+        bool: True if the template renders for a sample message.
+
+    """
+    try:
+        build_routing_key({}, template)
+    except (IndexError, ValueError, KeyError, AttributeError, TypeError) as e:
+        logger.error(
+            "❌ Invalid RABBITMQ_ROUTING_KEY_TEMPLATE %r (%s); using RABBITMQ_ROUTING_KEY",
+            template,
+            e,
+        )
+        return False
+    return True
+
+
+def resolve_routing_key(message: dict[str, Any], override: str | None = None) -> str:
+    """Resolve the routing key for a message using config and an optional override.
+
+    An explicit override always wins. Otherwise the configured
+    ``RABBITMQ_ROUTING_KEY_TEMPLATE`` is rendered, falling back to the static
+    ``RABBITMQ_ROUTING_KEY`` when no template is configured or the template
+    is invalid.
+
+    Args:
+        message (dict[str, Any]): Analysis result to route.
+        override (Optional[str]): Explicit routing key.
+
+    Returns:
+        str: Routing key to publish with.
+
+    """
+    if override:
+        return override
+    template = config_shared.get_rabbitmq_routing_key_template()
+    if not template or not template_is_valid(template):
+        return str(config_shared.get_rabbitmq_routing_key())
+    return build_routing_key(message, template)
+
+
+__all__ = ["build_routing_key", "resolve_routing_key", "routing_token", "template_is_valid"]
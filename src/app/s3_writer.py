@@ -0,0 +1,441 @@
+"""Rolling, partitioned NDJSON writer for the S3 output sink.
+
+Instead of one tiny object per batch, results are buffered per partition
+and flushed as gzip-compressed NDJSON objects once a partition reaches a
+size limit or age limit. Keys are laid out for partition pruning by query
+engines::
+
+    {prefix}dt=YYYY-MM-DD/hour=HH/symbol={symbol}/part-{N}-{writer}.ndjson.gz
+
+The partition time is the candle timestamp (UTC), not the upload time.
+A partition is uploaded at most every S3_ROLLUP_MAX_SECONDS (5 minutes by
+default), so an hour partition holds a handful of objects rather than one
+per flush interval.
+
+Messages are acknowledged once their results are buffered, before they
+reach S3. A graceful shutdown uploads everything still buffered, but a
+crash or SIGKILL loses up to S3_ROLLUP_MAX_SECONDS of S3 output; lower it
+(at the cost of more, smaller objects) if that window is too large.
+
+Rollups are compressed straight into a spooled temporary file rather than
+one large in-memory ``bytes`` object, uploaded in parallel on a small
+thread pool (S3_UPLOAD_CONCURRENCY), and sent as multipart uploads with
+parallel parts once they reach S3_MULTIPART_THRESHOLD_BYTES. All writers
+share one S3 client with a connection pool sized by S3_MAX_POOL_CONNECTIONS.
+"""
+
+import gzip
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import UTC, datetime
+from functools import lru_cache
+from typing import IO, Any
+
+from app import config_shared
+from app.encoded_batch import EncodedBatch
+from app.utils.metrics import record_sink_metrics
+from app.utils.setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+MIN_MULTIPART_CHUNK_BYTES = 5 * 1024 * 1024  # S3 minimum for every part but the last
+
+_KEY_UNSAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def parse_timestamp(value: Any) -> datetime | None:
+    """Parse a result timestamp into an aware UTC datetime.
+
+    Accepts ISO-8601 strings (naive values are treated as UTC) and epoch
+    seconds or milliseconds.
+
+    Args:
+        value (Any): Raw timestamp value.
+
+    Returns:
+        Optional[datetime]: Parsed timestamp, or None if it cannot be parsed.
+
+    """
+    try:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            seconds = value / 1000 if value > 1e12 else value
+            return datetime.fromtimestamp(seconds, tz=UTC)
+        if isinstance(value, str) and value:
+            parsed = datetime.fromisoformat(value)
+            if parsed.tzinfo is None:
+                return parsed.replace(tzinfo=UTC)
+            return parsed.astimezone(UTC)
+    except (ValueError, OverflowError, OSError):
+        return None
+    return None
+
+
+def partition_path(item: dict[str, Any], now: Callable[[], datetime] | None = None) -> str:
+    """Return the partition path for a result.
+
+    Args:
+        item (dict[str, Any]): Analysis result.
+        now (Optional[Callable[[], datetime]]): Fallback clock when the result has
+            no parseable timestamp; defaults to the current UTC time.
+
+    Returns:
+        str: Path such as ``dt=2025-04-16/hour=10/symbol=AAPL``.
+
+    """
+    ts = parse_timestamp(item.get("timestamp"))
+    if ts is None:
+        ts = now() if now else datetime.now(UTC)
+    symbol = _KEY_UNSAFE.sub("_", str(item.get("symbol") or "unknown")) or "unknown"
+    return f"dt={ts:%Y-%m-%d}/hour={ts:%H}/symbol={symbol}"
+
+
+class _Partition:
+    """Buffered NDJSON lines for a single partition."""
+
+    def __init__(self, created: float) -> None:
+        self.lines: list[bytes] = []
+        self.nbytes = 0
+        self.created = created
+
+
+class S3RollupWriter:
+    """Buffers results per partition and uploads gzip NDJSON rollups to S3."""
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        max_bytes: int = 8 * 1024 * 1024,
+        max_age_seconds: float = 300.0,
+        client_factory: Callable[[], Any] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        start_flusher: bool = True,
+        on_failure: Callable[[list[bytes]], None] | None = None,
+        on_outcome: Callable[[bool, float], None] | None = None,
+        upload_concurrency: int = 4,
+        multipart_threshold: int = 16 * 1024 * 1024,
+        multipart_chunk_bytes: int = 8 * 1024 * 1024,
+        multipart_concurrency: int = 4,
+    ) -> None:
+        """Initialize the writer.
+
+        Args:
+            bucket (str): Target S3 bucket.
+            prefix (str): Key prefix; a trailing '/' is added if missing.
+            max_bytes (int): Uncompressed partition size that triggers an upload.
+            max_age_seconds (float): Partition age that triggers an upload.
+            client_factory (Optional[Callable[[], Any]]): Builds the S3 client;
+                defaults to a boto3 client for S3_OUTPUT_REGION.
+            clock (Callable[[], float]): Monotonic time source.
+            start_flusher (bool): Start the background age-based flusher.
+            on_failure (Optional[Callable[[list[bytes]], None]]): Receives the
+                encoded results of a rollup that could not be uploaded.
+            on_outcome (Optional[Callable[[bool, float], None]]): Told whether
+                each upload succeeded and how long it took, in seconds.
+            upload_concurrency (int): Rollups uploaded in parallel.
+            multipart_threshold (int): Compressed size at which multipart upload is used.
+            multipart_chunk_bytes (int): Multipart part size.
+            multipart_concurrency (int): Parts of one upload sent in parallel.
+
+        """
+        self.bucket = bucket
+        self.prefix = prefix if not prefix or prefix.endswith("/") else f"{prefix}/"
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.writer_id = uuid.uuid4().hex[:8]
+        self._client_factory = client_factory or get_s3_client
+        self._client: Any = None
+        self._clock = clock
+        self._partitions: dict[str, _Partition] = {}
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._start_flusher = start_flusher
+        self._flusher: threading.Thread | None = None
+        self._on_failure = on_failure
+        self._on_outcome = on_outcome
+        self.upload_concurrency = max(1, upload_concurrency)
+        self.multipart_threshold = multipart_threshold
+        self.multipart_chunk_bytes = multipart_chunk_bytes
+        self.multipart_concurrency = max(1, multipart_concurrency)
+        self._upload_pool: ThreadPoolExecutor | None = None
+        self._part_pool: ThreadPoolExecutor | None = None
+
+    @classmethod
+    def from_config(
+        cls,
+        on_failure: Callable[[list[bytes]], None] | None = None,
+        on_outcome: Callable[[bool, float], None] | None = None,
+    ) -> "S3RollupWriter":
+        """Build a writer from shared configuration.
+
+        S3_MULTIPART_CHUNK_BYTES below S3's 5 MiB part minimum is raised to
+        it, since smaller parts would fail at ``CompleteMultipartUpload``.
+
+        Args:
+            on_failure (Optional[Callable[[list[bytes]], None]]): Failed upload handler.
+            on_outcome (Optional[Callable[[bool, float], None]]): Upload result handler.
+
+        Returns:
+            S3RollupWriter: Configured writer.
+
+        """
+        chunk_bytes = config_shared.get_s3_multipart_chunk_bytes()
+        if chunk_bytes < MIN_MULTIPART_CHUNK_BYTES:
+            logger.warning(
+                "⚠️ S3_MULTIPART_CHUNK_BYTES=%d is below the S3 minimum; using %d",
+                chunk_bytes,
+                MIN_MULTIPART_CHUNK_BYTES,
+            )
+            chunk_bytes = MIN_MULTIPART_CHUNK_BYTES
+        return cls(
+            bucket=config_shared.get_s3_output_bucket(),
+            prefix=config_shared.get_s3_output_prefix(),
+            max_bytes=config_shared.get_s3_rollup_max_bytes(),
+            max_age_seconds=config_shared.get_s3_rollup_max_seconds(),
+            on_failure=on_failure,
+            on_outcome=on_outcome,
+            upload_concurrency=config_shared.get_s3_upload_concurrency(),
+            multipart_threshold=config_shared.get_s3_multipart_threshold_bytes(),
+            multipart_chunk_bytes=chunk_bytes,
+            multipart_concurrency=config_shared.get_s3_multipart_concurrency(),
+        )
+
+    @property
+    def client(self) -> Any:
+        """Return the S3 client, creating it on first use."""
+        if self._client is None:
+            self._client = self._client_factory()
+        return self._client
+
+    def add(self, batch: EncodedBatch) -> None:
+        """Buffer a batch and upload any partition that has reached its size limit.
+
+        Args:
+            batch (EncodedBatch): Results and their encoded bytes.
+
+        """
+        self._ensure_flusher()
+        now = self._clock()
+        ready: list[tuple[str, list[bytes]]] = []
+        with self._lock:
+            for item, line in zip(batch.items, batch.item_bytes):
+                path = partition_path(item)
+                partition = self._partitions.get(path)
+                if partition is None:
+                    partition = self._partitions[path] = _Partition(now)
+                partition.lines.append(line)
+                partition.nbytes += len(line) + 1
+                if partition.nbytes >= self.max_bytes:
+                    ready.append((path, self._partitions.pop(path).lines))
+        self._upload_all(ready)
+
+    def flush(self, force: bool = True) -> None:
+        """Upload buffered partitions.
+
+        Args:
+            force (bool): Upload every partition; otherwise only those past max age.
+
+        """
+        now = self._clock()
+        with self._lock:
+            paths = [
+                path
+                for path, partition in self._partitions.items()
+                if force or now - partition.created >= self.max_age_seconds
+            ]
+            ready = [(path, self._partitions.pop(path).lines) for path in paths]
+        self._upload_all(ready)
+
+    def close(self) -> None:
+        """Stop the background flusher and upload everything still buffered."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+        self.flush(force=True)
+        for pool in (self._upload_pool, self._part_pool):
+            if pool is not None:
+                pool.shutdown(wait=True)
+
+    def _next_key(self, path: str) -> str:
+        """Return a unique object key for a partition upload."""
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+        return f"{self.prefix}{path}/part-{sequence:05d}-{self.writer_id}.ndjson.gz"
+
+    def _upload_all(self, ready: list[tuple[str, list[bytes]]]) -> None:
+        """Upload drained partitions outside the buffer lock, in parallel."""
+        if len(ready) == 1 or self.upload_concurrency == 1:
+            for path, lines in ready:
+                self._upload(path, lines)
+            return
+        if ready:
+            with self._lock:
+                if self._upload_pool is None:
+                    self._upload_pool = ThreadPoolExecutor(
+                        max_workers=self.upload_concurrency, thread_name_prefix="s3-upload"
+                    )
+                pool = self._upload_pool
+            wait([pool.submit(self._upload, path, lines) for path, lines in ready])
+
+    def _upload(self, path: str, lines: list[bytes]) -> None:
+        """Compress and upload one partition rollup."""
+        key = self._next_key(path)
+        start = time.perf_counter()
+        try:
+            with _compress(lines, self.multipart_threshold) as body:
+                size = body.tell()
+                body.seek(0)
+                if size >= self.multipart_threshold:
+                    self._upload_multipart(key, body)
+                else:
+                    self.client.put_object(
+                        Bucket=self.bucket,
+                        Key=key,
+                        Body=body,
+                        ContentType="application/x-ndjson",
+                        ContentEncoding="gzip",
+                    )
+            duration = time.perf_counter() - start
+            record_sink_metrics("s3", "200", duration, failed=False)
+            if self._on_outcome is not None:
+                self._on_outcome(True, duration)
+            logger.info(
+                "🚚 Uploaded %d result(s) to S3: %s/%s (%d bytes)",
+                len(lines),
+                self.bucket,
+                key,
+                size,
+            )
+        except Exception:
+            logger.exception("❌ S3 upload failed for %s", key)
+            duration = time.perf_counter() - start
+            record_sink_metrics("s3", "exception", duration, failed=True)
+            if self._on_outcome is not None:
+                self._on_outcome(False, duration)
+            if self._on_failure is not None:
+                self._on_failure(lines)
+
+    def _upload_multipart(self, key: str, body: IO[bytes]) -> None:
+        """Upload a compressed rollup as a multipart upload with parallel parts.
+
+        At most ``multipart_concurrency`` parts are read into memory at once.
+        The upload is aborted if any part fails.
+        """
+        upload_id = self.client.create_multipart_upload(
+            Bucket=self.bucket,
+            Key=key,
+            ContentType="application/x-ndjson",
+            ContentEncoding="gzip",
+        )["UploadId"]
+        with self._lock:
+            if self._part_pool is None:
+                self._part_pool = ThreadPoolExecutor(
+                    max_workers=self.multipart_concurrency, thread_name_prefix="s3-part"
+                )
+            pool = self._part_pool
+        parts: dict[Future[str], int] = {}
+        etags: dict[int, str] = {}
+        try:
+            number = 0
+            while chunk := body.read(self.multipart_chunk_bytes):
+                number += 1
+                if len(parts) >= self.multipart_concurrency:
+                    done, _ = wait(parts, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        etags[parts.pop(future)] = future.result()
+                parts[pool.submit(self._upload_part, key, upload_id, number, chunk)] = number
+            for future, part_number in parts.items():
+                etags[part_number] = future.result()
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={
+                    "Parts": [{"ETag": etags[n], "PartNumber": n} for n in sorted(etags)]
+                },
+            )
+        except Exception:
+            wait(parts)
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+        logger.debug("🧩 Multipart upload of %s finished in %d part(s)", key, len(etags))
+
+    def _upload_part(self, key: str, upload_id: str, number: int, chunk: bytes) -> str:
+        """Upload one multipart part and return its ETag."""
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=chunk
+        )
+        return str(response["ETag"])
+
+    def _ensure_flusher(self) -> None:
+        """Start the background age-based flusher on first use."""
+        if not self._start_flusher or self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run_flusher, name="s3-rollup-flusher", daemon=True
+                )
+                self._flusher.start()
+
+    def _run_flusher(self) -> None:
+        """Periodically upload partitions that have exceeded their max age."""
+        interval = max(0.5, self.max_age_seconds / 4)
+        while not self._stop.wait(interval):
+            self.flush(force=False)
+
+
+def _compress(lines: list[bytes], max_memory: int) -> IO[bytes]:
+    """Gzip NDJSON lines into a temporary file that spills to disk past ``max_memory``.
+
+    Returns:
+        IO[bytes]: The compressed body, positioned at its end.
+
+    """
+    body = tempfile.SpooledTemporaryFile(max_size=max_memory)  # noqa: SIM115 - caller closes
+    with gzip.GzipFile(fileobj=body, mode="wb") as gz:
+        for line in lines:
+            gz.write(line)
+            gz.write(b"\n")
+    return body
+
+
+@lru_cache(maxsize=1)
+def get_s3_client() -> Any:
+    """Return the shared boto3 S3 client for the configured output region.
+
+    boto3 clients are thread-safe, so one client (and its connection pool)
+    is reused by every writer and upload thread.
+
+    Returns:
+        Any: boto3 S3 client.
+
+    """
+    import boto3
+    from botocore.config import Config
+
+    region = config_shared.get_s3_output_region() or None
+    return boto3.client(
+        "s3",
+        region_name=region,
+        config=Config(
+            max_pool_connections=config_shared.get_s3_max_pool_connections(),
+            retries={"mode": "standard"},
+        ),
+    )
+
+
+__all__ = [
+    "MIN_MULTIPART_CHUNK_BYTES",
+    "S3RollupWriter",
+    "get_s3_client",
+    "parse_timestamp",
+    "partition_path",
+]
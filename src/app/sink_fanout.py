@@ -0,0 +1,191 @@
+"""Concurrent fan-out of one batch to several output sinks.
+
+Each sink runs on a shared, bounded thread pool with its own deadline and
+attempt budget, so a batch sent to queue + S3 + database takes as long as
+its slowest sink rather than the sum of all three. A failing or hanging sink
+never blocks or fails the others; every sink reports a ``SinkOutcome``.
+
+A sink that misses its deadline is reported as timed out, but its worker
+thread cannot be interrupted and finishes in the background. Its outcome
+then carries the worker's future in ``straggler``, so callers can wait for
+the late result before treating the batch as undelivered.
+
+A sink may also return a ``Future`` when it has only queued the batch (the
+write-behind database writer does this); the outcome is then reported as
+accepted with the future in ``pending`` so callers can wait for the commit.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any
+
+from app.utils.setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# A sink call returns True on success and False (or raises) on failure, or a
+# Future that completes once the batch has been durably written.
+SinkCall = Callable[[], "bool | Future[Any]"]
+
+
+@dataclass
+class SinkOutcome:
+    """Result of delivering a batch to one sink.
+
+    Attributes:
+        mode (str): Output mode name.
+        ok (bool): True if the sink accepted the batch.
+        attempts (int): Number of attempts made.
+        duration (float): Seconds from submission to completion or timeout.
+        timed_out (bool): True if the sink missed its deadline.
+        error (Optional[str]): Last error message, if any.
+        spooled (bool): True if the failed batch was written to the spool.
+        short_circuited (bool): True if an open circuit breaker skipped the sink.
+        pending (Optional[Future]): Completes once a queued batch has been written.
+        straggler (Optional[Future[SinkOutcome]]): Worker of a timed-out sink that
+            is still running; resolves to its final outcome.
+
+    """
+
+    mode: str
+    ok: bool
+    attempts: int
+    duration: float
+    timed_out: bool = False
+    error: str | None = None
+    spooled: bool = False
+    short_circuited: bool = False
+    pending: Future[Any] | None = None
+    straggler: "Future[SinkOutcome] | None" = None
+
+
+@dataclass
+class SinkPolicy:
+    """Deadline and retry budget for one sink.
+
+    Attributes:
+        timeout (float): Seconds the sink may take, across all attempts.
+        max_attempts (int): Maximum attempts before giving up.
+        backoff (float): Seconds to wait between attempts.
+
+    """
+
+    timeout: float = 30.0
+    max_attempts: int = 1
+    backoff: float = 0.5
+
+
+class SinkFanout:
+    """Runs sink calls concurrently on a bounded thread pool."""
+
+    def __init__(self, max_workers: int = 4, clock: Callable[[], float] = time.monotonic) -> None:
+        """Initialize the fan-out.
+
+        Args:
+            max_workers (int): Maximum sinks running at the same time.
+            clock (Callable[[], float]): Monotonic time source.
+
+        """
+        self.max_workers = max(1, max_workers)
+        self._clock = clock
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Return the worker pool, creating it on first use."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="sink"
+                )
+            return self._executor
+
+    def run(
+        self, calls: list[tuple[str, SinkCall]], policies: dict[str, SinkPolicy]
+    ) -> list[SinkOutcome]:
+        """Run every sink call and wait for each one up to its deadline.
+
+        Args:
+            calls (list[tuple[str, SinkCall]]): (output mode, sink call) pairs.
+            policies (dict[str, SinkPolicy]): Deadline and retry policy per mode.
+
+        Returns:
+            list[SinkOutcome]: One outcome per call, in ``calls`` order.
+
+        """
+        start = self._clock()
+        pending: list[tuple[str, Future[SinkOutcome], float]] = []
+        for mode, call in calls:
+            policy = policies.get(mode, SinkPolicy())
+            deadline = start + policy.timeout
+            future = self.executor.submit(self._attempt, mode, call, policy, deadline)
+            pending.append((mode, future, deadline))
+
+        outcomes = []
+        for mode, future, deadline in pending:
+            try:
+                outcomes.append(future.result(timeout=max(0.0, deadline - self._clock())))
+            except FutureTimeoutError:
+                cancelled = future.cancel()
+                logger.error("⏱️ Output sink %s missed its deadline", mode)
+                outcomes.append(
+                    SinkOutcome(
+                        mode,
+                        ok=False,
+                        attempts=0,
+                        duration=self._clock() - start,
+                        timed_out=True,
+                        error="deadline exceeded",
+                        straggler=None if cancelled else future,
+                    )
+                )
+        return outcomes
+
+    def shutdown(self) -> None:
+        """Stop accepting work and wait for running sinks to finish."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _attempt(
+        self, mode: str, call: SinkCall, policy: SinkPolicy, deadline: float
+    ) -> SinkOutcome:
+        """Call a sink until it succeeds, runs out of attempts, or hits its deadline."""
+        start = self._clock()
+        attempts = 0
+        error: str | None = None
+        while True:
+            attempts += 1
+            try:
+                result = call()
+                if isinstance(result, Future):
+                    return SinkOutcome(mode, True, attempts, self._clock() - start, pending=result)
+                if result:
+                    return SinkOutcome(mode, True, attempts, self._clock() - start)
+                error = "sink reported failure"
+            except Exception as e:
+                error = str(e)
+                logger.exception("❌ Output sink %s raised", mode)
+
+            remaining = deadline - self._clock()
+            if attempts >= policy.max_attempts or remaining <= policy.backoff:
+                break
+            logger.warning(
+                "🔁 Retrying output sink %s (attempt %d/%d)",
+                mode,
+                attempts + 1,
+                policy.max_attempts,
+            )
+            time.sleep(policy.backoff)
+
+        timed_out = self._clock() >= deadline
+        return SinkOutcome(mode, False, attempts, self._clock() - start, timed_out, error)
+
+
+__all__ = ["SinkFanout", "SinkOutcome", "SinkPolicy"]
@@ -0,0 +1,379 @@
+"""Disk-backed spool for batches that a sink failed to deliver.
+
+Once a message has been consumed it has already been acknowledged, so a
+failed REST, S3 or database delivery used to lose the batch. Failed batches
+are instead appended to a per-sink spool on local disk and replayed in the
+background, with rate limiting, once the sink recovers.
+
+Layout: ``{SPOOL_DIR}/{sink}/{sequence:012d}.seg``. Each segment holds one
+compact JSON array per line (one line per failed batch). Writes are fsynced
+in batches (every SPOOL_FSYNC_BATCH records or SPOOL_FSYNC_INTERVAL_SECONDS),
+segments roll over at SPOOL_SEGMENT_BYTES, and the oldest segments are
+discarded once the spool exceeds SPOOL_MAX_BYTES. Replay progress within a
+segment is kept in a ``.pos`` sidecar so a restart does not resend batches
+that were already replayed.
+"""
+
+import json
+import os
+import threading
+import time
+from collections.abc import Callable
+from typing import IO
+
+from app import config_shared
+from app.encoded_batch import EncodedBatch
+from app.utils.metrics import record_spool_metrics
+from app.utils.setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_SEGMENT_SUFFIX = ".seg"
+_POSITION_SUFFIX = ".pos"
+
+
+class SinkSpool:
+    """Append-only, segmented on-disk queue of failed batches for one sink."""
+
+    def __init__(
+        self,
+        directory: str,
+        sink: str,
+        segment_bytes: int = 16 * 1024 * 1024,
+        max_bytes: int = 512 * 1024 * 1024,
+        fsync_every: int = 32,
+        fsync_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Open (or create) the spool for a sink.
+
+        Args:
+            directory (str): Base spool directory.
+            sink (str): Output mode name; used as the sub-directory.
+            segment_bytes (int): Size at which a new segment is started.
+            max_bytes (int): Total size cap; the oldest segments are dropped beyond it.
+            fsync_every (int): Records written between fsyncs.
+            fsync_interval (float): Maximum seconds between fsyncs.
+            clock (Callable[[], float]): Monotonic time source.
+
+        """
+        self.sink = sink
+        self.path = os.path.join(directory, sink)
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_interval = fsync_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._active: IO[bytes] | None = None
+        self._active_path: str | None = None
+        self._active_size = 0
+        self._unsynced = 0
+        self._last_sync = clock()
+        self._replaying: str | None = None
+
+        os.makedirs(self.path, exist_ok=True)
+        segments = self._segments()
+        self._sequence = (
+            int(os.path.basename(segments[-1])[: -len(_SEGMENT_SUFFIX)]) if segments else 0
+        )
+        self._size = sum(os.path.getsize(s) for s in segments)
+        if segments:
+            logger.info("📥 Found %d spooled segment(s) for %s sink", len(segments), sink)
+        record_spool_metrics(sink, nbytes=self._size)
+
+    @classmethod
+    def from_config(cls, sink: str) -> "SinkSpool":
+        """Build a spool for a sink from shared configuration.
+
+        Args:
+            sink (str): Output mode name.
+
+        Returns:
+            SinkSpool: Configured spool.
+
+        """
+        return cls(
+            directory=config_shared.get_spool_dir(),
+            sink=sink,
+            segment_bytes=config_shared.get_spool_segment_bytes(),
+            max_bytes=config_shared.get_spool_max_bytes(),
+            fsync_every=config_shared.get_spool_fsync_batch(),
+            fsync_interval=config_shared.get_spool_fsync_interval_seconds(),
+        )
+
+    @property
+    def size(self) -> int:
+        """Return the number of bytes currently spooled."""
+        return self._size
+
+    def append(self, item_bytes: list[bytes]) -> None:
+        """Append one failed batch to the spool.
+
+        Args:
+            item_bytes (list[bytes]): Compact JSON encoding of each item in the batch.
+
+        """
+        if not item_bytes:
+            return
+        record = b"[" + b",".join(item_bytes) + b"]\n"
+        with self._lock:
+            if self._active is None or self._active_size >= self.segment_bytes:
+                self._open_segment()
+            assert self._active is not None
+            self._active.write(record)
+            self._active_size += len(record)
+            self._size += len(record)
+            self._unsynced += 1
+            if (
+                self._unsynced >= self.fsync_every
+                or self._clock() - self._last_sync >= self.fsync_interval
+            ):
+                self._sync_locked()
+            self._enforce_cap_locked()
+            size = self._size
+        record_spool_metrics(self.sink, appended=1, nbytes=size)
+
+    def sync(self) -> None:
+        """Flush and fsync the active segment."""
+        with self._lock:
+            self._sync_locked()
+
+    def replay(
+        self, send: Callable[[EncodedBatch], bool], pace: Callable[[], bool] | None = None
+    ) -> int:
+        """Replay spooled batches, oldest first, until the spool is empty or a send fails.
+
+        Args:
+            send (Callable[[EncodedBatch], bool]): Delivers a batch; returns True on success.
+            pace (Optional[Callable[[], bool]]): Called before each batch to throttle
+                replay; returning False stops the replay.
+
+        Returns:
+            int: Number of batches replayed.
+
+        """
+        replayed = 0
+        with self._replay_lock:
+            while True:
+                segment = self._next_replay_segment()
+                if segment is None:
+                    return replayed
+                count, finished = self._replay_segment(segment, send, pace)
+                replayed += count
+                if not finished:
+                    return replayed
+
+    def close(self) -> None:
+        """Fsync and close the active segment."""
+        with self._lock:
+            self._close_active_locked()
+
+    def _segments(self) -> list[str]:
+        """Return spooled segment paths, oldest first."""
+        names = sorted(n for n in os.listdir(self.path) if n.endswith(_SEGMENT_SUFFIX))
+        return [os.path.join(self.path, n) for n in names]
+
+    def _open_segment(self) -> None:
+        """Close the active segment (if any) and start a new one."""
+        self._close_active_locked()
+        self._sequence += 1
+        self._active_path = os.path.join(self.path, f"{self._sequence:012d}{_SEGMENT_SUFFIX}")
+        self._active = open(self._active_path, "ab")  # noqa: SIM115 - closed on roll-over
+        self._active_size = 0
+
+    def _sync_locked(self) -> None:
+        """Flush and fsync the active segment; caller holds ``_lock``."""
+        if self._active is not None and self._unsynced:
+            self._active.flush()
+            os.fsync(self._active.fileno())
+        self._unsynced = 0
+        self._last_sync = self._clock()
+
+    def _close_active_locked(self) -> None:
+        """Seal the active segment; caller holds ``_lock``."""
+        if self._active is not None:
+            self._sync_locked()
+            self._active.close()
+        self._active = None
+        self._active_path = None
+        self._active_size = 0
+
+    def _enforce_cap_locked(self) -> None:
+        """Drop the oldest sealed segments while the spool exceeds its cap."""
+        for segment in self._segments():
+            if self._size <= self.max_bytes:
+                return
+            if segment in (self._active_path, self._replaying):
+                continue
+            size = os.path.getsize(segment)
+            with open(segment, "rb") as f:
+                dropped = sum(1 for _ in f)
+            _remove(segment)
+            _remove(_position_path(segment))
+            self._size -= size
+            logger.warning(
+                "⚠️ Spool for %s sink over %d bytes; dropped %d batch(es) from %s",
+                self.sink,
+                self.max_bytes,
+                dropped,
+                os.path.basename(segment),
+            )
+            record_spool_metrics(self.sink, dropped=dropped)
+
+    def _next_replay_segment(self) -> str | None:
+        """Return the oldest segment to replay, sealing the active one if it is the last."""
+        with self._lock:
+            segments = self._segments()
+            if not segments:
+                return None
+            if segments[0] == self._active_path:
+                if self._active_size == 0:
+                    return None
+                self._close_active_locked()
+            self._replaying = segments[0]
+            return segments[0]
+
+    def _replay_segment(
+        self,
+        segment: str,
+        send: Callable[[EncodedBatch], bool],
+        pace: Callable[[], bool] | None,
+    ) -> tuple[int, bool]:
+        """Replay one sealed segment from its saved position.
+
+        Returns:
+            tuple[int, bool]: Batches replayed and whether the segment was finished.
+
+        """
+        position_path = _position_path(segment)
+        position = _read_position(position_path)
+        replayed = 0
+        try:
+            with open(segment, "rb") as f:
+                f.seek(position)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # torn write from a crash; nothing after it is readable
+                    if pace is not None and not pace():
+                        _write_position(position_path, position)
+                        return replayed, False
+                    try:
+                        delivered = send(EncodedBatch(json.loads(line)))
+                    except Exception:
+                        logger.exception("❌ Spool replay to %s failed", self.sink)
+                        delivered = False
+                    if not delivered:
+                        _write_position(position_path, position)
+                        return replayed, False
+                    position += len(line)
+                    replayed += 1
+                    _write_position(position_path, position)
+        except FileNotFoundError:
+            return replayed, True
+        finally:
+            if replayed:
+                record_spool_metrics(self.sink, replayed=replayed)
+            with self._lock:
+                self._replaying = None
+
+        with self._lock:
+            self._size -= os.path.getsize(segment)
+            _remove(segment)
+            _remove(position_path)
+            size = self._size
+        record_spool_metrics(self.sink, nbytes=size)
+        logger.info(
+            "📤 Replayed spooled segment %s to %s sink", os.path.basename(segment), self.sink
+        )
+        return replayed, True
+
+
+class SpoolReplayer:
+    """Background thread that drains a spool into its sink at a limited rate."""
+
+    def __init__(
+        self,
+        spool: SinkSpool,
+        send: Callable[[EncodedBatch], bool],
+        rate: float = 5.0,
+        interval: float = 5.0,
+    ) -> None:
+        """Initialize the replayer.
+
+        Args:
+            spool (SinkSpool): Spool to drain.
+            send (Callable[[EncodedBatch], bool]): Delivers a batch to the sink.
+            rate (float): Maximum replayed batches per second.
+            interval (float): Seconds between replay attempts while the sink is failing.
+
+        """
+        self.spool = spool
+        self.send = send
+        self.interval = interval
+        self.min_gap = 1.0 / rate if rate > 0 else 0.0
+        self._last_send = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start the replay thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=f"spool-replay-{self.spool.sink}", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the replay thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        """Replay whenever the spool has data, waiting ``interval`` between rounds."""
+        while not self._stop.wait(self.interval):
+            if self.spool.size:
+                self.spool.replay(self.send, self._pace)
+
+    def _pace(self) -> bool:
+        """Wait until the replay rate allows another batch; False once stopping."""
+        delay = self._last_send + self.min_gap - time.monotonic()
+        if delay > 0 and self._stop.wait(delay):
+            return False
+        self._last_send = time.monotonic()
+        return not self._stop.is_set()
+
+
+def _position_path(segment: str) -> str:
+    """Return the replay position sidecar of a segment."""
+    return segment[: -len(_SEGMENT_SUFFIX)] + _POSITION_SUFFIX
+
+
+def _read_position(path: str) -> int:
+    """Read a replay position sidecar, defaulting to the start of the segment."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _write_position(path: str, position: int) -> None:
+    """Atomically write a replay position sidecar."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(str(position))
+    os.replace(tmp_path, path)
+
+
+def _remove(path: str) -> None:
+    """Remove a file if it exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+__all__ = ["SinkSpool", "SpoolReplayer"]
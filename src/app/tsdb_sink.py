@@ -0,0 +1,234 @@
+"""Line-protocol time-series sink for the ``tsdb`` output mode.
+
+Each result becomes one InfluxDB line-protocol point::
+
+    candlestick_pattern,symbol=AAPL,pattern=Hammer open=100.0,close=101.5 1744797600000
+
+The measurement is TSDB_MEASUREMENT. ``symbol``, ``pattern``, ``model``
+and ``model_version`` are tags, OHLCV values are float fields, and the
+candle time is the point timestamp in TSDB_PRECISION units. Results
+without a candle time are stamped with the time they are encoded, never
+left to the server clock. Results without OHLC data get a ``detected=1i``
+field so the occurrence is still recorded.
+
+Points are packed into newline-separated bodies of at most
+TSDB_MAX_BODY_BYTES, gzip-compressed, and posted to TSDB_WRITE_URL over a
+shared keep-alive session. Connection errors, 429 and 5xx responses are retried with
+exponential back-off (TSDB_MAX_RETRIES), honouring ``Retry-After``. Batches
+that still fail are spooled like other sinks when ``tsdb`` is listed in
+SPOOL_SINKS. Re-posting a point overwrites it, so retries (which resend the
+same body) are idempotent, and so are replays of results with a candle time.
+A replayed result without one is re-stamped and may be written twice.
+"""
+
+import gzip
+import math
+import time
+from datetime import UTC, datetime, timedelta
+from functools import lru_cache
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app import config_shared
+from app.adaptive_limiter import parse_retry_after
+from app.encoded_batch import EncodedBatch
+from app.rest_sink import PostResult
+from app.s3_writer import parse_timestamp
+from app.utils.metrics import record_output_metrics
+from app.utils.setup_logger import setup_logger
+
+logger = setup_logger(__name__)
+
+PRECISIONS = {"s": 1, "ms": 1_000, "us": 1_000_000, "ns": 1_000_000_000}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_TAG_COLUMNS = ("symbol", "pattern", "model", "model_version")
+_FIELD_COLUMNS = ("open", "high", "low", "close", "volume")
+_GZIP_LEVEL = 6
+
+_MEASUREMENT_ESCAPES = str.maketrans({",": r"\,", " ": r"\ "})
+_TAG_ESCAPES = str.maketrans({",": r"\,", "=": r"\=", " ": r"\ "})
+
+
+def _escape_tag(value: Any) -> str:
+    """Escape a tag key or value, folding newlines that line protocol cannot carry."""
+    text = str(value).translate(_TAG_ESCAPES)
+    return text.replace("\n", " ").replace("\r", " ")
+
+
+def encode_point(
+    item: dict[str, Any], measurement: str, precision: str = "ms", now: datetime | None = None
+) -> bytes:
+    """Encode one result as a line-protocol point.
+
+    Args:
+        item (dict[str, Any]): Analysis result.
+        measurement (str): Measurement name.
+        precision (str): Timestamp precision: 's', 'ms', 'us' or 'ns'.
+        now (Optional[datetime]): Timestamp for a result without one;
+            defaults to the current time.
+
+    Returns:
+        bytes: Point without a trailing newline.
+
+    """
+    tags = "".join(f",{key}={_escape_tag(item[key])}" for key in _TAG_COLUMNS if item.get(key))
+
+    raw = item.get("raw_data")
+    ohlc = raw.get("data") if isinstance(raw, dict) else None
+    ohlc = ohlc if isinstance(ohlc, dict) else {}
+    fields = []
+    for column in _FIELD_COLUMNS:
+        try:
+            value = float(ohlc[column])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if math.isfinite(value):
+            fields.append(f"{column}={value!r}")
+    if not fields:
+        fields.append("detected=1i")
+
+    line = f"{measurement.translate(_MEASUREMENT_ESCAPES)}{tags} {','.join(fields)}"
+    ts = parse_timestamp(item.get("timestamp")) or now or datetime.now(UTC)
+    micros = (ts - _EPOCH) // timedelta(microseconds=1)
+    line += f" {micros * PRECISIONS[precision] // 1_000_000}"
+    return line.encode("utf-8")
+
+
+def chunk_lines(lines: list[bytes], max_bytes: int) -> list[bytes]:
+    """Pack points into newline-separated bodies of at most ``max_bytes``.
+
+    A point that is larger than ``max_bytes`` on its own is sent alone.
+
+    Args:
+        lines (list[bytes]): Encoded points.
+        max_bytes (int): Target maximum body size before compression.
+
+    Returns:
+        list[bytes]: Bodies in point order.
+
+    """
+    bodies: list[bytes] = []
+    current: list[bytes] = []
+    size = 0
+    for line in lines:
+        if current and size + len(line) + 1 > max_bytes:
+            bodies.append(b"\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        bodies.append(b"\n".join(current))
+    return bodies
+
+
+@lru_cache
+def get_session() -> requests.Session:
+    """Return the process-wide HTTP session for time-series writes.
+
+    The connection pool is sized by TSDB_POOL_SIZE, and TSDB_AUTH_TOKEN is
+    sent as a ``Token`` authorization header when set.
+
+    Returns:
+        requests.Session: Shared session.
+
+    """
+    pool_size = config_shared.get_tsdb_pool_size()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Content-Type": "text/plain; charset=utf-8"})
+    token = config_shared.get_tsdb_auth_token()
+    if token:
+        session.headers["Authorization"] = f"Token {token}"
+    return session
+
+
+def write_batch(batch: EncodedBatch, url: str | None = None) -> PostResult:
+    """Encode a batch as line protocol and post it to the time-series database.
+
+    Args:
+        batch (EncodedBatch): Results to write.
+        url (Optional[str]): Write endpoint; defaults to TSDB_WRITE_URL.
+
+    Returns:
+        PostResult: Per-request outcome summary.
+
+    """
+    url = url or config_shared.get_tsdb_write_url()
+    if not url:
+        raise ValueError("TSDB_WRITE_URL is not configured")
+    precision = config_shared.get_tsdb_precision()
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unsupported TSDB_PRECISION: {precision}")
+    measurement = config_shared.get_tsdb_measurement()
+
+    lines = [encode_point(item, measurement, precision) for item in batch]
+    result = PostResult()
+    for body in chunk_lines(lines, config_shared.get_tsdb_max_body_bytes()):
+        statuses, ok = _post_body(url, body, precision)
+        result.requests += len(statuses)
+        result.statuses.extend(statuses)
+        if not ok:
+            result.failed += 1
+    return result
+
+
+def _post_body(url: str, body: bytes, precision: str) -> tuple[list[str], bool]:
+    """Post one body, retrying transient failures with exponential back-off.
+
+    Args:
+        url (str): Write endpoint.
+        body (bytes): Uncompressed line-protocol body.
+        precision (str): Timestamp precision sent as the ``precision`` parameter.
+
+    Returns:
+        tuple[list[str], bool]: HTTP status (or 'exception') of each attempt,
+        and whether the body was finally accepted.
+
+    """
+    session = get_session()
+    timeout = config_shared.get_tsdb_timeout()
+    max_retries = config_shared.get_tsdb_max_retries()
+    backoff = config_shared.get_tsdb_retry_backoff_seconds()
+    headers: dict[str, str] = {}
+    if config_shared.get_tsdb_gzip_enabled():
+        body, headers = gzip.compress(body, compresslevel=_GZIP_LEVEL), {"Content-Encoding": "gzip"}
+
+    statuses: list[str] = []
+    while True:
+        start = time.perf_counter()
+        retry_after: float | None = None
+        try:
+            response = session.post(
+                url, data=body, headers=headers, params={"precision": precision}, timeout=timeout
+            )
+            status = str(response.status_code)
+            ok = response.ok
+            retryable = response.status_code == 429 or response.status_code >= 500
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        except requests.RequestException as e:
+            logger.error("❌ TSDB write error: %s", e)
+            status, ok, retryable = "exception", False, True
+        record_output_metrics("tsdb", success=ok, duration_sec=time.perf_counter() - start)
+        statuses.append(status)
+
+        if ok or not retryable or len(statuses) > max_retries:
+            if not ok and not retryable:
+                logger.error("❌ TSDB rejected a %d-byte body (HTTP %s)", len(body), status)
+            return statuses, ok
+        delay = retry_after if retry_after is not None else backoff * 2 ** (len(statuses) - 1)
+        logger.warning(
+            "🔁 TSDB write failed (%s); retrying in %.2fs (%d/%d)",
+            status,
+            delay,
+            len(statuses),
+            max_retries,
+        )
+        time.sleep(min(delay, config_shared.get_output_sink_timeout_seconds("tsdb")))
+
+
+__all__ = ["PRECISIONS", "chunk_lines", "encode_point", "get_session", "write_batch"]
@@ -1,12 +1,16 @@
 """Healthcheck utility module for readiness and liveness probes.
 
 Provides application status flags and an optional HTTP server for use with
-container orchestrators like Kubernetes or Docker.
+container orchestrators like Kubernetes or Docker. When the 'store' output
+mode is enabled, the server also answers ``/detections`` queries against
+the local detection store, and with LATEST_INDEX_ENABLED it serves the
+latest results per symbol at ``/latest``. With PUSH_ENABLED, ``/stream``
+pushes detections to subscribers as Server-Sent Events.
 """
 
 import logging
 import threading
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 from app import config_shared
 
@@ -52,7 +56,7 @@ def set_unhealthy() -> None:
 
 
 class HealthHandler(BaseHTTPRequestHandler):
-    """HTTP request handler for /health and /ready endpoints."""
+    """HTTP request handler for /health, /ready and the optional data endpoints."""
 
     def do_GET(self) -> None:
         """Handle GET requests for readiness and liveness checks."""
@@ -68,11 +72,56 @@ class HealthHandler(BaseHTTPRequestHandler):
             self.end_headers()
             self.wfile.write(b"ready" if status == 200 else b"not ready")
 
+        elif self.path.split("?", 1)[0] == "/detections" and (
+            "store" in config_shared.get_output_modes()
+        ):
+            from app.detection_store import handle_query
+
+            status, body = handle_query(self.path.partition("?")[2])
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(body)
+
+        elif self.path.split("?", 1)[0] == "/latest" and config_shared.get_latest_index_enabled():
+            from app.latest_index import handle_lookup
+
+            status, body, etag = handle_lookup(
+                self.path.partition("?")[2], self.headers.get("If-None-Match")
+            )
+            self.send_response(status)
+            if etag:
+                self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            if status != 304:
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        elif self.path.split("?", 1)[0] == "/stream" and config_shared.get_push_enabled():
+            from app.push_hub import serve_stream
+
+            serve_stream(self.path.partition("?")[2], self._send_stream_headers, self._write)
+
         else:
             self.send_response(404)
             self.end_headers()
             self.wfile.write(b"not found")
 
+    def _send_stream_headers(self, status: int) -> None:
+        """Send the response line and Server-Sent Events headers."""
+        self.send_response(status)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.flush()
+
+    def _write(self, data: bytes) -> None:
+        """Write and flush bytes to the client."""
+        self.wfile.write(data)
+        self.wfile.flush()
+
     def log_message(self, format: str, *args: object) -> None:
         """Suppress default access log output from BaseHTTPRequestHandler."""
         pass
@@ -92,7 +141,7 @@ def start_health_server() -> None:
     port = config_shared.get_healthcheck_port()  # defaults to 8081
 
     def serve() -> None:
-        with HTTPServer((host, port), HealthHandler) as httpd:
+        with ThreadingHTTPServer((host, port), HealthHandler) as httpd:
             logger.info("📡 Healthcheck server running on %s:%d", host, port)
             httpd.serve_forever()
 
@@ -8,6 +8,10 @@ Exports counters and histograms for:
 - Paper trading
 - Rate limiting
 - Optional sinks: REST, S3, database
+- Sink delivery spool
+- Sink circuit breakers
+- Adaptive sink concurrency
+- Push subscribers
 """
 
 import re
@@ -338,3 +342,226 @@ def record_queue_metrics(queue_type: str, status: str, duration_sec: float) -> N
     status = _sanitize_label(status)
     queue_publish_counter.labels(queue_type=queue_type, status=status).inc()
     queue_publish_latency.labels(queue_type=queue_type, status=status).observe(duration_sec)
+
+
+# -----------------------------
+# Dispatch Policy Metrics
+# -----------------------------
+no_pattern_suppressed_counter = Counter(
+    "no_pattern_suppressed_total",
+    "Number of 'No clear pattern' results suppressed before dispatch.",
+    ["policy"],
+)
+
+no_pattern_forwarded_counter = Counter(
+    "no_pattern_forwarded_total",
+    "Number of 'No clear pattern' results forwarded to sinks.",
+    ["policy"],
+)
+
+
+def record_no_pattern_metrics(policy: str, forwarded: int, suppressed: int) -> None:
+    """Record how many no-pattern results a dispatch policy forwarded or suppressed.
+
+    Args:
+        policy (str): Active policy name (e.g., "drop", "heartbeat", "sample").
+        forwarded (int): Number of no-pattern results passed to sinks.
+        suppressed (int): Number of no-pattern results dropped.
+
+    """
+    policy = _sanitize_label(policy)
+    if forwarded:
+        no_pattern_forwarded_counter.labels(policy=policy).inc(forwarded)
+    if suppressed:
+        no_pattern_suppressed_counter.labels(policy=policy).inc(suppressed)
+
+
+# -----------------------------
+# Spool Metrics
+# -----------------------------
+spool_appended_counter = Counter(
+    "spool_appended_total",
+    "Number of failed batches written to the on-disk spool by sink.",
+    ["sink"],
+)
+
+spool_replayed_counter = Counter(
+    "spool_replayed_total",
+    "Number of spooled batches successfully replayed to their sink.",
+    ["sink"],
+)
+
+spool_dropped_counter = Counter(
+    "spool_dropped_total",
+    "Number of spooled batches discarded because the spool exceeded its size cap.",
+    ["sink"],
+)
+
+spool_bytes_gauge = Gauge(
+    "spool_bytes",
+    "Bytes currently held in the on-disk spool by sink.",
+    ["sink"],
+)
+
+
+def record_spool_metrics(
+    sink: str,
+    appended: int = 0,
+    replayed: int = 0,
+    dropped: int = 0,
+    nbytes: int | None = None,
+) -> None:
+    """Record spool activity for a sink.
+
+    Args:
+        sink (str): Output mode whose deliveries are spooled (e.g., "rest").
+        appended (int): Batches written to the spool.
+        replayed (int): Batches successfully replayed.
+        dropped (int): Batches discarded by the size cap.
+        nbytes (Optional[int]): Current spool size in bytes, if known.
+
+    """
+    sink = _sanitize_label(sink)
+    if appended:
+        spool_appended_counter.labels(sink=sink).inc(appended)
+    if replayed:
+        spool_replayed_counter.labels(sink=sink).inc(replayed)
+    if dropped:
+        spool_dropped_counter.labels(sink=sink).inc(dropped)
+    if nbytes is not None:
+        spool_bytes_gauge.labels(sink=sink).set(nbytes)
+
+
+# -----------------------------
+# Circuit Breaker Metrics
+# -----------------------------
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+circuit_breaker_state_gauge = Gauge(
+    "circuit_breaker_state",
+    "Current sink circuit breaker state (0=closed, 1=half-open, 2=open).",
+    ["sink"],
+)
+
+circuit_breaker_transitions_counter = Counter(
+    "circuit_breaker_transitions_total",
+    "Number of sink circuit breaker state transitions by target state.",
+    ["sink", "state"],
+)
+
+circuit_breaker_rejected_counter = Counter(
+    "circuit_breaker_rejected_total",
+    "Number of batches short-circuited by an open sink circuit breaker.",
+    ["sink"],
+)
+
+
+def record_circuit_state(sink: str, state: str, transition: bool = True) -> None:
+    """Record a sink circuit breaker state.
+
+    Args:
+        sink (str): Output mode guarded by the breaker (e.g., "rest").
+        state (str): New state: "closed", "half_open" or "open".
+        transition (bool): Count this as a state transition.
+
+    """
+    sink = _sanitize_label(sink)
+    circuit_breaker_state_gauge.labels(sink=sink).set(CIRCUIT_STATES.get(state, 0))
+    if transition:
+        circuit_breaker_transitions_counter.labels(sink=sink, state=_sanitize_label(state)).inc()
+
+
+def record_circuit_rejected(sink: str, count: int = 1) -> None:
+    """Record batches rejected by an open circuit breaker.
+
+    Args:
+        sink (str): Output mode guarded by the breaker.
+        count (int): Number of rejected batches.
+
+    """
+    circuit_breaker_rejected_counter.labels(sink=_sanitize_label(sink)).inc(count)
+
+
+# -----------------------------
+# Adaptive Concurrency Metrics
+# -----------------------------
+adaptive_limit_gauge = Gauge(
+    "sink_concurrency_limit",
+    "Current adaptive concurrency limit of a sink.",
+    ["sink"],
+)
+
+adaptive_inflight_gauge = Gauge(
+    "sink_inflight_requests",
+    "Requests currently in flight to a sink.",
+    ["sink"],
+)
+
+adaptive_throttled_counter = Counter(
+    "sink_throttled_total",
+    "Number of throttling events by reason (429, 503, timeout).",
+    ["sink", "reason"],
+)
+
+
+def record_adaptive_limit(sink: str, limit: int, inflight: int) -> None:
+    """Record the adaptive concurrency state of a sink.
+
+    Args:
+        sink (str): Output mode (e.g., "rest").
+        limit (int): Current concurrency limit.
+        inflight (int): Requests in flight.
+
+    """
+    sink = _sanitize_label(sink)
+    adaptive_limit_gauge.labels(sink=sink).set(limit)
+    adaptive_inflight_gauge.labels(sink=sink).set(inflight)
+
+
+def record_throttled(sink: str, reason: str) -> None:
+    """Record a throttling event for a sink.
+
+    Args:
+        sink (str): Output mode (e.g., "rest").
+        reason (str): HTTP status that throttled the sink, or "timeout".
+
+    """
+    adaptive_throttled_counter.labels(
+        sink=_sanitize_label(sink), reason=_sanitize_label(reason)
+    ).inc()
+
+
+# -----------------------------
+# Push Subscriber Metrics
+# -----------------------------
+push_subscribers_gauge = Gauge(
+    "push_subscribers",
+    "Number of clients subscribed to the detection stream.",
+)
+
+push_dropped_counter = Counter(
+    "push_dropped_total",
+    "Number of results dropped for slow stream subscribers by drop policy.",
+    ["policy"],
+)
+
+
+def record_push_subscribers(count: int) -> None:
+    """Record the number of connected stream subscribers.
+
+    Args:
+        count (int): Connected subscribers.
+
+    """
+    push_subscribers_gauge.set(count)
+
+
+def record_push_dropped(policy: str, count: int) -> None:
+    """Record results dropped for a slow stream subscriber.
+
+    Args:
+        policy (str): Drop policy that applied ('oldest', 'newest', 'disconnect').
+        count (int): Number of dropped results.
+
+    """
+    push_dropped_counter.labels(policy=_sanitize_label(policy)).inc(count)
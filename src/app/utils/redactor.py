@@ -19,6 +19,27 @@ SENSITIVE_KEYS = {
 }
 
 
+def has_sensitive_keys(obj: Any) -> bool:
+    """Check whether a structure contains any sensitive key, without copying it.
+
+    Args:
+        obj (Any): The input data (typically a dict or list of dicts).
+
+    Returns:
+        bool: True if ``redact_dict`` would redact anything.
+
+    """
+    if isinstance(obj, dict):
+        return any(
+            (isinstance(k, str) and k.lower() in SENSITIVE_KEYS) or has_sensitive_keys(v)
+            for k, v in obj.items()
+        )
+    elif isinstance(obj, list):
+        return any(has_sensitive_keys(item) for item in obj)
+    else:
+        return False
+
+
 def redact_dict(obj: Any) -> Any:
     """Recursively redacts sensitive keys in a dictionary.
 
@@ -0,0 +1,132 @@
+import importlib.util
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app.arrow_ipc import ArrowIpcReader, ArrowIpcWriter, list_segments, read_segment
+from app.encoded_batch import EncodedBatch
+
+
+def _result(symbol="AAPL", timestamp="2025-04-16T10:00:00", close=101.5):
+    return {
+        "symbol": symbol,
+        "timestamp": timestamp,
+        "pattern": "Doji",
+        "model": "candlestick",
+        "model_version": "1.0",
+        "raw_data": {"data": {"open": 100, "high": 102, "low": 99, "close": close}},
+    }
+
+
+def test_list_segments_ignores_partial_and_foreign_files(tmp_path):
+    for name in ("0000000000000002.arrow", "0000000000000010.arrow"):
+        (tmp_path / name).write_bytes(b"")
+    (tmp_path / "0000000000000011.arrow.tmp").write_bytes(b"")
+    (tmp_path / "notes.arrow").write_bytes(b"")
+
+    assert [seq for seq, _ in list_segments(str(tmp_path))] == [2, 10]
+    assert list_segments(str(tmp_path / "missing")) == []
+
+
+def test_writer_resumes_sequence_and_removes_stale_tmp(tmp_path):
+    pytest.importorskip("pyarrow")
+    (tmp_path / "0000000000000007.arrow").write_bytes(b"")
+    (tmp_path / "0000000000000008.arrow.tmp").write_bytes(b"")
+
+    writer = ArrowIpcWriter(str(tmp_path), start_flusher=False)
+
+    assert writer._sequence == 7
+    assert not (tmp_path / "0000000000000008.arrow.tmp").exists()
+
+
+def test_reader_rejects_unknown_start(tmp_path):
+    with pytest.raises(ValueError):
+        ArrowIpcReader(str(tmp_path), start="middle")
+
+
+@pytest.mark.skipif(importlib.util.find_spec("pyarrow") is not None, reason="pyarrow installed")
+def test_missing_pyarrow_error_names_the_extra(tmp_path):
+    with pytest.raises(ImportError, match=r"stock-tech-candlestick\[arrow\]"):
+        read_segment(str(tmp_path / "0000000000000001.arrow"))
+    with pytest.raises(ImportError, match=r"stock-tech-candlestick\[arrow\]"):
+        ArrowIpcWriter(str(tmp_path), start_flusher=False)
+
+
+def test_writer_seals_segments_that_readers_map(tmp_path):
+    pytest.importorskip("pyarrow")
+    writer = ArrowIpcWriter(str(tmp_path), max_rows=2, max_segments=2, start_flusher=False)
+    reader = ArrowIpcReader(str(tmp_path))
+
+    writer.add(EncodedBatch([_result("AAPL"), _result("MSFT", close=250.0)]))
+    writer.add(EncodedBatch([_result("TSLA")]))
+    assert len(list_segments(str(tmp_path))) == 1
+
+    writer.close()
+    tables = list(reader.read_new())
+
+    assert [t.num_rows for t in tables] == [2, 1]
+    first = tables[0]
+    assert first.column("symbol").to_pylist() == ["AAPL", "MSFT"]
+    assert first.column("close").to_pylist() == [101.5, 250.0]
+    assert str(first.schema.field("timestamp").type) == "timestamp[ms, tz=UTC]"
+    assert list(reader.read_new()) == []
+
+
+def test_writer_keeps_only_newest_segments(tmp_path):
+    pytest.importorskip("pyarrow")
+    writer = ArrowIpcWriter(str(tmp_path), max_rows=1, max_segments=2, start_flusher=False)
+    for symbol in ("A", "B", "C"):
+        writer.add(EncodedBatch([_result(symbol)]))
+
+    segments = list_segments(str(tmp_path))
+    assert [seq for seq, _ in segments] == [2, 3]
+    assert read_segment(segments[-1][1]).column("symbol").to_pylist() == ["C"]
+
+    reader = ArrowIpcReader(str(tmp_path), start="latest")
+    writer.add(EncodedBatch([_result("D")]))
+    assert [t.column("symbol").to_pylist() for t in reader.read_new()] == [["D"]]
+
+
+def test_flush_without_force_waits_for_max_age(tmp_path):
+    pytest.importorskip("pyarrow")
+    now = [0.0]
+    writer = ArrowIpcWriter(
+        str(tmp_path), max_age_seconds=1.0, clock=lambda: now[0], start_flusher=False
+    )
+    writer.add(EncodedBatch([_result()]))
+
+    writer.flush(force=False)
+    assert list_segments(str(tmp_path)) == []
+
+    now[0] = 1.5
+    writer.flush(force=False)
+    assert len(list_segments(str(tmp_path))) == 1
+
+
+def test_failed_seal_hands_rows_to_on_failure(tmp_path):
+    pytest.importorskip("pyarrow")
+    failed = []
+    writer = ArrowIpcWriter(
+        str(tmp_path), max_rows=2, start_flusher=False, on_failure=failed.append
+    )
+
+    with patch("app.arrow_ipc.os.replace", side_effect=OSError("disk full")):
+        writer.add(EncodedBatch([_result("AAPL"), _result("MSFT")]))
+
+    assert list_segments(str(tmp_path)) == []
+    assert not list(tmp_path.iterdir())
+    assert len(failed) == 1
+    assert [json.loads(line)["symbol"] for line in failed[0]] == ["AAPL", "MSFT"]
+
+
+def test_failed_seal_does_not_skip_a_sequence_number(tmp_path):
+    pytest.importorskip("pyarrow")
+    writer = ArrowIpcWriter(str(tmp_path), max_rows=1, start_flusher=False, on_failure=list)
+
+    with patch("app.arrow_ipc.os.replace", side_effect=OSError("disk full")):
+        writer.add(EncodedBatch([_result("AAPL")]))
+    writer.add(EncodedBatch([_result("MSFT")]))
+    writer.add(EncodedBatch([_result("TSLA")]))
+
+    assert [seq for seq, _ in list_segments(str(tmp_path))] == [1, 2]
@@ -0,0 +1,67 @@
+from unittest.mock import patch
+
+from app import output_handler
+from app.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.encoded_batch import EncodedBatch
+
+
+def _breaker(now, **kwargs):
+    options = {"window": 4, "min_calls": 4, "open_seconds": 10, "slow_seconds": 1.0}
+    options.update(kwargs)
+    return CircuitBreaker("rest", clock=lambda: now[0], **options)
+
+
+def test_opens_on_error_rate_and_rejects():
+    now = [0.0]
+    breaker = _breaker(now)
+    for success in (True, False, True, False):
+        assert breaker.allow()
+        breaker.record(success, 0.1)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_opens_on_slow_calls():
+    breaker = _breaker([0.0], slow_rate=0.75)
+    for _ in range(3):
+        breaker.record(True, 2.0)
+    assert breaker.state == CLOSED
+    breaker.record(True, 0.1)
+    assert breaker.state == OPEN
+
+
+def test_half_open_probe_closes_or_reopens():
+    now = [0.0]
+    breaker = _breaker(now)
+    for _ in range(4):
+        breaker.record(False, 0.1)
+    now[0] = 10.0
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN
+
+    now[0] = 20.0
+    assert breaker.allow()
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+
+
+def test_dispatcher_short_circuits_open_sink():
+    dispatcher = output_handler.OutputDispatcher()
+    breaker = CircuitBreaker("rest", window=1, min_calls=1)
+    dispatcher._breakers["rest"] = breaker
+    batch = EncodedBatch([{"symbol": "AAPL"}])
+    with (
+        patch.object(
+            output_handler.config_shared, "get_circuit_breaker_enabled", return_value=True
+        ),
+        patch.object(output_handler.config_shared, "get_spool_enabled", return_value=False),
+        patch.object(dispatcher, "dispatch", return_value=False) as dispatch,
+    ):
+        [first] = dispatcher.fan_out([("rest", batch)])
+        [second] = dispatcher.fan_out([("rest", batch)])
+    assert not first.ok and not first.short_circuited
+    assert second.short_circuited and second.attempts == 0
+    assert dispatch.call_count == 1
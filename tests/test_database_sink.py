@@ -0,0 +1,219 @@
+import csv
+import io
+import json
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+import sqlalchemy
+
+from app import database_sink
+from app.database_sink import (
+    RESULT_COLUMNS,
+    bulk_load,
+    chunked,
+    copy_rows,
+    dedupe_rows,
+    get_engine,
+    get_statement,
+    insert_rows,
+    resolve_bulk_method,
+    result_to_row,
+    upsert_rows,
+    upsert_statement,
+    values_chunk_size,
+    write_results,
+)
+
+
+def _setup(tmp_path):
+    url = f"sqlite:///{tmp_path / 'out.db'}"
+    with get_engine(url).begin() as conn:
+        conn.execute(sqlalchemy.text("CREATE TABLE results (symbol TEXT, pattern TEXT)"))
+    return url
+
+
+def test_engine_and_statement_are_cached(tmp_path):
+    url = f"sqlite:///{tmp_path / 'cache.db'}"
+    assert get_engine(url) is get_engine(url)
+    assert get_statement("SELECT 1") is get_statement("SELECT 1")
+
+
+def test_chunked():
+    assert chunked([{"i": i} for i in range(5)], 2) == [
+        [{"i": 0}, {"i": 1}],
+        [{"i": 2}, {"i": 3}],
+        [{"i": 4}],
+    ]
+
+
+def test_insert_rows_executemany(tmp_path):
+    url = _setup(tmp_path)
+    rows = [{"symbol": f"S{i}", "pattern": "Doji"} for i in range(25)]
+    sql = "INSERT INTO results (symbol, pattern) VALUES (:symbol, :pattern)"
+
+    assert insert_rows(rows, url=url, sql=sql, chunk_size=10) == 25
+    with get_engine(url).connect() as conn:
+        count = conn.execute(sqlalchemy.text("SELECT COUNT(*) FROM results")).scalar()
+    assert count == 25
+
+
+def test_insert_rows_empty_is_noop(tmp_path):
+    assert insert_rows([], url="sqlite://", sql="SELECT 1") == 0
+
+
+def _result(symbol, pattern="Hammer"):
+    return {
+        "symbol": symbol,
+        "timestamp": "2025-04-16T10:00:00",
+        "pattern": pattern,
+        "model": "candlestick",
+        "model_version": "v1.0",
+        "raw_data": {"symbol": symbol, "data": {"open": 1, "high": "2", "low": 0.5, "close": 1.5}},
+    }
+
+
+def _results_table(tmp_path, name):
+    url = f"sqlite:///{tmp_path / name}"
+    columns = ", ".join(RESULT_COLUMNS)
+    with get_engine(url).begin() as conn:
+        conn.execute(sqlalchemy.text(f"CREATE TABLE candlestick_results ({columns})"))
+    return url
+
+
+def test_result_to_row_maps_ohlc():
+    row = result_to_row(_result("AAPL"))
+    assert set(row) == set(RESULT_COLUMNS)
+    assert (row["open"], row["high"], row["low"], row["close"]) == (1.0, 2.0, 0.5, 1.5)
+    assert row["volume"] is None
+    assert json.loads(row["raw_data"])["symbol"] == "AAPL"
+
+
+def test_resolve_bulk_method():
+    assert resolve_bulk_method("postgresql") == "copy"
+    assert resolve_bulk_method("sqlite") == "executemany"
+    assert resolve_bulk_method("mysql") == "values"
+    assert resolve_bulk_method("mysql", "copy") == "values"
+    assert resolve_bulk_method("postgresql", "executemany") == "executemany"
+    assert resolve_bulk_method("oracle") == "executemany"
+
+
+def test_values_chunk_size_respects_parameter_limit():
+    assert values_chunk_size("mssql", len(RESULT_COLUMNS), 1000) == 190
+    assert values_chunk_size("postgresql", len(RESULT_COLUMNS), 1000) == 1000
+    assert values_chunk_size("unknown", 3000, 1000) == 1
+
+
+@pytest.mark.parametrize("method", ["executemany", "values"])
+def test_bulk_load_sqlite(tmp_path, method):
+    url = _results_table(tmp_path, f"{method}.db")
+    rows = [result_to_row(_result(f"S{i}")) for i in range(7)]
+
+    assert bulk_load(rows, url=url, table="candlestick_results", method=method, chunk_size=3) == 7
+    with get_engine(url).connect() as conn:
+        got = conn.execute(sqlalchemy.text("SELECT symbol, close FROM candlestick_results"))
+        assert sorted(got.all()) == sorted((f"S{i}", 1.5) for i in range(7))
+
+
+class CopyStandInCursor:
+    """Local stand-in for a psycopg2 cursor that applies COPY CSV to SQLite."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.statements = []
+
+    def copy_expert(self, sql, buffer):
+        self.statements.append(sql)
+        self.payload = buffer.read()
+        table = sql.split()[1]
+        placeholders = ", ".join("?" for _ in RESULT_COLUMNS)
+        for record in csv.reader(io.StringIO(self.payload)):
+            values = [None if v == "" else v for v in record]
+            self.conn.execute(f"INSERT INTO {table} VALUES ({placeholders})", values)
+
+
+def test_copy_rows_with_stand_in(tmp_path):
+    conn = sqlite3.connect(tmp_path / "copy.db")
+    conn.execute(f"CREATE TABLE candlestick_results ({', '.join(RESULT_COLUMNS)})")
+    cursor = CopyStandInCursor(conn)
+    rows = [result_to_row(_result("AAPL")), result_to_row(_result('Q"X', pattern=""))]
+
+    assert copy_rows(cursor, "candlestick_results", rows) == 2
+    assert cursor.statements[0].startswith("COPY candlestick_results (symbol, timestamp")
+    got = conn.execute("SELECT symbol, pattern, close FROM candlestick_results").fetchall()
+    assert got == [("AAPL", "Hammer", "1.5"), ('Q"X', None, "1.5")]
+    # Empty strings stay quoted so PostgreSQL keeps them distinct from NULL.
+    assert cursor.payload.splitlines()[1].startswith('"Q""X","2025-04-16T10:00:00","",')
+    assert ",1.5,," in cursor.payload
+
+
+def test_copy_rows_quotes_identifiers():
+    cursor = CopyStandInCursor(sqlite3.connect(":memory:"))
+    copy_rows(cursor, "Reports.results; DROP TABLE x", [], columns=("symbol", "Close Price"))
+    assert cursor.statements == [
+        'COPY "Reports"."results; DROP TABLE x" (symbol, "Close Price") FROM STDIN WITH (FORMAT csv)'
+    ]
+
+
+def _upsert_table(tmp_path):
+    url = _results_table(tmp_path, "upsert.db")
+    with get_engine(url).begin() as conn:
+        conn.execute(
+            sqlalchemy.text(
+                "CREATE UNIQUE INDEX uq_results ON candlestick_results "
+                "(symbol, timestamp, model_version)"
+            )
+        )
+    return url
+
+
+def test_upsert_rows_is_idempotent(tmp_path):
+    url = _upsert_table(tmp_path)
+    first = [result_to_row(_result(s)) for s in ("AAPL", "MSFT")]
+    assert upsert_rows(first, url=url, table="candlestick_results") == 2
+    redelivered = [result_to_row(_result("AAPL", pattern="Doji")), result_to_row(_result("TSLA"))]
+    assert upsert_rows(redelivered, url=url, table="candlestick_results", chunk_size=1) == 2
+
+    with get_engine(url).connect() as conn:
+        got = conn.execute(sqlalchemy.text("SELECT symbol, pattern FROM candlestick_results"))
+        assert sorted(got.all()) == [("AAPL", "Doji"), ("MSFT", "Hammer"), ("TSLA", "Hammer")]
+
+
+def test_dedupe_rows_keeps_last_and_fills_model_version():
+    rows = [
+        {"symbol": "MSFT", "timestamp": "t", "model_version": None, "pattern": "A"},
+        {"symbol": "AAPL", "timestamp": "t", "model_version": "v1", "pattern": "B"},
+        {"symbol": "MSFT", "timestamp": "t", "model_version": None, "pattern": "C"},
+    ]
+    assert [(r["symbol"], r["pattern"], r["model_version"]) for r in dedupe_rows(rows)] == [
+        ("AAPL", "B", "v1"),
+        ("MSFT", "C", ""),
+    ]
+
+
+def test_upsert_statement_per_dialect():
+    from sqlalchemy.dialects import mysql, postgresql
+
+    pg = upsert_statement("candlestick_results", "postgresql")
+    compiled = str(pg.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (symbol, timestamp, model_version) DO UPDATE SET pattern" in compiled
+    my = upsert_statement("candlestick_results", "mysql")
+    assert "ON DUPLICATE KEY UPDATE" in str(my.compile(dialect=mysql.dialect()))
+    merge = str(upsert_statement("candlestick_results", "mssql"))
+    assert merge.startswith("MERGE INTO candlestick_results WITH (HOLDLOCK) t USING (SELECT")
+    assert "FROM dual" in str(upsert_statement("candlestick_results", "oracle"))
+    with pytest.raises(ValueError):
+        upsert_statement("candlestick_results", "firebird")
+
+
+def test_write_results_rejects_insert_sql_with_upsert():
+    with (
+        patch.object(
+            database_sink.config_shared, "get_database_insert_sql", return_value="INSERT ..."
+        ),
+        patch.object(database_sink.config_shared, "get_database_upsert_enabled", return_value=True),
+        patch.object(database_sink, "insert_rows") as insert,
+        pytest.raises(ValueError, match="DATABASE_UPSERT_ENABLED"),
+    ):
+        write_results([_result("AAPL")])
+    insert.assert_not_called()
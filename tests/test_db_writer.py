@@ -0,0 +1,107 @@
+import threading
+from concurrent.futures import Future
+from unittest.mock import patch
+
+import pytest
+
+from app import output_handler
+from app.circuit_breaker import CircuitBreaker
+from app.db_writer import WriteBehindWriter, combine_futures
+from app.encoded_batch import EncodedBatch
+
+
+def test_submissions_are_coalesced_into_one_transaction():
+    written = []
+    release = threading.Event()
+
+    def write(rows):
+        release.wait(2)
+        written.append(list(rows))
+        return len(rows)
+
+    writer = WriteBehindWriter(write, max_rows=100, max_seconds=5)
+    futures = [writer.submit([{"n": i}]) for i in range(3)]
+    futures.append(writer.submit([{"n": 3}] * 97))  # reaches max_rows
+    release.set()
+    assert [f.result(timeout=2) for f in futures] == [1, 1, 1, 97]
+    assert len(written) == 1 and len(written[0]) == 100
+    writer.close()
+
+
+def test_futures_resolve_only_after_commit():
+    started = threading.Event()
+    release = threading.Event()
+
+    def write(rows):
+        started.set()
+        release.wait(2)
+        return len(rows)
+
+    writer = WriteBehindWriter(write, max_rows=1)
+    future = writer.submit([{"n": 1}])
+    assert started.wait(2)
+    assert not future.done()
+    release.set()
+    assert future.result(timeout=2) == 1
+    writer.close()
+
+
+def test_failed_transaction_fails_every_future():
+    def write(rows):
+        raise RuntimeError("deadlock")
+
+    writer = WriteBehindWriter(write, max_rows=10, max_seconds=0.05)
+    futures = [writer.submit([{"n": i}]) for i in range(2)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="deadlock"):
+            future.result(timeout=2)
+    writer.close()
+
+
+def test_close_commits_queued_rows_and_rejects_new_ones():
+    written = []
+    writer = WriteBehindWriter(lambda rows: written.extend(rows) or len(rows), max_seconds=60)
+    future = writer.submit([{"n": 1}])
+    writer.close()
+    assert future.result(timeout=0) == 1 and written == [{"n": 1}]
+    with pytest.raises(RuntimeError):
+        writer.submit([{"n": 2}])
+
+
+def test_combine_futures():
+    writer = WriteBehindWriter(lambda rows: len(rows), max_rows=1)
+    ok = combine_futures([writer.submit([{"n": 1}]), writer.submit([{"n": 2}])])
+    assert ok.result(timeout=2) is None
+    writer.close()
+
+    failing = WriteBehindWriter(lambda rows: 1 / 0, max_rows=1)
+    combined = combine_futures([failing.submit([{"n": 1}])])
+    with pytest.raises(ZeroDivisionError):
+        combined.result(timeout=2)
+    failing.close()
+    assert combine_futures([]).done()
+
+
+def test_failed_write_behind_commit_is_recorded_and_spooled():
+    dispatcher = output_handler.OutputDispatcher()
+    breaker = CircuitBreaker("database", window=1, min_calls=1)
+    dispatcher._breakers["database"] = breaker
+    commit = Future()
+    spooled = []
+    with (
+        patch.object(
+            output_handler.config_shared, "get_circuit_breaker_enabled", return_value=True
+        ),
+        patch.object(dispatcher, "dispatch", return_value=commit),
+        patch.object(
+            dispatcher, "_spool", side_effect=lambda mode, lines: spooled.append(lines) or True
+        ),
+    ):
+        [outcome] = dispatcher.fan_out([("database", EncodedBatch([{"symbol": "AAPL"}]))])
+        assert outcome.ok and breaker.state == "closed"
+
+        commit.set_exception(RuntimeError("deadlock"))
+
+    assert breaker.state == "open"
+    assert spooled == [[b'{"symbol":"AAPL"}']]
+    assert outcome.pending.result() is None
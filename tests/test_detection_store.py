@@ -0,0 +1,80 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app.detection_store import DetectionStore, handle_query
+from app.encoded_batch import EncodedBatch
+
+T0 = datetime(2025, 4, 16, 10, 0, tzinfo=timezone.utc).timestamp()
+
+
+def _detection(symbol, pattern, minute):
+    return {
+        "symbol": symbol,
+        "pattern": pattern,
+        "timestamp": f"2025-04-16T10:{minute:02d}:00Z",
+        "model": "candlestick",
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    now = [T0 + 3600]
+    store = DetectionStore(
+        str(tmp_path / "detections.db"), retention_seconds=7200, clock=lambda: now[0]
+    )
+    store.write(
+        EncodedBatch(
+            [
+                _detection("AAPL", "Hammer", 5),
+                _detection("MSFT", "Hammer", 20),
+                _detection("AAPL", "Doji", 40),
+                _detection("TSLA", "Hammer", 55),
+            ]
+        )
+    )
+    store.now = now
+    yield store
+    store.close()
+
+
+def test_query_filters_newest_first(store):
+    assert [d["symbol"] for d in store.query(pattern="Hammer")] == ["TSLA", "MSFT", "AAPL"]
+    assert [d["pattern"] for d in store.query(symbol="AAPL")] == ["Doji", "Hammer"]
+    recent = store.query(pattern="Hammer", since="2025-04-16T10:15:00Z", until=T0 + 50 * 60)
+    assert [d["symbol"] for d in recent] == ["MSFT"]
+    assert len(store.query(limit=2)) == 2
+
+
+def test_query_uses_indexes(store):
+    plan = store._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT payload FROM detections WHERE pattern = ? AND ts >= ?",
+        ("Hammer", 0),
+    ).fetchall()
+    assert "idx_detections_pattern_ts" in " ".join(str(row) for row in plan)
+
+
+def test_pattern_counts(store):
+    assert store.pattern_counts() == {
+        "Doji": {"AAPL": 1},
+        "Hammer": {"AAPL": 1, "MSFT": 1, "TSLA": 1},
+    }
+    assert store.pattern_counts(symbol="AAPL", since=T0 + 30 * 60) == {"Doji": {"AAPL": 1}}
+
+
+def test_prune_drops_rows_past_retention(store):
+    store.now[0] = T0 + 7200 + 30 * 60
+    assert store.prune() == 2
+    assert [d["symbol"] for d in store.query()] == ["TSLA", "AAPL"]
+
+
+def test_handle_query(store):
+    status, body = handle_query("pattern=Hammer&minutes=45", store=store)
+    assert status == 200
+    assert [d["symbol"] for d in json.loads(body)] == ["TSLA", "MSFT"]
+
+    status, body = handle_query("group=pattern", store=store)
+    assert json.loads(body)["Hammer"]["TSLA"] == 1
+
+    assert handle_query("since=yesterday", store=store)[0] == 400
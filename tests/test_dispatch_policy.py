@@ -0,0 +1,49 @@
+from app.dispatch_policy import NoPatternPolicy
+from app.processor import NO_PATTERN
+
+
+def _batch():
+    return [
+        {"symbol": "AAPL", "pattern": NO_PATTERN},
+        {"symbol": "AAPL", "pattern": "Hammer"},
+        {"symbol": "AAPL", "pattern": NO_PATTERN},
+        {"symbol": "MSFT", "pattern": NO_PATTERN},
+    ]
+
+
+def test_pass_policy_forwards_everything():
+    batch = _batch()
+    assert NoPatternPolicy("pass").filter(batch) is batch
+
+
+def test_drop_policy_keeps_only_patterns():
+    result = NoPatternPolicy("drop").filter(_batch())
+    assert [r["pattern"] for r in result] == ["Hammer"]
+
+
+def test_heartbeat_policy_once_per_symbol_per_interval():
+    now = [0.0]
+    policy = NoPatternPolicy("heartbeat", heartbeat_seconds=60, clock=lambda: now[0])
+    first = policy.filter(_batch())
+    assert [(r["symbol"], r["pattern"]) for r in first] == [
+        ("AAPL", NO_PATTERN),
+        ("AAPL", "Hammer"),
+        ("MSFT", NO_PATTERN),
+    ]
+
+    now[0] = 30.0
+    assert [r["pattern"] for r in policy.filter(_batch())] == ["Hammer"]
+
+    now[0] = 61.0
+    assert len(policy.filter(_batch())) == 3
+
+
+def test_sample_policy_uses_rate():
+    values = iter([0.001, 0.5, 0.9])
+    policy = NoPatternPolicy("sample", sample_rate=0.01, rng=lambda: next(values))
+    result = policy.filter(_batch())
+    assert [r["pattern"] for r in result] == [NO_PATTERN, "Hammer"]
+
+
+def test_unknown_policy_falls_back_to_pass():
+    assert NoPatternPolicy("bogus").policy == "pass"
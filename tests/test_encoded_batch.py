@@ -0,0 +1,32 @@
+import json
+from unittest.mock import patch
+
+from app.encoded_batch import EncodedBatch, encode_item
+
+
+def test_encode_item_is_compact():
+    assert encode_item({"a": 1, "b": "é"}) == '{"a":1,"b":"é"}'.encode("utf-8")
+
+
+def test_encodings_are_consistent():
+    items = [{"symbol": "AAPL", "pattern": "Doji"}, {"symbol": "MSFT", "pattern": "Hammer"}]
+    batch = EncodedBatch(items)
+    assert json.loads(batch.json_bytes) == items
+    assert [json.loads(line) for line in batch.ndjson.splitlines()] == items
+    assert batch.nbytes == sum(len(b) for b in batch.item_bytes)
+    assert len(batch) == 2
+
+
+def test_items_are_encoded_once():
+    batch = EncodedBatch([{"a": 1}, {"b": 2}])
+    with patch("app.encoded_batch.encode_item", wraps=encode_item) as spy:
+        batch.json_bytes
+        batch.ndjson
+        batch.item_bytes
+    assert spy.call_count == 2
+
+
+def test_empty_batch():
+    batch = EncodedBatch([])
+    assert batch.json_bytes == b"[]"
+    assert batch.ndjson == b""
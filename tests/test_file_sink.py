@@ -0,0 +1,85 @@
+import gzip
+import json
+
+from app.encoded_batch import EncodedBatch
+from app.file_sink import RotatingFileSink
+
+
+def _batch(*rows):
+    return EncodedBatch(
+        [{"symbol": symbol, "timestamp": ts, "pattern": "Doji"} for symbol, ts in rows]
+    )
+
+
+def test_writes_ndjson_and_rotates_with_index(tmp_path):
+    sink = RotatingFileSink(str(tmp_path), prefix="test")
+    sink.write(_batch(("AAPL", "2025-04-16T10:00:00"), ("MSFT", "2025-04-16T10:05:00")))
+    sink.write(_batch(("AAPL", "2025-04-16T09:00:00")))
+    sink.close()
+
+    [data_file] = tmp_path.glob("test-*.ndjson.gz")
+    lines = gzip.decompress(data_file.read_bytes()).splitlines()
+    assert [json.loads(line)["symbol"] for line in lines] == ["AAPL", "MSFT", "AAPL"]
+
+    index = json.loads((tmp_path / f"{data_file.name}.index.json").read_text())
+    assert index["file"] == data_file.name
+    assert index["records"] == 3
+    assert index["first"] == "2025-04-16T09:00:00+00:00"
+    assert index["last"] == "2025-04-16T10:05:00+00:00"
+    assert index["symbols"]["AAPL"] == {
+        "count": 2,
+        "first": "2025-04-16T09:00:00+00:00",
+        "last": "2025-04-16T10:00:00+00:00",
+    }
+
+
+def test_rotates_by_size(tmp_path):
+    sink = RotatingFileSink(str(tmp_path), max_bytes=10, compress=False)
+    for _ in range(3):
+        sink.write(_batch(("AAPL", "2025-04-16T10:00:00")))
+    sink.close()
+    assert len(list(tmp_path.glob("*.ndjson"))) == 3
+    assert len(list(tmp_path.glob("*.index.json"))) == 3
+
+
+def test_rotates_by_age(tmp_path):
+    now = [0.0]
+    sink = RotatingFileSink(str(tmp_path), max_age_seconds=60, compress=False, clock=lambda: now[0])
+    sink.write(_batch(("AAPL", "2025-04-16T10:00:00")))
+    sink.write(_batch(("AAPL", "2025-04-16T10:01:00")))
+    now[0] = 61.0
+    sink.write(_batch(("AAPL", "2025-04-16T10:02:00")))
+    sink.close()
+    counts = sorted(json.loads(p.read_text())["records"] for p in tmp_path.glob("*.index.json"))
+    assert counts == [1, 2]
+
+
+def test_flush_rotates_an_idle_file_by_age(tmp_path):
+    now = [0.0]
+    sink = RotatingFileSink(
+        str(tmp_path), max_age_seconds=60, compress=False, clock=lambda: now[0], start_flusher=False
+    )
+    sink.write(_batch(("AAPL", "2025-04-16T10:00:00")))
+    sink.flush()
+    now[0] = 61.0
+    sink.flush()
+    sink.close()
+    [index] = tmp_path.glob("*.index.json")
+    assert json.loads(index.read_text())["records"] == 1
+
+
+def test_finalizes_active_file_left_by_a_crash(tmp_path):
+    leftover = tmp_path / "test-20250416T100000-deadbeef-00001.ndjson"
+    rows = [{"symbol": "AAPL", "timestamp": "2025-04-16T10:00:00", "pattern": "Doji"}] * 2
+    leftover.write_bytes(b"".join(json.dumps(r).encode() + b"\n" for r in rows) + b'{"sym')
+    (tmp_path / "test-stale.ndjson.gz.tmp").write_bytes(b"partial")
+
+    RotatingFileSink(str(tmp_path), prefix="test").close()
+
+    assert not leftover.exists()
+    assert not list(tmp_path.glob("*.tmp"))
+    data_file = tmp_path / f"{leftover.name}.gz"
+    assert len(gzip.decompress(data_file.read_bytes()).splitlines()) == 2
+    index = json.loads((tmp_path / f"{data_file.name}.index.json").read_text())
+    assert index["records"] == 2
+    assert index["opened"] == "2025-04-16T10:00:00+00:00"
@@ -0,0 +1,67 @@
+import json
+
+from app.encoded_batch import EncodedBatch
+from app.latest_index import LatestIndex, handle_lookup
+
+
+def _result(symbol, minute, pattern="Doji"):
+    return {"symbol": symbol, "timestamp": f"2025-04-16T10:{minute:02d}:00Z", "pattern": pattern}
+
+
+def _lookup(index, query="", etag=None):
+    status, body, tag = handle_lookup(query, etag, index=index)
+    return status, json.loads(body) if body else None, tag
+
+
+def test_keeps_latest_n_per_symbol_in_candle_order():
+    index = LatestIndex(depth=2)
+    index.update(EncodedBatch([_result("AAPL", 1), _result("AAPL", 3), _result("MSFT", 2)]))
+    index.update(EncodedBatch([_result("AAPL", 2), _result("AAPL", 0)]))  # late candles
+    _, body, _ = _lookup(index)
+    assert [r["timestamp"][14:16] for r in body["AAPL"]] == ["03", "02"]
+    assert [r["timestamp"][14:16] for r in body["MSFT"]] == ["02"]
+
+
+def test_bulk_lookup_and_limit():
+    index = LatestIndex(depth=3)
+    index.update(EncodedBatch([_result(s, m) for s in ("AAPL", "MSFT", "TSLA") for m in range(3)]))
+    status, body, _ = _lookup(index, "symbols=AAPL,TSLA&symbols=NVDA&n=1")
+    assert status == 200
+    assert list(body) == ["AAPL", "TSLA", "NVDA"]
+    assert body["AAPL"] == [_result("AAPL", 2)] and body["NVDA"] == []
+    assert _lookup(index, "n=x")[0] == 400
+
+
+def test_conditional_requests():
+    index = LatestIndex()
+    index.update(EncodedBatch([_result("AAPL", 1), _result("MSFT", 1)]))
+    _, _, etag = _lookup(index, "symbols=AAPL")
+    assert _lookup(index, "symbols=AAPL", etag)[0] == 304
+
+    index.update(EncodedBatch([_result("MSFT", 2)]))
+    assert _lookup(index, "symbols=AAPL", etag)[0] == 304  # AAPL unchanged
+    index.update(EncodedBatch([_result("AAPL", 2)]))
+    status, body, new_etag = _lookup(index, "symbols=AAPL", etag)
+    assert status == 200 and new_etag != etag and body["AAPL"][0] == _result("AAPL", 2)
+
+
+def test_results_without_timestamp_are_ordered_by_arrival():
+    now = [1744797660.0]  # 2025-04-16T10:01:00Z
+    index = LatestIndex(depth=2, clock=lambda: now[0])
+    index.update(EncodedBatch([{"symbol": "AAPL", "pattern": "late"}, _result("AAPL", 2)]))
+    now[0] += 120
+    index.update(EncodedBatch([_result("AAPL", 0)]))
+    _, body, _ = _lookup(index)
+    assert [r["pattern"] for r in body["AAPL"]] == ["Doji", "late"]
+
+    index.update(EncodedBatch([_result("AAPL", 3)]))
+    assert [r["timestamp"][14:16] for r in _lookup(index)[1]["AAPL"]] == ["03", "02"]
+
+
+def test_etags_do_not_survive_a_restart():
+    batch = EncodedBatch([_result("AAPL", 1)])
+    before, after = LatestIndex(), LatestIndex()
+    before.update(batch)
+    after.update(batch)
+    _, _, etag = _lookup(before)
+    assert _lookup(after, etag=etag)[0] == 200
@@ -0,0 +1,68 @@
+import json
+
+from app.output_aggregator import OutputAggregator, SinkBuffer
+
+
+class FakeDispatcher:
+    def __init__(self, modes):
+        self.modes = modes
+        self.sent = []
+
+    def prepare(self, data):
+        return data
+
+    def active_modes(self):
+        return self.modes
+
+    def dispatch(self, mode, batch):
+        self.sent.append((mode, [json.loads(b) for b in batch.item_bytes]))
+
+    def fan_out(self, deliveries):
+        for mode, batch in deliveries:
+            self.dispatch(mode, batch)
+
+
+def _aggregator(dispatcher, now, **limits):
+    defaults = {"s3": (3, 0, 10.0), "rest": (100, 40, 10.0)}
+    defaults.update(limits)
+
+    def factory(mode):
+        count, size, linger = defaults[mode]
+        return SinkBuffer(count, size, linger)
+
+    return OutputAggregator(
+        dispatcher, buffer_factory=factory, clock=lambda: now[0], start_flusher=False
+    )
+
+
+def test_flush_on_max_count_per_sink():
+    dispatcher = FakeDispatcher(["s3"])
+    aggregator = _aggregator(dispatcher, [0.0])
+    for i in range(7):
+        aggregator.add([{"i": i}])
+    assert [len(items) for _, items in dispatcher.sent] == [3, 3]
+    aggregator.close()
+    assert dispatcher.sent[-1] == ("s3", [{"i": 6}])
+
+
+def test_flush_on_max_bytes():
+    dispatcher = FakeDispatcher(["rest"])
+    aggregator = _aggregator(dispatcher, [0.0])
+    aggregator.add([{"payload": "x" * 20}])
+    assert dispatcher.sent == []
+    aggregator.add([{"payload": "y" * 20}])
+    assert len(dispatcher.sent) == 1
+    assert len(dispatcher.sent[0][1]) == 2
+
+
+def test_flush_on_linger():
+    now = [0.0]
+    dispatcher = FakeDispatcher(["s3", "rest"])
+    aggregator = _aggregator(dispatcher, now, rest=(100, 0, 1.0))
+    aggregator.add([{"i": 1}])
+    aggregator.flush(force=False)
+    assert dispatcher.sent == []
+
+    now[0] = 2.0
+    aggregator.flush(force=False)
+    assert dispatcher.sent == [("rest", [{"i": 1}])]
@@ -18,3 +18,55 @@ def test_send_print(mock_modes, mock_logger):
 def test_send_noop(mock_modes, mock_logger):
     output_handler.send({"test": "value"})
     mock_logger.warning.assert_called()
+
+
+def _dispatcher():
+    return output_handler.OutputDispatcher()
+
+
+def test_stdout_writes_compact_batch_once(capsys):
+    batch = output_handler.EncodedBatch([{"symbol": "AAPL"}, {"symbol": "MSFT"}])
+    with patch.object(output_handler.config_shared, "get_output_pretty_print", return_value=False):
+        assert _dispatcher()._output_to_stdout(batch)
+    assert capsys.readouterr().out == '{"symbol":"AAPL"}\n{"symbol":"MSFT"}\n'
+
+
+def test_log_redacts_only_sensitive_items():
+    batch = output_handler.EncodedBatch([{"symbol": "AAPL"}, {"symbol": "MSFT", "token": "abc"}])
+    with (
+        patch.object(output_handler.config_shared, "get_output_pretty_print", return_value=False),
+        patch.object(output_handler, "logger") as mock_logger,
+        patch.object(output_handler, "redact_dict", wraps=output_handler.redact_dict) as redact,
+    ):
+        _dispatcher()._output_to_log(batch)
+    mock_logger.info.assert_called_once()
+    rendered = mock_logger.info.call_args.args[2]
+    assert rendered == '{"symbol":"AAPL"}\n{"symbol":"MSFT","token":"***REDACTED***"}'
+    redact.assert_called_once_with({"symbol": "MSFT", "token": "abc"})
+
+
+def test_pretty_print_is_opt_in():
+    batch = output_handler.EncodedBatch([{"symbol": "AAPL"}])
+    with patch.object(output_handler.config_shared, "get_output_pretty_print", return_value=True):
+        assert output_handler._render_batch(batch) == '{\n    "symbol": "AAPL"\n}'
+
+
+def test_paper_trades_are_batched_into_database_upserts():
+    written = []
+    trade = {"symbol": "AAPL", "action": "BUY", "quantity": 1, "price": 2.0, "timestamp": "t"}
+    config = output_handler.config_shared
+    with (
+        patch.object(config, "get_paper_trading_database_enabled", return_value=True),
+        patch.object(config, "get_paper_trading_batch_max_rows", return_value=3),
+        patch.object(config, "get_paper_trading_batch_max_seconds", return_value=5),
+        patch(
+            "app.paper_trade_store.upsert_trades",
+            side_effect=lambda trades: written.append(trades) or len(trades),
+        ),
+    ):
+        dispatcher = _dispatcher()
+        first = dispatcher.send_trade_simulation(trade)
+        second = dispatcher.send_trade_simulation([trade, trade])
+        assert first.result(timeout=2) == 1 and second.result(timeout=2) == 2
+        dispatcher.close()
+    assert written == [[trade, trade, trade]]
@@ -0,0 +1,73 @@
+import sqlalchemy
+from sqlalchemy.dialects import mysql, postgresql
+
+from app.database_sink import get_engine
+from app.paper_trade_store import (
+    prepare_trades,
+    trade_table,
+    trade_to_row,
+    upsert_statement,
+    upsert_trades,
+)
+
+
+def _trade(symbol="AAPL", price=101.5, **kwargs):
+    trade = {
+        "symbol": symbol,
+        "action": "BUY",
+        "quantity": 10,
+        "price": price,
+        "timestamp": "2025-04-16T10:00:00",
+        "strategy_id": "doji-reversal",
+    }
+    trade.update(kwargs)
+    return trade
+
+
+def _store(tmp_path):
+    url = f"sqlite:///{tmp_path / 'trades.db'}"
+    trade_table("paper_trades").metadata.create_all(get_engine(url))
+    return url
+
+
+def test_prepare_trades_validates_and_dedupes():
+    rows = prepare_trades(
+        [
+            _trade(price=1),
+            _trade(action="HOLD"),
+            {"symbol": "MSFT"},
+            _trade(price=2),
+            _trade(symbol="MSFT", strategy_id=None),
+        ]
+    )
+    assert [(r["symbol"], r["price"]) for r in rows] == [("AAPL", 2.0), ("MSFT", 101.5)]
+    assert rows[1]["strategy_id"] == "default"
+
+
+def test_upsert_is_idempotent(tmp_path):
+    url = _store(tmp_path)
+    assert upsert_trades([_trade(), _trade(symbol="MSFT")], url=url) == 2
+    assert upsert_trades([_trade(price=99.0, notes="refill")], url=url) == 1
+
+    with get_engine(url).connect() as conn:
+        got = conn.execute(sqlalchemy.text("SELECT symbol, price, notes FROM paper_trades"))
+        assert sorted(got.all()) == [("AAPL", 99.0, "refill"), ("MSFT", 101.5, None)]
+
+
+def test_upsert_ignores_empty_and_invalid_batches(tmp_path):
+    url = _store(tmp_path)
+    assert upsert_trades([], url=url) == 0
+    assert upsert_trades([{"symbol": "AAPL"}], url=url) == 0
+
+
+def test_upsert_statement_per_dialect():
+    table = trade_table("paper_trades")
+    pg = str(upsert_statement(table, "postgresql").compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (strategy_id, symbol, timestamp) DO UPDATE" in pg
+    my = str(upsert_statement(table, "mysql").compile(dialect=mysql.dialect()))
+    assert "ON DUPLICATE KEY UPDATE" in my
+
+
+def test_trade_to_row_defaults():
+    row = trade_to_row(_trade(quantity=3))
+    assert row["quantity"] == 3.0 and row["notes"] is None
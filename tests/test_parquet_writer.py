@@ -0,0 +1,126 @@
+import importlib.util
+import io
+import json
+import math
+
+import pytest
+
+from app.encoded_batch import EncodedBatch
+from app.parquet_writer import ColumnBuffer, ParquetWriter
+from app.s3_writer import parse_timestamp
+
+
+def _result(symbol="AAPL", timestamp="2025-04-16T10:00:00", pattern="Doji", close=101.5):
+    return {
+        "symbol": symbol,
+        "timestamp": timestamp,
+        "pattern": pattern,
+        "model": "candlestick",
+        "model_version": "1.0",
+        "raw_data": {"data": {"open": 100, "high": 102, "low": 99, "close": close}},
+    }
+
+
+class LocalS3:
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[(Bucket, Key)] = Body
+
+
+def test_column_buffer_appends_into_columns():
+    buffer = ColumnBuffer(created=0.0)
+    item = _result(close=None)
+    buffer.append(item, parse_timestamp(item["timestamp"]))
+
+    assert len(buffer) == 1
+    assert buffer.strings["symbol"] == ["AAPL"]
+    assert buffer.strings["pattern"] == ["Doji"]
+    assert buffer.timestamps[0] == 1744797600000
+    assert buffer.prices["open"][0] == 100.0
+    assert math.isnan(buffer.prices["close"][0])
+    assert math.isnan(buffer.prices["volume"][0])
+
+
+def test_writer_rejects_unknown_target():
+    with pytest.raises(ValueError):
+        ParquetWriter(target="ftp", start_flusher=False)
+
+
+@pytest.mark.skipif(importlib.util.find_spec("pyarrow") is not None, reason="pyarrow installed")
+def test_writer_requires_pyarrow():
+    with pytest.raises(ImportError, match=r"stock-tech-candlestick\[parquet\]"):
+        ParquetWriter(bucket="bucket", start_flusher=False)
+
+
+def test_writer_buffers_per_day_until_max_rows():
+    pytest.importorskip("pyarrow")
+    writer = ParquetWriter(bucket="bucket", max_rows=10, start_flusher=False)
+    writer.add(
+        EncodedBatch([_result(), _result(timestamp="2025-04-17T01:00:00"), _result(symbol="MSFT")])
+    )
+    assert {day: len(buf) for day, buf in writer._buffers.items()} == {
+        "2025-04-16": 2,
+        "2025-04-17": 1,
+    }
+
+
+def test_writer_uploads_typed_parquet_to_s3():
+    pq = pytest.importorskip("pyarrow.parquet")
+    s3 = LocalS3()
+    writer = ParquetWriter(
+        bucket="bucket",
+        prefix="parquet",
+        max_rows=2,
+        client_factory=lambda: s3,
+        start_flusher=False,
+    )
+    writer.add(EncodedBatch([_result(), _result(symbol="MSFT", pattern="Hammer")]))
+
+    [(bucket, key)] = s3.objects
+    assert key.startswith("parquet/dt=2025-04-16/part-00001-")
+    table = pq.read_table(io.BytesIO(s3.objects[(bucket, key)]))
+    assert table.column("symbol").to_pylist() == ["AAPL", "MSFT"]
+    assert table.column("close").to_pylist() == [101.5, 101.5]
+    assert str(table.schema.field("timestamp").type) == "timestamp[ms, tz=UTC]"
+
+
+def test_writer_writes_local_files(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    writer = ParquetWriter(target="local", directory=str(tmp_path), start_flusher=False)
+    writer.add(EncodedBatch([_result()]))
+    writer.close()
+
+    [path] = list(tmp_path.glob("dt=2025-04-16/*.parquet"))
+    assert pq.read_table(path).num_rows == 1
+
+
+def test_failed_write_hands_rows_to_on_failure():
+    pytest.importorskip("pyarrow")
+
+    class FailingS3:
+        def put_object(self, **kwargs):
+            raise OSError("unreachable")
+
+    failed = []
+    writer = ParquetWriter(
+        bucket="bucket",
+        client_factory=FailingS3,
+        start_flusher=False,
+        on_failure=failed.append,
+    )
+    writer.add(EncodedBatch([_result(close=None)]))
+    writer.close()
+
+    [lines] = failed
+    assert [json.loads(line) for line in lines] == [
+        {
+            "symbol": "AAPL",
+            "pattern": "Doji",
+            "model": "candlestick",
+            "model_version": "1.0",
+            "timestamp": "2025-04-16T10:00:00+00:00",
+            "raw_data": {"data": {"open": 100.0, "high": 102.0, "low": 99.0}},
+        }
+    ]
@@ -0,0 +1,77 @@
+import threading
+import time
+from unittest.mock import patch
+
+from app import push_hub
+from app.encoded_batch import EncodedBatch
+from app.push_hub import PushHub, Subscriber, serve_stream
+
+
+def _batch(*pairs):
+    return EncodedBatch([{"symbol": s, "pattern": p} for s, p in pairs])
+
+
+def test_filters_by_symbol_and_pattern():
+    hub = PushHub()
+    hammers = hub.subscribe(patterns={"Hammer"})
+    aapl = hub.subscribe(symbols={"AAPL"})
+    hub.publish(_batch(("AAPL", "Doji"), ("MSFT", "Hammer"), ("AAPL", "Hammer")))
+    assert hammers.take(10, 0) == [
+        b'{"symbol":"MSFT","pattern":"Hammer"}',
+        b'{"symbol":"AAPL","pattern":"Hammer"}',
+    ]
+    assert len(aapl.take(10, 0)) == 2
+
+
+def test_drop_oldest_and_newest():
+    oldest = Subscriber(max_buffer=3, drop_policy="oldest")
+    newest = Subscriber(max_buffer=3, drop_policy="newest")
+    for sub in (oldest, newest):
+        assert sub.offer([b"1", b"2"]) == 0
+        assert sub.offer([b"3", b"4"]) == 1
+        assert sub.offer([b"5", b"6", b"7", b"8"]) == 4
+    assert oldest.take(10, 0) == [b"6", b"7", b"8"]
+    assert newest.take(10, 0) == [b"1", b"2", b"3"]
+
+
+def test_disconnect_policy_removes_slow_subscriber():
+    hub = PushHub(max_buffer=1, drop_policy="disconnect")
+    slow = hub.subscribe()
+    hub.publish(_batch(("AAPL", "Doji"), ("MSFT", "Doji")))
+    assert slow.closed and hub.subscriber_count == 0
+
+
+def test_subscriber_limit():
+    hub = PushHub(max_subscribers=1)
+    assert hub.subscribe() is not None
+    assert hub.subscribe() is None
+
+
+def test_serve_stream_writes_batched_frames():
+    hub = PushHub()
+    written, statuses = [], []
+    done = threading.Event()
+
+    def write(data):
+        written.append(data)
+        if data.startswith(b"event:"):
+            raise BrokenPipeError  # client goes away after the first frame
+
+    with (
+        patch.object(push_hub.config_shared, "get_push_max_frame_items", return_value=10),
+        patch.object(push_hub.config_shared, "get_push_keepalive_seconds", return_value=2),
+    ):
+        thread = threading.Thread(
+            target=lambda: (serve_stream("symbols=AAPL", statuses.append, write, hub), done.set())
+        )
+        thread.start()
+        while hub.subscriber_count == 0:
+            time.sleep(0.001)
+        hub.publish(_batch(("AAPL", "Doji"), ("MSFT", "Doji"), ("AAPL", "Hammer")))
+        assert done.wait(2)
+    assert statuses == [200]
+    assert written[-1] == (
+        b'event: detections\ndata: [{"symbol":"AAPL","pattern":"Doji"},'
+        b'{"symbol":"AAPL","pattern":"Hammer"}]\n\n'
+    )
+    assert hub.subscriber_count == 0
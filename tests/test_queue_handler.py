@@ -1,2 +1,37 @@
+from concurrent.futures import Future
+from unittest.mock import MagicMock, patch
+
+from app import queue_handler
+
+
 def test_queue_handler_imports():
     import app.queue_handler
+
+
+def test_prefetch_covers_the_write_behind_window():
+    with (
+        patch.object(queue_handler.config, "get_batch_size", return_value=10),
+        patch.object(queue_handler.config, "get_db_write_behind_enabled", return_value=True),
+        patch.object(queue_handler.config, "get_db_write_behind_max_rows", return_value=5000),
+        patch.object(queue_handler.config, "get_db_write_behind_threads", return_value=2),
+    ):
+        assert queue_handler._prefetch_count() == 10000
+        with patch.object(queue_handler.config, "get_db_write_behind_threads", return_value=20):
+            assert queue_handler._prefetch_count() == 65535
+        with patch.object(queue_handler.config, "get_db_write_behind_enabled", return_value=False):
+            assert queue_handler._prefetch_count() == 10
+
+
+def test_failed_deferred_write_is_requeued_once():
+    failed = Future()
+    failed.set_exception(RuntimeError("commit failed"))
+    ch = MagicMock()
+
+    queue_handler._settle_rabbitmq_message(ch, 1, False, failed)
+    queue_handler._settle_rabbitmq_message(ch, 2, True, failed)
+
+    assert [c.kwargs for c in ch.basic_nack.call_args_list] == [
+        {"delivery_tag": 1, "requeue": True},
+        {"delivery_tag": 2, "requeue": False},
+    ]
+    ch.basic_ack.assert_not_called()
@@ -0,0 +1,169 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app import queue_sender
+from app.queue_sender import _chunk_sqs_entries, publish_to_queue
+
+
+@pytest.fixture
+def rabbitmq_config():
+    with (
+        patch.object(queue_sender.config_shared, "get_queue_type", return_value="rabbitmq"),
+        patch.object(queue_sender.config_shared, "get_queue_publish_max_attempts", return_value=3),
+        patch.object(
+            queue_sender.config_shared, "get_queue_publish_backoff_seconds", return_value=(0, 0)
+        ),
+        patch.object(
+            queue_sender.config_shared, "get_queue_publish_deadline_seconds", return_value=5
+        ),
+    ):
+        yield
+
+
+def test_only_failed_messages_are_retried(rabbitmq_config):
+    calls = []
+
+    def sender(payload, bodies, indexes, queue, exchange, deadline=None):
+        calls.append(list(indexes))
+        return {1: "boom"} if len(calls) == 1 else {}
+
+    with patch.object(queue_sender, "_send_batch_to_rabbitmq", side_effect=sender):
+        result = publish_to_queue([{"a": 1}, {"b": 2}, {"c": 3}])
+
+    assert calls == [[0, 1, 2], [1]]
+    assert result.ok
+    assert result.succeeded == [0, 1, 2]
+    assert result.attempts == 2
+
+
+def test_persistent_failures_are_reported(rabbitmq_config):
+    sender = MagicMock(
+        side_effect=lambda p, b, idx, q, e, deadline=None: {i: "down" for i in idx if i == 0}
+    )
+    with patch.object(queue_sender, "_send_batch_to_rabbitmq", sender):
+        result = publish_to_queue([{"a": 1}, {"b": 2}])
+
+    assert sender.call_count == 3
+    assert result.failed == {0: "down"}
+    assert result.succeeded == [1]
+    assert not result.ok
+
+
+def test_deadline_stops_retries(rabbitmq_config):
+    sender = MagicMock(return_value={0: "down"})
+    with (
+        patch.object(queue_sender, "_send_batch_to_rabbitmq", sender),
+        patch.object(
+            queue_sender.config_shared, "get_queue_publish_backoff_seconds", return_value=(10, 10)
+        ),
+    ):
+        result = publish_to_queue([{"a": 1}])
+
+    assert sender.call_count == 1
+    assert result.failed == {0: "down"}
+
+
+def test_chunk_sqs_entries_respects_limits():
+    bodies = [b"x" * 10] * 25
+    chunks = _chunk_sqs_entries(bodies, list(range(25)))
+    assert [len(c) for c in chunks] == [10, 10, 5]
+
+    big = [b"x" * (200 * 1024), b"y" * (100 * 1024)]
+    assert _chunk_sqs_entries(big, [0, 1]) == [[0], [1]]
+
+
+def test_sqs_batch_reports_failed_entries():
+    client = MagicMock()
+    client.send_message_batch.return_value = {
+        "ResponseMetadata": {"HTTPStatusCode": 200},
+        "Successful": [{"Id": "0"}],
+        "Failed": [{"Id": "2", "Code": "InternalError"}],
+    }
+    with (
+        patch.object(queue_sender, "_get_sqs_client", return_value=client),
+        patch.object(queue_sender.config_shared, "get_sqs_queue_url", return_value="url"),
+    ):
+        errors = queue_sender._send_batch_to_sqs([{}, {}, {}], [b"{}"] * 3, [0, 2])
+
+    assert errors == {2: "InternalError"}
+    entries = client.send_message_batch.call_args.kwargs["Entries"]
+    assert [e["Id"] for e in entries] == ["0", "2"]
+
+
+def test_sqs_skips_requests_after_deadline():
+    client = MagicMock()
+    with (
+        patch.object(queue_sender, "_get_sqs_client", return_value=client),
+        patch.object(queue_sender.config_shared, "get_sqs_queue_url", return_value="url"),
+        patch.object(queue_sender, "_deadline_passed", side_effect=[False, True]),
+    ):
+        client.send_message_batch.return_value = {"ResponseMetadata": {"HTTPStatusCode": 200}}
+        errors = queue_sender._send_batch_to_sqs(
+            [{}] * 12, [b"{}"] * 12, list(range(12)), deadline=0.0
+        )
+
+    assert client.send_message_batch.call_count == 1
+    assert errors == {10: "publish deadline exceeded", 11: "publish deadline exceeded"}
+
+
+def test_rabbitmq_stops_publishing_at_deadline():
+    channel = MagicMock()
+    connection = MagicMock()
+    connection.__enter__.return_value.channel.return_value = channel
+    settings = {
+        "get_rabbitmq_user": "guest",
+        "get_rabbitmq_password": "guest",
+        "get_rabbitmq_host": "localhost",
+        "get_rabbitmq_port": 5672,
+        "get_rabbitmq_vhost": "/",
+    }
+    with (
+        patch.multiple(
+            queue_sender.config_shared, **{k: lambda v=v: v for k, v in settings.items()}
+        ),
+        patch.object(queue_sender.pika, "BlockingConnection", return_value=connection),
+        patch.object(
+            queue_sender.config_shared, "get_rabbitmq_publish_confirms", return_value=False
+        ),
+        patch.object(queue_sender.config_shared, "get_rabbitmq_exchange", return_value=""),
+        patch.object(queue_sender, "resolve_routing_key", return_value="q"),
+        patch.object(queue_sender, "_deadline_passed", side_effect=[False, True]),
+    ):
+        errors = queue_sender._send_batch_to_rabbitmq(
+            [{}, {}, {}], [b"{}"] * 3, [0, 1, 2], deadline=0.0
+        )
+
+    assert channel.basic_publish.call_count == 1
+    assert errors == {1: "publish deadline exceeded", 2: "publish deadline exceeded"}
+
+
+@pytest.mark.parametrize("declare, expected_calls", [(False, 0), (True, 1)])
+def test_exchange_is_declared_once_and_only_when_enabled(declare, expected_calls):
+    channel = MagicMock()
+    connection = MagicMock()
+    connection.__enter__.return_value.channel.return_value = channel
+    settings = {
+        "get_rabbitmq_user": "guest",
+        "get_rabbitmq_password": "guest",
+        "get_rabbitmq_host": "localhost",
+        "get_rabbitmq_port": 5672,
+        "get_rabbitmq_vhost": "/",
+        "get_rabbitmq_publish_confirms": False,
+        "get_rabbitmq_exchange": "detections",
+        "get_rabbitmq_exchange_type": "topic",
+        "get_rabbitmq_routing_key_template": "candlestick.{pattern}",
+        "get_rabbitmq_declare_exchange": declare,
+    }
+    with (
+        patch.multiple(
+            queue_sender.config_shared, **{k: lambda v=v: v for k, v in settings.items()}
+        ),
+        patch.object(queue_sender.pika, "BlockingConnection", return_value=connection),
+        patch.object(queue_sender, "_declared_exchanges", set()),
+    ):
+        for _ in range(2):
+            queue_sender._send_batch_to_rabbitmq([{"pattern": "Hammer"}], [b"{}"], [0])
+
+    assert channel.exchange_declare.call_count == expected_calls
+    assert channel.basic_publish.call_count == 2
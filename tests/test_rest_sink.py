@@ -0,0 +1,191 @@
+import gzip
+import json
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from app import output_handler, rest_sink
+from app.adaptive_limiter import AdaptiveLimiter, parse_retry_after
+from app.encoded_batch import EncodedBatch
+
+
+@pytest.fixture
+def rest_config():
+    session = MagicMock()
+    session.post.return_value = MagicMock(ok=True, status_code=200)
+    with (
+        patch.object(rest_sink, "get_session", return_value=session),
+        patch.object(rest_sink.config_shared, "get_rest_output_url", return_value="http://sink"),
+        patch.object(rest_sink.config_shared, "get_rest_timeout", return_value=3),
+        patch.object(rest_sink.config_shared, "get_rest_gzip_enabled", return_value=True),
+        patch.object(rest_sink.config_shared, "get_rest_gzip_min_bytes", return_value=64),
+        patch.object(rest_sink.config_shared, "get_rest_max_body_bytes", return_value=1024),
+        patch.object(rest_sink.config_shared, "get_rest_throttle_max_retries", return_value=0),
+        patch.object(rest_sink, "get_limiter", return_value=None),
+    ):
+        yield session
+
+
+def _posted_items(session):
+    items = []
+    for call in session.post.call_args_list:
+        body = call.kwargs["data"]
+        if call.kwargs["headers"].get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        items.extend(json.loads(body))
+    return items
+
+
+def test_chunk_bodies_respects_limit():
+    items = [b'{"n":%d}' % i for i in range(10)]
+    bodies = rest_sink.chunk_bodies(items, max_bytes=30)
+    assert all(len(body) <= 30 for body in bodies)
+    assert [x for body in bodies for x in json.loads(body)] == [{"n": i} for i in range(10)]
+
+
+def test_chunk_bodies_sends_oversized_item_alone():
+    bodies = rest_sink.chunk_bodies([b'"' + b"x" * 50 + b'"', b"1"], max_bytes=10)
+    assert len(bodies) == 2
+
+
+def test_small_batch_is_one_uncompressed_post(rest_config):
+    result = rest_sink.post_batch(EncodedBatch([{"a": 1}]))
+    assert result.ok and result.requests == 1
+    call = rest_config.post.call_args
+    assert call.args == ("http://sink",)
+    assert call.kwargs["timeout"] == 3
+    assert call.kwargs["headers"] == {}
+    assert call.kwargs["data"] == b'[{"a":1}]'
+
+
+def test_large_batch_is_chunked_and_gzipped(rest_config):
+    items = [{"symbol": "AAPL", "pattern": "Doji", "n": i} for i in range(100)]
+    result = rest_sink.post_batch(EncodedBatch(items))
+    assert result.requests == rest_config.post.call_count > 1
+    for call in rest_config.post.call_args_list:
+        assert call.kwargs["headers"] == {"Content-Encoding": "gzip"}
+    assert _posted_items(rest_config) == items
+
+
+def test_failed_requests_are_counted(rest_config):
+    rest_config.post.side_effect = [
+        MagicMock(ok=False, status_code=503),
+        requests.ConnectionError("down"),
+    ]
+    items = [{"n": "x" * 600}, {"n": "y" * 600}]
+    result = rest_sink.post_batch(EncodedBatch(items))
+    assert not result.ok
+    assert result.failed == 2
+    assert result.statuses == ["503", "exception"]
+    assert result.failed_items == [0, 1]
+
+
+def test_dispatcher_retries_and_spools_only_failed_bodies(rest_config):
+    rest_config.post.side_effect = [
+        MagicMock(ok=True, status_code=200),
+        MagicMock(ok=False, status_code=500),
+        MagicMock(ok=False, status_code=500),
+    ]
+    items = [{"n": "x" * 600}, {"n": "y" * 600}]
+    dispatcher = output_handler.OutputDispatcher()
+    spooled = []
+    with (
+        patch.object(output_handler.config_shared, "get_output_sink_max_attempts", return_value=2),
+        patch.object(dispatcher, "_spool", side_effect=lambda mode, lines: spooled.extend(lines)),
+    ):
+        [outcome] = dispatcher.fan_out([("rest", EncodedBatch(items))])
+
+    assert not outcome.ok and outcome.attempts == 2
+    assert _posted_items(rest_config) == [items[0], items[1], items[1]]
+    assert [json.loads(line) for line in spooled] == [items[1]]
+
+
+def test_session_is_shared():
+    rest_sink.get_session.cache_clear()
+    assert rest_sink.get_session() is rest_sink.get_session()
+
+
+def _response(status, retry_after=None):
+    headers = {"Retry-After": retry_after} if retry_after else {}
+    return MagicMock(ok=200 <= status < 300, status_code=status, headers=headers)
+
+
+def test_parse_retry_after():
+    now = datetime(2025, 4, 16, 10, 0, 0, tzinfo=timezone.utc)
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("Wed, 16 Apr 2025 10:00:30 GMT", now=lambda: now) == 30.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_limiter_grows_on_success_and_halves_on_429():
+    limiter = AdaptiveLimiter("rest", initial=4, min_limit=1, max_limit=8)
+    for _ in range(8):
+        assert limiter.acquire(timeout=0)
+        limiter.release(200)
+    assert limiter.limit == 5
+    assert limiter.acquire(timeout=0)
+    limiter.release(429)
+    assert limiter.limit == 2
+    assert limiter.acquire(timeout=0)
+    limiter.release(503)
+    limiter.acquire(timeout=0)
+    limiter.release(503)
+    assert limiter.limit == 1
+
+
+def test_limiter_bounds_inflight_requests():
+    limiter = AdaptiveLimiter("rest", initial=2)
+    assert limiter.acquire(timeout=0) and limiter.acquire(timeout=0)
+    assert not limiter.acquire(timeout=0.01)
+    limiter.release(200)
+    assert limiter.acquire(timeout=0)
+
+
+def test_limiter_honours_retry_after():
+    now = [0.0]
+    limiter = AdaptiveLimiter("rest", initial=4, clock=lambda: now[0])
+    limiter.acquire()
+    limiter.release(429, retry_after=5)
+    assert not limiter.acquire(timeout=0)
+    now[0] = 5.0
+    assert limiter.acquire(timeout=0)
+
+
+def test_token_bucket_caps_request_rate():
+    now = [0.0]
+    limiter = AdaptiveLimiter("rest", initial=10, rate=2, burst=2, clock=lambda: now[0])
+    for _ in range(2):
+        assert limiter.acquire(timeout=0)
+        limiter.release(200)
+    assert not limiter.acquire(timeout=0)
+    now[0] = 0.5
+    assert limiter.acquire(timeout=0)
+
+
+def test_throttled_body_is_retried(rest_config):
+    limiter = AdaptiveLimiter("rest", initial=4)
+    rest_config.post.side_effect = [_response(429, "0"), _response(200)]
+    with (
+        patch.object(rest_sink, "get_limiter", return_value=limiter),
+        patch.object(rest_sink.config_shared, "get_rest_throttle_max_retries", return_value=2),
+    ):
+        result = rest_sink.post_batch(EncodedBatch([{"a": 1}]))
+    assert result.ok and result.statuses == ["429", "200"]
+    assert limiter.limit == 2 and limiter.inflight == 0
+
+
+def test_throttled_body_backs_off_without_retry_after(rest_config):
+    responses = [_response(503), _response(429), _response(429, "3"), _response(200)]
+    rest_config.post.side_effect = responses
+    with (
+        patch.object(rest_sink.config_shared, "get_rest_throttle_max_retries", return_value=3),
+        patch.object(rest_sink.config_shared, "get_rest_retry_backoff_seconds", return_value=0.5),
+        patch.object(rest_sink.config_shared, "get_rest_retry_after_max_seconds", return_value=60),
+        patch.object(rest_sink.time, "sleep") as sleep,
+    ):
+        result = rest_sink.post_batch(EncodedBatch([{"a": 1}]))
+    assert result.ok and result.statuses == ["503", "429", "429", "200"]
+    assert [c.args[0] for c in sleep.call_args_list] == [0.5, 1.0, 3.0]
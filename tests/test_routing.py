@@ -0,0 +1,49 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.routing import build_routing_key, resolve_routing_key, routing_token, template_is_valid
+
+
+def test_routing_token_normalizes_words():
+    assert routing_token("No clear pattern") == "no_clear_pattern"
+    assert routing_token("BRK.B") == "brk_b"
+    assert routing_token(None) == "unknown"
+    assert routing_token("...") == "unknown"
+
+
+def test_build_routing_key_from_template():
+    message = {"symbol": "AAPL", "pattern": "Inverted Hammer"}
+    key = build_routing_key(message, "candlestick.{pattern}.{symbol}")
+    assert key == "candlestick.inverted_hammer.aapl"
+
+
+def test_build_routing_key_unknown_placeholder():
+    assert build_routing_key({}, "x.{nope}") == "x.unknown"
+
+
+@patch("app.routing.config_shared.get_rabbitmq_routing_key", return_value="stock_data")
+@patch("app.routing.config_shared.get_rabbitmq_routing_key_template", return_value="")
+def test_resolve_routing_key_without_template(mock_template, mock_key):
+    assert resolve_routing_key({"pattern": "Doji"}) == "stock_data"
+
+
+@patch(
+    "app.routing.config_shared.get_rabbitmq_routing_key_template",
+    return_value="candlestick.{pattern}.{symbol}",
+)
+def test_resolve_routing_key_override_wins(mock_template):
+    assert resolve_routing_key({"pattern": "Doji"}, "trades.paper") == "trades.paper"
+    assert resolve_routing_key({"pattern": "Doji", "symbol": "MSFT"}) == "candlestick.doji.msft"
+
+
+@patch("app.routing.config_shared.get_rabbitmq_routing_key", return_value="stock_data")
+@pytest.mark.parametrize(
+    "template", ["candlestick.{0}", "candlestick.{pattern", "x.{symbol.y}", "x.{symbol[y]}"]
+)
+def test_resolve_routing_key_falls_back_for_invalid_template(mock_key, template):
+    with patch(
+        "app.routing.config_shared.get_rabbitmq_routing_key_template", return_value=template
+    ):
+        assert resolve_routing_key({"pattern": "Doji"}) == "stock_data"
+    assert not template_is_valid(template)
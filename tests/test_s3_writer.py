@@ -0,0 +1,205 @@
+import gzip
+import json
+import os
+import threading
+from unittest.mock import patch
+
+from app import output_handler
+from app.circuit_breaker import CircuitBreaker
+from app.encoded_batch import EncodedBatch
+from app.s3_writer import (
+    MIN_MULTIPART_CHUNK_BYTES,
+    S3RollupWriter,
+    parse_timestamp,
+    partition_path,
+)
+
+
+class LocalS3:
+    """Minimal in-memory stand-in for the boto3 S3 client."""
+
+    def __init__(self, fail_part=None):
+        self.objects = {}
+        self.uploads = {}
+        self.aborted = []
+        self.fail_part = fail_part
+        self._lock = threading.Lock()
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[(Bucket, Key)] = Body.read() if hasattr(Body, "read") else Body
+        return {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        upload_id = f"upload-{len(self.uploads)}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        if PartNumber == self.fail_part:
+            raise RuntimeError("part failed")
+        with self._lock:
+            self.uploads[UploadId][PartNumber] = Body
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        numbers = [p["PartNumber"] for p in MultipartUpload["Parts"]]
+        assert numbers == sorted(parts)
+        self.objects[(Bucket, Key)] = b"".join(parts[n] for n in numbers)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(UploadId)
+        self.uploads.pop(UploadId, None)
+
+    def read_ndjson(self, key):
+        body = self.objects[key]
+        return [json.loads(line) for line in gzip.decompress(body).splitlines()]
+
+
+def _writer(s3, now, **kwargs):
+    options = {"max_bytes": 1024 * 1024, "max_age_seconds": 60.0}
+    options.update(kwargs)
+    return S3RollupWriter(
+        "bucket",
+        prefix="output",
+        client_factory=lambda: s3,
+        clock=lambda: now[0],
+        start_flusher=False,
+        **options,
+    )
+
+
+def test_parse_timestamp_variants():
+    assert parse_timestamp("2025-04-16T10:00:00").hour == 10
+    assert parse_timestamp("2025-04-16T10:00:00+02:00").hour == 8
+    assert parse_timestamp(1744797600000).year == 2025
+    assert parse_timestamp("nope") is None
+
+
+def test_partition_path():
+    item = {"symbol": "BRK/B", "timestamp": "2025-04-16T10:30:00Z"}
+    assert partition_path(item) == "dt=2025-04-16/hour=10/symbol=BRK_B"
+
+
+def test_rollup_flushes_by_age_into_partitions():
+    s3, now = LocalS3(), [0.0]
+    writer = _writer(s3, now)
+    writer.add(
+        EncodedBatch(
+            [
+                {"symbol": "AAPL", "timestamp": "2025-04-16T10:00:00", "pattern": "Doji"},
+                {"symbol": "AAPL", "timestamp": "2025-04-16T10:59:00", "pattern": "Hammer"},
+                {"symbol": "MSFT", "timestamp": "2025-04-16T11:00:00", "pattern": "Doji"},
+            ]
+        )
+    )
+    writer.flush(force=False)
+    assert s3.objects == {}
+
+    now[0] = 61.0
+    writer.flush(force=False)
+    keys = sorted(key for _, key in s3.objects)
+    assert len(keys) == 2
+    assert keys[0].startswith("output/dt=2025-04-16/hour=10/symbol=AAPL/part-")
+    assert keys[0].endswith(".ndjson.gz")
+    assert keys[1].startswith("output/dt=2025-04-16/hour=11/symbol=MSFT/")
+    assert [r["pattern"] for r in s3.read_ndjson(("bucket", keys[0]))] == ["Doji", "Hammer"]
+
+
+def test_rollup_flushes_by_size():
+    s3 = LocalS3()
+    writer = _writer(s3, [0.0], max_bytes=100)
+    items = [{"symbol": "AAPL", "timestamp": "2025-04-16T10:00:00", "n": "x" * 40}] * 3
+    writer.add(EncodedBatch(items))
+    assert len(s3.objects) == 1
+    writer.close()
+    assert len(s3.objects) == 2
+    assert len({key for _, key in s3.objects}) == 2
+
+
+def _random_items(count):
+    # Incompressible payloads so the gzip body spans several parts.
+    return [
+        {"symbol": "AAPL", "timestamp": "2025-04-16T10:00:00", "n": os.urandom(64).hex()}
+        for _ in range(count)
+    ]
+
+
+def test_large_rollup_uses_parallel_multipart_upload():
+    s3 = LocalS3()
+    writer = _writer(
+        s3, [0.0], multipart_threshold=4096, multipart_chunk_bytes=1024, multipart_concurrency=3
+    )
+    items = _random_items(200)
+    writer.add(EncodedBatch(items))
+    writer.close()
+    [key] = list(s3.objects)
+    assert [r["n"] for r in s3.read_ndjson(key)] == [i["n"] for i in items]
+    assert s3.uploads == {} and s3.aborted == []
+
+
+def test_failed_multipart_upload_is_aborted_and_reported():
+    s3, failed = LocalS3(fail_part=2), []
+    writer = _writer(
+        s3, [0.0], multipart_threshold=4096, multipart_chunk_bytes=1024, on_failure=failed.append
+    )
+    writer.add(EncodedBatch(_random_items(200)))
+    writer.close()
+    assert s3.objects == {} and s3.aborted == ["upload-0"]
+    assert len(failed) == 1 and len(failed[0]) == 200
+
+
+def test_partitions_upload_concurrently():
+    s3 = LocalS3()
+    writer = _writer(s3, [0.0], upload_concurrency=3)
+    barrier = threading.Barrier(3, timeout=2)
+    put_object = s3.put_object
+
+    def blocking_put(**kwargs):
+        barrier.wait()  # only passes if all three partitions upload at once
+        return put_object(**kwargs)
+
+    s3.put_object = blocking_put
+    writer.add(
+        EncodedBatch(
+            [{"symbol": s, "timestamp": "2025-04-16T10:00:00"} for s in ("AAPL", "MSFT", "IBM")]
+        )
+    )
+    writer.close()
+    assert len(s3.objects) == 3
+
+
+def test_failed_uploads_trip_the_s3_circuit_breaker():
+    class FailingS3(LocalS3):
+        def put_object(self, **kwargs):
+            raise OSError("unreachable")
+
+    dispatcher = output_handler.OutputDispatcher()
+    breaker = CircuitBreaker("s3", window=2, min_calls=2)
+    dispatcher._breakers["s3"] = breaker
+    dispatcher._s3_writer = _writer(
+        FailingS3(),
+        [0.0],
+        max_bytes=1,
+        on_outcome=dispatcher._breaker_hook("s3"),
+    )
+    batch = EncodedBatch([{"symbol": "AAPL", "timestamp": "2025-04-16T10:00:00Z"}])
+    with (
+        patch.object(
+            output_handler.config_shared, "get_circuit_breaker_enabled", return_value=True
+        ),
+        patch.object(dispatcher, "_spool", return_value=True),
+    ):
+        assert [o.ok for o in dispatcher.fan_out([("s3", batch)])] == [True]
+        assert breaker.state == "closed"
+        dispatcher.fan_out([("s3", batch)])
+        assert breaker.state == "open"
+
+        [outcome] = dispatcher.fan_out([("s3", batch)])
+    assert outcome.short_circuited
+
+
+def test_from_config_raises_chunk_size_to_the_s3_minimum():
+    with patch("app.s3_writer.config_shared.get_s3_multipart_chunk_bytes", return_value=1024):
+        writer = S3RollupWriter.from_config()
+    assert writer.multipart_chunk_bytes == MIN_MULTIPART_CHUNK_BYTES
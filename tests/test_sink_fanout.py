@@ -0,0 +1,89 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from app.sink_fanout import SinkFanout, SinkPolicy
+
+
+def test_sinks_run_concurrently():
+    fanout = SinkFanout(max_workers=3)
+    barrier = threading.Barrier(3, timeout=2)
+
+    def sink():
+        barrier.wait()  # only passes if all three sinks run at once
+        return True
+
+    outcomes = fanout.run([("queue", sink), ("s3", sink), ("database", sink)], {})
+    assert [(o.mode, o.ok) for o in outcomes] == [("queue", True), ("s3", True), ("database", True)]
+    fanout.shutdown()
+
+
+def test_failure_is_isolated_per_sink():
+    fanout = SinkFanout(max_workers=2)
+
+    def broken():
+        raise RuntimeError("boom")
+
+    outcomes = fanout.run([("rest", broken), ("s3", lambda: True)], {})
+    assert not outcomes[0].ok and outcomes[0].error == "boom"
+    assert outcomes[1].ok
+    fanout.shutdown()
+
+
+def test_slow_sink_misses_its_deadline():
+    fanout = SinkFanout(max_workers=2)
+    release = threading.Event()
+
+    def slow():
+        release.wait(2)
+        return True
+
+    start = time.monotonic()
+    outcomes = fanout.run(
+        [("database", slow), ("queue", lambda: True)],
+        {"database": SinkPolicy(timeout=0.1)},
+    )
+    assert time.monotonic() - start < 1
+    assert outcomes[0].timed_out and not outcomes[0].ok
+    assert outcomes[1].ok
+    release.set()
+    fanout.shutdown()
+
+
+def test_failed_sink_is_retried_within_budget():
+    results = iter([False, False, True])
+    outcome = SinkFanout().run(
+        [("rest", lambda: next(results))],
+        {"rest": SinkPolicy(timeout=5, max_attempts=3, backoff=0)},
+    )[0]
+    assert outcome.ok and outcome.attempts == 3
+
+
+def test_retries_stop_at_max_attempts():
+    calls = []
+    outcome = SinkFanout().run(
+        [("rest", lambda: calls.append(1) or False)],
+        {"rest": SinkPolicy(timeout=5, max_attempts=2, backoff=0)},
+    )[0]
+    assert not outcome.ok and outcome.attempts == 2 and len(calls) == 2
+
+
+def test_future_result_is_reported_as_pending():
+    future = Future()
+    outcome = SinkFanout().run([("database", lambda: future)], {})[0]
+    assert outcome.ok and outcome.pending is future
+
+
+def test_single_sink_deadline_is_enforced():
+    release = threading.Event()
+    fanout = SinkFanout()
+
+    start = time.monotonic()
+    [outcome] = fanout.run([("rest", lambda: release.wait(2))], {"rest": SinkPolicy(timeout=0.1)})
+    assert time.monotonic() - start < 1
+    assert outcome.timed_out and not outcome.ok
+    assert outcome.straggler is not None and not outcome.straggler.done()
+
+    release.set()
+    assert outcome.straggler.result(timeout=2).ok
+    fanout.shutdown()
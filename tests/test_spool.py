@@ -0,0 +1,151 @@
+import json
+import threading
+from unittest.mock import patch
+
+from app import output_handler
+from app.circuit_breaker import CircuitBreaker
+from app.encoded_batch import EncodedBatch
+from app.spool import SinkSpool
+
+
+def _encode(*items):
+    return [json.dumps(item).encode() for item in items]
+
+
+def test_append_and_replay_in_order(tmp_path):
+    spool = SinkSpool(str(tmp_path), "rest")
+    spool.append(_encode({"n": 1}, {"n": 2}))
+    spool.append(_encode({"n": 3}))
+
+    sent = []
+    assert spool.replay(lambda batch: sent.append(batch.items) or True) == 2
+    assert sent == [[{"n": 1}, {"n": 2}], [{"n": 3}]]
+    assert spool.size == 0
+    assert list((tmp_path / "rest").iterdir()) == []
+
+
+def test_replay_stops_on_failure_and_resumes(tmp_path):
+    spool = SinkSpool(str(tmp_path), "database")
+    for n in range(3):
+        spool.append(_encode({"n": n}))
+
+    results = iter([True, False])
+    assert spool.replay(lambda batch: next(results)) == 1
+    spool.close()
+
+    reopened = SinkSpool(str(tmp_path), "database")
+    sent = []
+    assert reopened.replay(lambda batch: sent.append(batch.items[0]["n"]) or True) == 2
+    assert sent == [1, 2]
+
+
+def test_segments_roll_over_and_cap_drops_oldest(tmp_path):
+    spool = SinkSpool(str(tmp_path), "s3", segment_bytes=50, max_bytes=120)
+    for n in range(10):
+        spool.append(_encode({"n": n, "pad": "x" * 20}))
+
+    assert spool.size <= 120 + 50
+    sent = []
+    spool.replay(lambda batch: sent.append(batch.items[0]["n"]) or True)
+    assert sent == sorted(sent)
+    assert sent[-1] == 9
+    assert 0 not in sent
+
+
+def test_cap_removes_position_sidecar_of_dropped_segment(tmp_path):
+    spool = SinkSpool(str(tmp_path), "s3", segment_bytes=100, max_bytes=300)
+    spool.append(_encode({"n": 0, "pad": "x" * 40}))
+    spool.append(_encode({"n": 1, "pad": "x" * 40}))
+    results = iter([True, False])
+    assert spool.replay(lambda batch: next(results)) == 1
+    assert (tmp_path / "s3" / "000000000001.pos").exists()
+
+    for n in range(2, 8):
+        spool.append(_encode({"n": n, "pad": "x" * 40}))
+
+    assert not (tmp_path / "s3" / "000000000001.seg").exists()
+    assert not (tmp_path / "s3" / "000000000001.pos").exists()
+
+
+def test_replay_goes_through_the_circuit_breaker():
+    dispatcher = output_handler.OutputDispatcher()
+    breaker = CircuitBreaker("rest", window=1, min_calls=1)
+    dispatcher._breakers["rest"] = breaker
+    batch = EncodedBatch([{"symbol": "AAPL"}])
+    with (
+        patch.object(
+            output_handler.config_shared, "get_circuit_breaker_enabled", return_value=True
+        ),
+        patch.object(dispatcher, "dispatch", return_value=False) as dispatch,
+    ):
+        assert not dispatcher._replay("rest", batch)
+        assert not dispatcher._replay("rest", batch)
+    assert breaker.state == "open"
+    assert dispatch.call_count == 1
+
+
+def test_dispatcher_spools_failed_sink(tmp_path):
+    dispatcher = output_handler.OutputDispatcher()
+    batch = EncodedBatch([{"symbol": "AAPL"}])
+    with (
+        patch.object(output_handler.config_shared, "get_spool_enabled", return_value=True),
+        patch.object(output_handler.config_shared, "get_spool_sinks", return_value=["rest"]),
+        patch.object(output_handler.config_shared, "get_spool_dir", return_value=str(tmp_path)),
+        patch.object(
+            output_handler.config_shared, "get_spool_replay_interval_seconds", return_value=60
+        ),
+        patch.object(dispatcher, "dispatch", return_value=False),
+    ):
+        [outcome] = dispatcher.fan_out([("rest", batch)])
+        assert not outcome.ok and outcome.spooled
+        assert dispatcher._spools["rest"].size > 0
+        dispatcher.close()
+
+
+def test_dispatcher_spools_timed_out_sink_only_once_it_fails(tmp_path):
+    dispatcher = output_handler.OutputDispatcher()
+    batch = EncodedBatch([{"symbol": "AAPL"}])
+    release = threading.Event()
+    results = iter([True, False])
+
+    def slow_dispatch(mode, batch, on_undelivered=None):
+        release.wait(2)
+        return next(results)
+
+    with (
+        patch.object(output_handler.config_shared, "get_spool_enabled", return_value=True),
+        patch.object(output_handler.config_shared, "get_spool_sinks", return_value=["rest"]),
+        patch.object(output_handler.config_shared, "get_spool_dir", return_value=str(tmp_path)),
+        patch.object(
+            output_handler.config_shared, "get_spool_replay_interval_seconds", return_value=60
+        ),
+        patch.object(
+            output_handler.config_shared, "get_output_sink_timeout_seconds", return_value=0.05
+        ),
+        patch.object(dispatcher, "dispatch", side_effect=slow_dispatch),
+    ):
+        [late] = dispatcher.fan_out([("rest", batch)])
+        release.set()
+        dispatcher.fanout.shutdown()  # waits for the worker and its callbacks
+        assert late.timed_out and late.straggler.result().ok
+        assert dispatcher._spools["rest"].size == 0
+
+        release.clear()
+        [failed] = dispatcher.fan_out([("rest", batch)])
+        assert dispatcher._spools["rest"].size == 0
+        release.set()
+        dispatcher.fanout.shutdown()
+        assert not failed.straggler.result().ok
+        assert dispatcher._spools["rest"].size > 0
+        dispatcher.close()
+
+
+def test_spool_hook_logs_results_it_cannot_spool():
+    dispatcher = output_handler.OutputDispatcher()
+    with (
+        patch.object(output_handler.config_shared, "get_spool_enabled", return_value=False),
+        patch.object(output_handler.logger, "error") as error,
+    ):
+        dispatcher._spool_hook("parquet")([b'{"symbol":"AAPL"}', b'{"symbol":"MSFT"}'])
+    error.assert_called_once()
+    assert error.call_args.args[1:] == (2, "parquet")
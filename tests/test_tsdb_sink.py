@@ -0,0 +1,166 @@
+import gzip
+import threading
+from datetime import UTC, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app import tsdb_sink
+from app.encoded_batch import EncodedBatch
+
+
+def _result(symbol="AAPL", pattern="Hammer", timestamp="2025-04-16T10:00:00", close=101.5):
+    return {
+        "symbol": symbol,
+        "pattern": pattern,
+        "timestamp": timestamp,
+        "raw_data": {"data": {"open": 100, "high": 102, "low": 99, "close": close}},
+    }
+
+
+class StandInTSDB:
+    """Local HTTP server that records line-protocol writes."""
+
+    def __init__(self):
+        self.requests = []
+        self.responses = []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                stand_in.requests.append((self.path, dict(self.headers), body))
+                status, headers = stand_in.responses.pop(0) if stand_in.responses else (204, {})
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/v2/write?bucket=b"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def lines(self):
+        return [line for _, _, body in self.requests for line in body.split(b"\n")]
+
+
+@pytest.fixture
+def tsdb():
+    stand_in = StandInTSDB()
+    tsdb_sink.get_session.cache_clear()
+    with (
+        patch.object(tsdb_sink.config_shared, "get_tsdb_write_url", return_value=stand_in.url),
+        patch.object(tsdb_sink.config_shared, "get_tsdb_auth_token", return_value="secret"),
+        patch.object(tsdb_sink.config_shared, "get_tsdb_pool_size", return_value=2),
+        patch.object(
+            tsdb_sink.config_shared, "get_tsdb_measurement", return_value="candlestick_pattern"
+        ),
+        patch.object(tsdb_sink.config_shared, "get_tsdb_precision", return_value="ms"),
+        patch.object(tsdb_sink.config_shared, "get_tsdb_timeout", return_value=5),
+        patch.object(tsdb_sink.config_shared, "get_tsdb_max_body_bytes", return_value=4096),
+        patch.object(tsdb_sink.config_shared, "get_tsdb_gzip_enabled", return_value=True),
+        patch.object(tsdb_sink.config_shared, "get_tsdb_max_retries", return_value=2),
+        patch.object(tsdb_sink.config_shared, "get_tsdb_retry_backoff_seconds", return_value=0),
+    ):
+        yield stand_in
+    stand_in.server.shutdown()
+    stand_in.server.server_close()
+    tsdb_sink.get_session.cache_clear()
+
+
+def test_encode_point_tags_fields_and_timestamp():
+    line = tsdb_sink.encode_point(_result(), "candlestick_pattern")
+    assert line == (
+        b"candlestick_pattern,symbol=AAPL,pattern=Hammer "
+        b"open=100.0,high=102.0,low=99.0,close=101.5 1744797600000"
+    )
+
+
+def test_encode_point_escapes_and_falls_back_to_detected_field():
+    item = {"symbol": "BRK B", "pattern": "Three=Soldiers,Bull", "timestamp": 1744797600}
+    line = tsdb_sink.encode_point(item, "my measurement", precision="s")
+    assert line == (
+        rb"my\ measurement,symbol=BRK\ B,pattern=Three\=Soldiers\,Bull detected=1i 1744797600"
+    )
+
+
+def test_encode_point_tags_model_and_version():
+    item = {**_result(), "model": "candlestick", "model_version": "1.0"}
+    line = tsdb_sink.encode_point(item, "m")
+    assert line.startswith(b"m,symbol=AAPL,pattern=Hammer,model=candlestick,model_version=1.0 ")
+
+
+def test_encode_point_without_timestamp_is_stamped_at_encode_time():
+    now = datetime(2025, 4, 16, 10, 0, 0, 1000, tzinfo=UTC)
+    line = tsdb_sink.encode_point(
+        _result(timestamp=None, pattern=None), "m", precision="ns", now=now
+    )
+    assert line == b"m,symbol=AAPL open=100.0,high=102.0,low=99.0,close=101.5 1744797600001000000"
+
+    before = datetime.now(UTC)
+    line = tsdb_sink.encode_point(_result(timestamp=None), "m", precision="s")
+    assert int(line.rsplit(b" ", 1)[1]) >= int(before.timestamp())
+
+
+def test_chunk_lines_respects_max_bytes():
+    lines = [b"a" * 10, b"b" * 10, b"c" * 30]
+    assert tsdb_sink.chunk_lines(lines, max_bytes=25) == [b"a" * 10 + b"\n" + b"b" * 10, b"c" * 30]
+
+
+def test_write_batch_posts_gzip_line_protocol(tsdb):
+    items = [_result(symbol=f"SYM{i}") for i in range(100)]
+
+    result = tsdb_sink.write_batch(EncodedBatch(items))
+
+    assert result.ok
+    assert result.requests == len(tsdb.requests) > 1
+    path, headers, _ = tsdb.requests[0]
+    assert parse_qs(urlparse(path).query) == {"bucket": ["b"], "precision": ["ms"]}
+    assert headers["Authorization"] == "Token secret"
+    assert headers["Content-Encoding"] == "gzip"
+    assert [line.split(b",")[1] for line in tsdb.lines()] == [
+        f"symbol=SYM{i}".encode() for i in range(100)
+    ]
+
+
+def test_write_batch_retries_transient_failures(tsdb):
+    tsdb.responses = [(503, {"Retry-After": "0"}), (500, {})]
+
+    result = tsdb_sink.write_batch(EncodedBatch([_result()]))
+
+    assert result.ok
+    assert result.statuses == ["503", "500", "204"]
+    assert len(tsdb.lines()) == 3
+
+
+def test_write_batch_does_not_retry_rejected_points(tsdb):
+    tsdb.responses = [(400, {})]
+
+    result = tsdb_sink.write_batch(EncodedBatch([_result()]))
+
+    assert not result.ok
+    assert result.statuses == ["400"]
+
+
+def test_write_batch_gives_up_after_max_retries(tsdb):
+    tsdb.responses = [(503, {})] * 3
+
+    result = tsdb_sink.write_batch(EncodedBatch([_result()]))
+
+    assert not result.ok
+    assert result.failed == 1
+    assert result.statuses == ["503", "503", "503"]
+
+
+def test_write_batch_requires_url(tsdb):
+    with patch.object(tsdb_sink.config_shared, "get_tsdb_write_url", return_value=""):
+        with pytest.raises(ValueError):
+            tsdb_sink.write_batch(EncodedBatch([_result()]))